@@ -0,0 +1,60 @@
+"""Synthetic ASGI plumbing, drives an application without any server or socket"""
+import typing
+
+from smolapi.types import Scope, Message
+
+
+def http_scope(
+    method: str = "GET",
+    path: str = "/",
+    query_string: bytes = b"",
+    headers: typing.Optional[typing.List[typing.Tuple[bytes, bytes]]] = None,
+) -> Scope:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("latin-1"),
+        "query_string": query_string,
+        "root_path": "",
+        "headers": headers or [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+def body_receiver(body: bytes = b"", chunk_size: int = 65536) -> typing.Callable:
+    """Receive callable replaying `body` as http.request messages"""
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+
+    async def receive() -> Message:
+        if chunks:
+            chunk = chunks.pop(0)
+            return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    return receive
+
+
+async def discard(message: Message) -> None:
+    pass
+
+
+async def run_lifespan_startup(app: typing.Callable) -> None:
+    """Send lifespan.startup to the application and return once it completes"""
+    import asyncio
+
+    messages: "asyncio.Queue[Message]" = asyncio.Queue()
+    started = asyncio.Event()
+
+    async def send(message: Message) -> None:
+        if message["type"].startswith("lifespan.startup"):
+            started.set()
+
+    await messages.put({"type": "lifespan.startup"})
+    task = asyncio.ensure_future(app({"type": "lifespan"}, messages.get, send))
+    await started.wait()
+    task.cancel()
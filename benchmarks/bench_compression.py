@@ -0,0 +1,111 @@
+"""
+Throughput and ratio of Compression per encoding and level, on a JSON list
+endpoint sent at once and as a stream of 64 KiB chunks
+
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --size 4194304 --requests 5
+
+br and zstd are only measured when brotli and zstandard are installed.
+"""
+import argparse
+import asyncio
+import json
+import time
+import typing
+
+from smolapi.application import Application
+from smolapi.compression import Compression, available_encodings
+from smolapi.response import Response, StreamingResponse
+from smolapi.routing import Route
+
+from ._asgi import body_receiver, http_scope, run_lifespan_startup
+
+
+LEVELS = {
+    "gzip": (1, 3, 6, 9),
+    "deflate": (1, 6, 9),
+    "br": (1, 4, 6, 9, 11),
+    "zstd": (1, 3, 6, 12, 19),
+}
+CHUNK_SIZE = 64 * 1024
+
+
+def build_payload(size: int) -> bytes:
+    # Rows of a typical list endpoint, repetitive keys and varied values
+    items = []
+    length = 0
+    index = 0
+    while length < size:
+        item = {"id": index, "name": f"user {index}", "email": f"user{index}@example.com",
+                "active": index % 3 != 0, "score": index * 7919 % 1000 / 10, "tags": ["a", "b", str(index % 17)]}
+        items.append(item)
+        length += 110
+        index += 1
+    return json.dumps({"items": items}).encode()
+
+
+async def _application(payload: bytes, encoding: typing.Optional[str], level: int) -> Application:
+    async def whole(request):
+        return Response(payload, media_type="application/json")
+
+    async def streamed(request):
+        async def chunks():
+            for start in range(0, len(payload), CHUNK_SIZE):
+                yield payload[start : start + CHUNK_SIZE]
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    middlewares = [] if encoding is None else [Compression(encodings=[encoding], levels={encoding: level})]
+    app = Application(root_dir=".", routes=[
+        Route.get("/whole", whole, middlewares=middlewares),
+        Route.get("/stream", streamed, middlewares=middlewares),
+    ])
+    await run_lifespan_startup(app)
+    return app
+
+
+async def _measure(app: Application, path: str, encoding: str, requests: int) -> typing.Tuple[float, int]:
+    """Seconds per response and bytes sent"""
+    sent = 0
+
+    async def send(message) -> None:
+        nonlocal sent
+        sent += len(message.get("body", b""))
+
+    headers = [(b"accept-encoding", encoding.encode())]
+    await app(http_scope("GET", path, headers=headers), body_receiver(), send)
+    started = time.perf_counter()
+    sent = 0
+    for _ in range(requests):
+        await app(http_scope("GET", path, headers=headers), body_receiver(), send)
+    return (time.perf_counter() - started) / requests, sent // requests
+
+
+async def run(size: int, requests: int) -> None:
+    payload = build_payload(size)
+    available = available_encodings()
+    print(f"payload {len(payload) / 1024 / 1024:.2f} MiB, encodings: {', '.join(available)}")
+    print(f"{'encoding':<10} {'level':>5} {'mode':<7} {'ms/resp':>9} {'MiB/s':>8} {'ratio':>7} {'sent KiB':>10}")
+    runs = [("identity", 0)] + [
+        (encoding, level) for encoding, levels in LEVELS.items() if encoding in available for level in levels
+    ]
+    for encoding, level in runs:
+        app = await _application(payload, None if encoding == "identity" else encoding, level)
+        for mode in ("whole", "stream"):
+            seconds, sent = await _measure(app, f"/{mode}", encoding, requests)
+            print(
+                f"{encoding:<10} {level:>5} {mode:<7} {seconds * 1000:9.2f} "
+                f"{len(payload) / seconds / 1024 / 1024:8.1f} {len(payload) / sent:7.2f} {sent / 1024:10.1f}"
+            )
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_compression")
+    parser.add_argument("--size", type=int, default=2 * 1024 * 1024, help="Payload bytes. Defaults to 2 MiB.")
+    parser.add_argument("--requests", type=int, default=10, help="Responses per measure. Defaults to 10.")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.size, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cost of a compiled middleware chain, 0 vs 10 middlewares on one route
+
+    python -m benchmarks.bench_middleware
+"""
+import asyncio
+import time
+import tracemalloc
+
+from smolapi.application import Application
+from smolapi.middleware import BaseMiddleware
+from smolapi.routing import Route
+
+from ._asgi import discard, http_scope, run_lifespan_startup
+
+
+REQUESTS = 20000
+MIDDLEWARES = 10
+
+
+class PassThrough(BaseMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+class AsgiPassThrough:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.app(scope, receive, send)
+
+
+async def _empty_response(scope, receive, send) -> None:
+    pass
+
+
+async def _handler(request):
+    return _empty_response
+
+
+async def bench(middlewares: list) -> tuple:
+    app = Application(root_dir=".", routes=[Route.get("/", _handler, middlewares=middlewares)])
+    await run_lifespan_startup(app)
+    scope = http_scope("GET", "/")
+    for _ in range(1000):
+        await app(dict(scope), None, discard)
+
+    started = time.perf_counter_ns()
+    for _ in range(REQUESTS):
+        await app(dict(scope), None, discard)
+    elapsed = (time.perf_counter_ns() - started) / REQUESTS
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(1000):
+        await app(dict(scope), None, discard)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # Memory still held after the requests, a compiled chain should leave nothing behind
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return elapsed, retained / 1000
+
+
+async def main() -> None:
+    cases = {
+        "no middleware": [],
+        f"{MIDDLEWARES} request middlewares": [PassThrough() for _ in range(MIDDLEWARES)],
+        f"{MIDDLEWARES} ASGI middlewares": [AsgiPassThrough for _ in range(MIDDLEWARES)],
+    }
+    baseline = None
+    for label, middlewares in cases.items():
+        elapsed, retained = await bench(middlewares)
+        baseline = baseline or elapsed
+        print(
+            f"{label:>26}: {elapsed / 1000:7.2f} us/request "
+            f"(+{(elapsed - baseline) / 1000:5.2f} us), {retained:6.1f} B retained/request"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
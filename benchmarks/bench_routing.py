@@ -0,0 +1,66 @@
+"""
+Per-request dispatch cost of Application as the route table grows
+
+    python -m benchmarks.bench_routing
+"""
+import asyncio
+import random
+import time
+import typing
+
+from smolapi.application import Application
+from smolapi.routing import Route, Router
+
+from ._asgi import discard, http_scope, run_lifespan_startup
+
+
+ROUTE_COUNTS = (10, 100, 1000)
+REQUESTS = 20000
+
+
+async def _empty_response(scope, receive, send) -> None:
+    pass
+
+
+async def _handler(request):
+    return _empty_response
+
+
+def build_application(route_count: int, handler: typing.Callable = _handler) -> Application:
+    # Five CRUD routes per resource, each resource with a nested sub resource router
+    routers = []
+    for i in range(route_count // 5):
+        routers.append(
+            Router(
+                Route.get("/", handler),
+                Route.post("/", handler),
+                Route.get("/{id}", handler),
+                Route.patch("/{id}", handler),
+                Route.delete("/{id}", handler),
+                prefix=f"resource{i}",
+            )
+        )
+    return Application(root_dir=".", routes=routers)
+
+
+async def bench(route_count: int) -> float:
+    app = build_application(route_count)
+    await run_lifespan_startup(app)
+    resources = route_count // 5
+    paths = [f"/resource{random.randrange(resources)}/{i}" for i in range(REQUESTS)]
+    scopes = [http_scope("GET", path) for path in paths]
+
+    started = time.perf_counter_ns()
+    for scope in scopes:
+        await app(scope, None, discard)
+    return (time.perf_counter_ns() - started) / REQUESTS
+
+
+async def main() -> None:
+    for route_count in ROUTE_COUNTS:
+        per_request = await bench(route_count)
+        print(f"{route_count:>5} routes: {per_request / 1000:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Compiled validators of smolapi.parameter against pydantic v1 on a nested payload
+
+    python -m benchmarks.bench_validation
+"""
+import dataclasses
+import time
+import typing
+
+from smolapi.parameter import compile_validator
+
+
+ITERATIONS = 20000
+
+
+@dataclasses.dataclass
+class Address:
+    street: str
+    city: str
+    zip_code: str
+
+
+@dataclasses.dataclass
+class Contact:
+    id: int
+    email: str
+    verified: bool
+    address: Address
+    tags: typing.List[str]
+
+
+@dataclasses.dataclass
+class User:
+    id: int
+    name: str
+    score: float
+    contacts: typing.List[Contact]
+    extra: typing.Dict[str, int]
+    nickname: typing.Optional[str] = None
+
+
+PAYLOAD = {
+    "id": 1,
+    "name": "user",
+    "score": "9.5",
+    "contacts": [
+        {
+            "id": i,
+            "email": f"contact{i}@example.com",
+            "verified": i % 2 == 0,
+            "address": {"street": "Main street", "city": "Hanoi", "zip_code": "100000"},
+            "tags": ["a", "b", "c"],
+        }
+        for i in range(10)
+    ],
+    "extra": {"x": 1, "y": 2},
+}
+
+
+def _time(function: typing.Callable[[], typing.Any]) -> float:
+    for _ in range(1000):
+        function()
+    started = time.perf_counter_ns()
+    for _ in range(ITERATIONS):
+        function()
+    return (time.perf_counter_ns() - started) / ITERATIONS
+
+
+def _pydantic_models() -> typing.Optional[type]:
+    try:
+        import pydantic
+    except ImportError:
+        return None
+    if not pydantic.VERSION.startswith("1."):
+        return None
+
+    class PAddress(pydantic.BaseModel):
+        street: str
+        city: str
+        zip_code: str
+
+    class PContact(pydantic.BaseModel):
+        id: int
+        email: str
+        verified: bool
+        address: PAddress
+        tags: typing.List[str]
+
+    class PUser(pydantic.BaseModel):
+        id: int
+        name: str
+        score: float
+        contacts: typing.List[PContact]
+        extra: typing.Dict[str, int]
+        nickname: typing.Optional[str] = None
+
+    return PUser
+
+
+def main() -> None:
+    validator = compile_validator(User)
+    smolapi_ns = _time(lambda: validator(PAYLOAD))
+    print(f"smolapi.parameter: {smolapi_ns / 1000:8.2f} us/validation")
+
+    model = _pydantic_models()
+    if model is None:
+        print("pydantic v1 is not installed, skipped")
+        return
+    pydantic_ns = _time(lambda: model.parse_obj(PAYLOAD))
+    print(f"pydantic v1:       {pydantic_ns / 1000:8.2f} us/validation ({pydantic_ns / smolapi_ns:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Measure ASGI cases and compare them with a saved baseline
+
+A case is an application plus factories of the scope and receive callable
+of one request, `Application.__call__` is awaited directly, no server or socket.
+"""
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import typing
+
+from smolapi.types import Message, Scope
+
+from ._asgi import body_receiver
+
+
+__all__ = ["Case", "Result", "measure", "save", "load", "compare"]
+
+Receive = typing.Callable[[], typing.Awaitable[Message]]
+
+
+async def _collect(message: Message) -> None:
+    pass
+
+
+class Case:
+    """
+    One benchmarked request
+
+    Args:
+        name (str): Unique name, used as key in baselines
+        app (Callable): ASGI application, already started
+        scope (Callable[[], Scope]): Returns the scope of a request, a fresh one per call
+        receive (Callable[[], Receive], optional): Returns the receive callable. Defaults to an empty body.
+        iterations (int, optional): Timed requests. Defaults to 5000.
+        check (Callable[[List[Message]], None], optional): Validates the messages of one request
+            before timing, so a broken case doesn't look fast.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        app: typing.Callable,
+        scope: typing.Callable[[], Scope],
+        receive: typing.Optional[typing.Callable[[], Receive]] = None,
+        iterations: int = 5000,
+        check: typing.Optional[typing.Callable[[typing.List[Message]], None]] = None,
+    ) -> None:
+        self.name = name
+        self.app = app
+        self.scope = scope
+        self.receive = receive or body_receiver
+        self.iterations = iterations
+        self.check = check
+
+
+class Result:
+    __slots__ = ("name", "iterations", "ops_per_sec", "p50_us", "p99_us", "peak_bytes", "retained_bytes")
+
+    def __init__(self, **values: typing.Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.name:<40} {self.ops_per_sec:>11,.0f} ops/s  p50 {self.p50_us:8.2f} us  "
+            f"p99 {self.p99_us:8.2f} us  peak {self.peak_bytes / 1024:8.1f} KiB  "
+            f"retained {self.retained_bytes:7.1f} B"
+        )
+
+
+def _percentile(ordered: typing.List[int], fraction: float) -> float:
+    index = min(int(len(ordered) * fraction), len(ordered) - 1)
+    return ordered[index] / 1000
+
+
+async def measure(case: Case, warmup: int = 500) -> Result:
+    """
+    Run a case: latency of every request, then allocations under tracemalloc
+
+    Peak is the highest memory above the starting point during one request,
+    retained is what is still allocated per request after all of them.
+
+    Raises:
+        AssertionError: `check` rejected the messages of the case
+    """
+    app, make_scope, make_receive = case.app, case.scope, case.receive
+    if case.check is not None:
+        messages: typing.List[Message] = []
+
+        async def send(message: Message) -> None:
+            messages.append(message)
+
+        await app(make_scope(), make_receive(), send)
+        case.check(messages)
+
+    for _ in range(min(warmup, case.iterations)):
+        await app(make_scope(), make_receive(), _collect)
+
+    timings = [0] * case.iterations
+    clock = time.perf_counter_ns
+    gc.collect()
+    for index in range(case.iterations):
+        scope, receive = make_scope(), make_receive()
+        started = clock()
+        await app(scope, receive, _collect)
+        timings[index] = clock() - started
+    timings.sort()
+
+    sampled = min(case.iterations, 500)
+    gc.collect()
+    tracemalloc.start()
+    peak = 0
+    start_size, _ = tracemalloc.get_traced_memory()
+    for _ in range(sampled):
+        scope, receive = make_scope(), make_receive()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await app(scope, receive, _collect)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    gc.collect()
+    end_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Result(
+        name=case.name,
+        iterations=case.iterations,
+        ops_per_sec=case.iterations / (sum(timings) / 1e9),
+        p50_us=_percentile(timings, 0.50),
+        p99_us=_percentile(timings, 0.99),
+        peak_bytes=peak,
+        retained_bytes=max(end_size - start_size, 0) / sampled,
+    )
+
+
+def save(results: typing.Iterable[Result], path: str) -> None:
+    data = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {result.name: result.as_dict() for result in results},
+    }
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def load(path: str) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def compare(
+    results: typing.Iterable[Result],
+    baseline: typing.Dict[str, typing.Dict[str, typing.Any]],
+    threshold: float,
+    p99_threshold: typing.Optional[float] = None,
+) -> typing.List[str]:
+    """
+    Regressions of results against a baseline: throughput lower, p99 or
+    peak memory higher than the baseline by more than `threshold` (0.1 = 10%)
+
+    Tail latency is noisier than throughput, it gets its own `p99_threshold`,
+    three times `threshold` by default.
+
+    Returns:
+        List[str]: One line per regression, empty when everything is within the threshold
+    """
+    if p99_threshold is None:
+        p99_threshold = threshold * 3
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.ops_per_sec < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{result.name}: {result.ops_per_sec:,.0f} ops/s, baseline {base['ops_per_sec']:,.0f}"
+            )
+        if result.p99_us > base["p99_us"] * (1 + p99_threshold):
+            regressions.append(f"{result.name}: p99 {result.p99_us:.2f} us, baseline {base['p99_us']:.2f}")
+        # Small peaks move with interpreter internals, only look at the ones over 1 KiB
+        if result.peak_bytes > 1024 and result.peak_bytes > base["peak_bytes"] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: peak {result.peak_bytes} B, baseline {base['peak_bytes']} B"
+            )
+    return regressions
@@ -0,0 +1,211 @@
+"""
+Benchmark suite of the ASGI entry point: routing, request parsing, bodies and responses
+
+    python -m benchmarks.suite                               # run and print
+    python -m benchmarks.suite --save baseline.json          # record a baseline
+    python -m benchmarks.suite --compare baseline.json       # exit 1 on regression
+    python -m benchmarks.suite --filter body --threshold 0.2
+
+Every case also runs under tracemalloc: peak is the memory allocated during
+one request, retained what stays allocated per request afterwards.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+import tempfile
+import typing
+from urllib.parse import urlencode
+
+from smolapi.application import Application
+from smolapi.compression import Compression
+from smolapi.response import FileResponse, JsonResponse, PlainTextResponse, StreamingResponse
+from smolapi.routing import Route
+
+from ._asgi import body_receiver, http_scope, run_lifespan_startup
+from .bench_routing import build_application
+from .harness import Case, compare, load, measure, save
+
+
+BODY_SIZES = (("1KiB", 1024), ("64KiB", 64 * 1024), ("1MiB", 1024 * 1024))
+
+
+def _expect_status(status: int) -> typing.Callable[[typing.List[typing.Any]], None]:
+    def check(messages: typing.List[typing.Any]) -> None:
+        assert messages and messages[0]["status"] == status, f"expected {status}, got {messages[:1]}"
+
+    return check
+
+
+async def _routed(request):
+    return PlainTextResponse("ok")
+
+
+async def _routing_cases() -> typing.List[Case]:
+    cases = []
+    for route_count in (10, 100, 1000):
+        app = build_application(route_count, _routed)
+        await run_lifespan_startup(app)
+        last = route_count // 5 - 1
+        cases.append(Case(
+            f"routing/{route_count}-routes",
+            app,
+            functools.partial(http_scope, "GET", f"/resource{last}/42"),
+            check=_expect_status(200),
+        ))
+    return cases
+
+
+async def _headers(request):
+    headers = request.headers
+    return PlainTextResponse(headers.get("user-agent") + headers.get("accept"))
+
+
+async def _query(page: int, size: int, sort: str = "id"):
+    return PlainTextResponse(sort)
+
+
+async def _cookies(request):
+    return PlainTextResponse(request.cookie.get("session"))
+
+
+async def _body(request):
+    await request.body()
+    return PlainTextResponse("ok")
+
+
+async def _plain(request):
+    return PlainTextResponse("hello world")
+
+
+async def _json(request):
+    return JsonResponse({"items": [{"id": i, "name": f"item {i}", "tags": ["a", "b"]} for i in range(50)]})
+
+
+async def _streaming(request):
+    async def chunks():
+        for _ in range(16):
+            yield b"x" * 4096
+
+    return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+
+_FILE_PATH = os.path.join(tempfile.gettempdir(), "smolapi-bench-file.bin")
+
+
+async def _file(request):
+    return FileResponse(_FILE_PATH)
+
+
+async def _parsing_cases() -> typing.List[Case]:
+    app = Application(root_dir=".", routes=[
+        Route.get("/headers", _headers),
+        Route.get("/query", _query),
+        Route.get("/cookies", _cookies),
+        Route.post("/body", _body),
+        Route.get("/plain", _plain),
+        Route.get("/json", _json),
+        Route.get("/json-gzip", _json, middlewares=[Compression(encodings=["gzip"])]),
+        Route.get("/stream", _streaming),
+        Route.get("/file", _file),
+    ])
+    await run_lifespan_startup(app)
+    browser_headers = [
+        (b"host", b"example.com"),
+        (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) bench"),
+        (b"accept", b"text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"),
+        (b"accept-language", b"en-US,en;q=0.5"),
+        (b"accept-encoding", b"gzip, deflate, br"),
+        (b"connection", b"keep-alive"),
+    ]
+    ok = _expect_status(200)
+    cases = [
+        Case("parse/headers", app, functools.partial(http_scope, "GET", "/headers", headers=browser_headers), check=ok),
+        Case("parse/query", app, functools.partial(
+            http_scope, "GET", "/query", query_string=b"page=3&size=50&sort=name%20desc&filter=a+b"
+        ), check=ok),
+        Case("parse/cookies", app, functools.partial(
+            http_scope, "GET", "/cookies",
+            headers=[(b"cookie", b"session=abc123def456; theme=dark; lang=en; _ga=GA1.2.3.4; csrf=\"x\\073y\"")],
+        ), check=ok),
+    ]
+
+    documents = {
+        "json": (b"application/json", lambda size: json.dumps(
+            {"items": ["x" * 20] * max(size // 24, 1)}
+        ).encode()),
+        "urlencoded": (b"application/x-www-form-urlencoded", lambda size: urlencode(
+            [(f"field{i}", "v" * 20) for i in range(max(size // 30, 1))]
+        ).encode()),
+        "multipart": (b"multipart/form-data; boundary=benchboundary", lambda size: (
+            b"--benchboundary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.bin\"\r\n"
+            b"Content-Type: application/octet-stream\r\n\r\n" + b"b" * size + b"\r\n--benchboundary--\r\n"
+        )),
+    }
+    for kind, (content_type, build) in documents.items():
+        for label, size in BODY_SIZES:
+            body = build(size)
+            headers = [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]
+            cases.append(Case(
+                f"body/{kind}-{label}",
+                app,
+                functools.partial(http_scope, "POST", "/body", headers=headers),
+                functools.partial(body_receiver, body),
+                iterations=5000 if size < 65536 else 300 if size < 1024 * 1024 else 30,
+                check=ok,
+            ))
+
+    with open(_FILE_PATH, "wb") as file:
+        file.write(os.urandom(256 * 1024))
+    cases += [
+        Case("send/plain", app, functools.partial(http_scope, "GET", "/plain"), check=ok),
+        Case("send/json-50-items", app, functools.partial(http_scope, "GET", "/json"), check=ok),
+        Case("send/json-50-items-gzip", app, functools.partial(
+            http_scope, "GET", "/json-gzip", headers=[(b"accept-encoding", b"gzip, deflate, br")]
+        ), check=ok),
+        Case("send/stream-64KiB", app, functools.partial(http_scope, "GET", "/stream"), check=ok),
+        Case("send/file-256KiB", app, functools.partial(http_scope, "GET", "/file"), iterations=1000, check=ok),
+    ]
+    return cases
+
+
+async def run(filter_: typing.Optional[str]) -> typing.List[typing.Any]:
+    cases = await _routing_cases() + await _parsing_cases()
+    results = []
+    for case in cases:
+        if filter_ and filter_ not in case.name:
+            continue
+        result = await measure(case)
+        print(result, flush=True)
+        results.append(result)
+    return results
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--save", metavar="PATH", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline to compare with, exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression ratio. Defaults to 0.15.")
+    parser.add_argument("--p99-threshold", type=float, default=None, help="Allowed p99 regression. Defaults to 3x --threshold.")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.filter))
+    if args.save:
+        save(results, args.save)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        regressions = compare(results, load(args.compare), args.threshold, args.p99_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"\nNo regression over {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Command line tools
+
+    python -m smolapi startup-report main:app --budget-ms 300
+"""
+import argparse
+import importlib
+import sys
+import typing
+
+from .startup import StartupReport, record_startup
+
+
+def _load_app(target: str, report: StartupReport) -> typing.Any:
+    module_name, _, attribute = target.partition(":")
+    with record_startup(report):
+        module = importlib.import_module(module_name)
+    app = module
+    for name in (attribute or "app").split("."):
+        app = getattr(app, name)
+    return app
+
+
+async def _run_startup(app: typing.Any) -> None:
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    failure: typing.List[str] = []
+
+    async def receive() -> typing.Dict[str, typing.Any]:
+        return messages.pop(0)
+
+    async def send(message: typing.Dict[str, typing.Any]) -> None:
+        if message["type"] == "lifespan.startup.failed":
+            failure.append(message.get("message", ""))
+        elif message["type"] == "lifespan.shutdown.complete":
+            # Applications looping on receive stop here
+            raise _LifespanDone()
+
+    try:
+        await app({"type": "lifespan", "asgi": {"version": "3.0"}}, receive, send)
+    except _LifespanDone:
+        pass
+    if failure:
+        raise RuntimeError(f"Startup failed: {failure[0]}")
+
+
+class _LifespanDone(Exception):
+    pass
+
+
+def startup_report(args: argparse.Namespace) -> int:
+    import asyncio
+
+    sys.path.insert(0, args.app_dir)
+    report = StartupReport()
+    app = _load_app(args.app, report)
+    asyncio.run(_run_startup(app))
+    if hasattr(app, "startup_report") and app.startup_report() is not None:
+        report.merge(app.startup_report())
+
+    if args.json:
+        import json
+
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        print(report.format(top=args.top))
+
+    if args.budget_ms is not None and report.total * 1000 > args.budget_ms:
+        print(
+            f"Startup took {report.total * 1000:.2f} ms, over the budget of {args.budget_ms:.2f} ms",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m smolapi")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser(
+        "startup-report", help="Time imports and lifespan startup of an application"
+    )
+    report.add_argument("app", help="Application as module:attribute, e.g. main:app")
+    report.add_argument("--app-dir", default=".", help="Directory added to sys.path. Defaults to cwd.")
+    report.add_argument("--budget-ms", type=float, default=None, help="Exit with 1 when startup is slower")
+    report.add_argument("--top", type=int, default=20, help="Number of slowest imports shown")
+    report.add_argument("--json", action="store_true", help="Print the report as JSON")
+    report.set_defaults(run=startup_report)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,71 @@
-import os
+import time
+import typing
 from .types import Scope, Receive, Send, App
-from .request import Request
-from .routing import Route, Router
+from .routing import Route, Router, RouteTree
+from .exceptions import HttpException
+from .response import PlainTextResponse
+from .provider import Provider, ProviderGroup
+from .metrics import Metrics, STARTED_KEY
+from .logger import AccessLog, get_logger
+from .startup import StartupReport, record_startup
+from . import serializer
 from smolapi.setting import LazySetting, settings
-import logging
 
 class Application:
     # __app: ASGIApp
-    def __init__(self, root_dir: str) -> None:
+    def __init__(
+        self,
+        root_dir: str,
+        routes: typing.Optional[typing.List[typing.Union[Route, Router]]] = None,
+        providers: typing.Optional[typing.List[Provider]] = None,
+        metrics: typing.Optional[Metrics] = None,
+        access_log: typing.Optional[AccessLog] = None,
+    ) -> None:
         if not root_dir:
             raise AttributeError("Set the fucking root directory of project")
         self.__root_dir = root_dir
+        self.__router = Router(*(routes or []))
+        self.__routes: typing.Optional[RouteTree] = None
+        self.__providers = ProviderGroup(providers)
+        self.__metrics = metrics
+        self.__access_log = access_log
+        self.__startup_report: typing.Optional[StartupReport] = None
+
+    @property
+    def router(self) -> Router:
+        return self.__router
+
+    def add_route(self, route: typing.Union[Route, Router]) -> None:
+        if self.__routes is not None:
+            raise RuntimeError("Routes are frozen once the application has started")
+        self.__router.add_route(route)
+
+    @property
+    def metrics(self) -> typing.Optional[Metrics]:
+        return self.__metrics
+
+    @property
+    def providers(self) -> ProviderGroup:
+        return self.__providers
+
+    def add_provider(self, provider: Provider) -> None:
+        if self.__startup_report is not None:
+            raise RuntimeError("Providers can't be added once the application has started")
+        self.__providers.add(provider)
+
+    def url_path_for(self, name: str, **params: typing.Any) -> str:
+        if self.__routes is None:
+            self.__freeze_routes()
+        return self.__routes.url_path_for(name, **params)
+
+    def startup_report(self) -> typing.Optional[StartupReport]:
+        """
+        Modules imported and time spent in each step of the last `lifespan.startup`
+
+        Returns:
+            StartupReport: Report of the last startup, None before the application started
+        """
+        return self.__startup_report
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> App:
         if scope["type"] == "lifespan":
@@ -18,37 +73,57 @@ class Application:
                 message = await receive()
                 if message["type"] == "lifespan.startup":
                     # On start up application
-                    self.__bootstrap()
+                    try:
+                        await self.__bootstrap()
+                    except Exception as exc:
+                        await send({"type": "lifespan.startup.failed", "message": repr(exc)})
+                        return
                     await send({"type": "lifespan.startup.complete"})
                 elif message["type"] == "lifespan.shutdown":
                     # On shutdown application
+                    try:
+                        await self.__providers.shutdown()
+                    except Exception as exc:
+                        await send({"type": "lifespan.shutdown.failed", "message": repr(exc)})
+                        return
                     await send({"type": "lifespan.shutdown.complete"})
+                    return
         else:
-            routes = Router(
-                Router(
-                    Route.get("/", None),
-                    Route.post("/", None),
-                    Route.get("/{id}", None),
-                    Route.patch("/{id}", None),
-                    Route.delete("/{id}", None),
-                    Router(
-                        Route.get("/", None),
-                        Route.post("/", None),
-                        Route.get("/{contact_id}", None),
-                        Route.patch("/{contact_id}", None),
-                        Route.delete("/{contact_id}", None),
-                        prefix="{id}/contact",
-                    ),
-                    prefix="user",
-                ),
-            )
-            routes.add_route(Route.get("/", None))
-            routes.add_route(Route.get("/healthcheck", None))
-            for route in routes.unpack_route():
-                print(route.__dict__())
-
-    def __bootstrap(self):
-        print("Running all essential provider for project")
-        globals()["app_root"] = self.__root_dir
-        LazySetting.load_setting()
-        print(settings.MODULE_A)
\ No newline at end of file
+            if self.__routes is None:
+                # Server without lifespan support, freeze routes on first request
+                self.__freeze_routes()
+            if self.__metrics is not None:
+                scope[STARTED_KEY] = time.perf_counter()
+            try:
+                route, path_params = self.__routes.match(scope["method"], scope["path"])
+            except HttpException as exc:
+                if self.__metrics is not None:
+                    self.__metrics.unmatched += 1
+                await _send_error(scope, receive, send, exc)
+                return
+            scope["path_params"] = path_params
+            await route.app(scope, receive, send)
+
+    def __freeze_routes(self) -> None:
+        self.__routes = self.__router.compile(self.__metrics, self.__access_log)
+
+    async def __bootstrap(self):
+        with record_startup() as report:
+            with report.step("settings"):
+                LazySetting.load_setting(self.__root_dir)
+            with report.step("serializer"):
+                serializer.configure(settings.JSON_CODEC)
+            with report.step("routes"):
+                self.__freeze_routes()
+            with report.step("providers"):
+                await self.__providers.startup(report)
+        self.__startup_report = report
+        get_logger().info(
+            "Application started", duration_ms=round(report.total * 1000, 3), providers=len(report.providers)
+        )
+
+
+
+async def _send_error(scope: Scope, receive: Receive, send: Send, exc: HttpException) -> None:
+    response = PlainTextResponse(exc.detail, status_code=exc.status_code, headers=exc.headers)
+    await response(scope, receive, send)
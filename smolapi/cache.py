@@ -0,0 +1,288 @@
+import abc
+import time
+import typing
+from collections import OrderedDict
+from .request import Request
+from .response import Response, _etag_matches
+from smolapi.setting import settings
+
+if typing.TYPE_CHECKING:
+    import asyncio
+    from .routing import Route
+
+
+__all__ = ["Cache", "CacheBackend", "CacheEntry", "MemoryCache"]
+
+Handler = typing.Callable[[Request], typing.Awaitable[Response]]
+
+_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Responses carrying these headers are specific to one client
+_PRIVATE_HEADERS = (b"set-cookie",)
+
+
+class CacheEntry:
+    """
+    Rendered response stored in a cache backend
+
+    Args:
+        status_code (int): HTTP status
+        headers (Iterable[Tuple[bytes, bytes]]): Raw headers, including etag, stored as a tuple
+        body (bytes): Response body
+        etag (str): Entity tag of the body, quoted
+        expires_at (float): Expiry as a unix timestamp
+    """
+
+    __slots__ = ("status_code", "headers", "body", "etag", "expires_at", "size")
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: typing.Iterable[typing.Tuple[bytes, bytes]],
+        body: bytes,
+        etag: str,
+        expires_at: float,
+    ) -> None:
+        self.status_code = status_code
+        # Immutable, entries are shared by every response served from them
+        self.headers: typing.Tuple[typing.Tuple[bytes, bytes], ...] = tuple(headers)
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+        self.size = len(body) + sum(len(name) + len(value) for name, value in self.headers) + 128
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(status_code={self.status_code}, etag={self.etag}, size={self.size})"
+
+
+class CacheBackend(abc.ABC):
+    """Storage of cached responses, implement it to share a cache between processes"""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> typing.Optional[CacheEntry]:
+        """Entry stored under key, None when missing or expired"""
+
+    @abc.abstractmethod
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """Store an entry until `entry.expires_at`"""
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    async def clear(self) -> None:
+        raise NotImplementedError()
+
+
+class MemoryCache(CacheBackend):
+    """
+    In process LRU cache bounded by the total size of stored responses
+
+    Args:
+        max_bytes (int, optional): Budget of bodies and headers. Defaults to
+            settings.CACHE_MAX_BYTES or 64 MiB.
+    """
+
+    def __init__(self, max_bytes: typing.Optional[int] = None) -> None:
+        self.max_bytes = max_bytes or settings.CACHE_MAX_BYTES or _DEFAULT_MAX_BYTES
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> typing.Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expired:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    async def delete(self, key: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+
+_default_backend: typing.Optional[MemoryCache] = None
+
+
+def _get_default_backend() -> MemoryCache:
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = MemoryCache()
+    return _default_backend
+
+
+class _CachedResponse(Response):
+    def __init__(self, status_code: int, headers: typing.Iterable[typing.Tuple[bytes, bytes]], body: bytes) -> None:
+        self.status_code = status_code
+        # A list of its own, middlewares may add headers (e.g. cookies) to this response
+        self.raw_headers = list(headers)
+        self.body = body
+
+
+def _not_modified(entry: CacheEntry) -> Response:
+    headers = [(name, value) for name, value in entry.headers if name != b"content-length"]
+    return _CachedResponse(304, headers, b"")
+
+
+class Cache:
+    """
+    Opt-in response cache of a route, `Route.get("/items", items, cache=Cache(ttl=5))`
+
+    GET and HEAD responses with status 200 are stored under the route name,
+    its path parameters, the query parameters (all of them, or only
+    `query_keys`) and the request values of `vary` headers. Concurrent misses
+    of the same key run the handler once, the other requests wait for its
+    response. Cached responses carry an ETag, `If-None-Match` gets a 304.
+    Responses setting cookies or marked `no-store`/`private`, and streamed
+    or file responses, are never stored.
+
+    Args:
+        ttl (float): Seconds a response is served from the cache
+        vary (Sequence[str], optional): Request headers the response depends on. Defaults to ().
+        query_keys (Sequence[str], optional): Query parameters in the key. Defaults to all.
+        backend (CacheBackend, optional): Storage. Defaults to a process wide `MemoryCache`.
+    """
+
+    methods = ("GET", "HEAD")
+
+    def __init__(
+        self,
+        ttl: float,
+        vary: typing.Sequence[str] = (),
+        query_keys: typing.Optional[typing.Sequence[str]] = None,
+        backend: typing.Optional[CacheBackend] = None,
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError("Cache ttl must be positive")
+        self.ttl = ttl
+        self.vary = tuple(sorted({name.lower() for name in vary}))
+        self.query_keys = None if query_keys is None else tuple(sorted(set(query_keys)))
+        self._backend = backend
+        self._vary_header = ", ".join(self.vary).encode("latin-1")
+        self._inflight: typing.Dict[str, "asyncio.Future[typing.Optional[CacheEntry]]"] = {}
+
+    @property
+    def backend(self) -> CacheBackend:
+        if self._backend is None:
+            self._backend = _get_default_backend()
+        return self._backend
+
+    def key(self, route_name: str, request: Request) -> str:
+        """
+        Cache key of a request, query parameters and their values are sorted
+
+        The key is the repr of a tuple of every component, values are quoted
+        by repr so no separator inside a value can make two requests collide.
+        """
+        path_params = request.scope.get("path_params") or {}
+        query = request.query
+        names = sorted(query) if self.query_keys is None else self.query_keys
+        headers = request.headers
+        return repr((
+            route_name,
+            tuple((name, path_params[name]) for name in sorted(path_params)),
+            tuple((name, tuple(sorted(query.getlist(name)))) for name in names),
+            tuple(tuple(headers.getlist(name)) for name in self.vary),
+        ))
+
+    def wrap(self, route: "Route", handler: Handler) -> Handler:
+        """Handler serving the route from the cache, run innermost so middlewares still apply"""
+        route_name = route.name
+
+        async def call(request: Request) -> Response:
+            if request.method not in self.methods:
+                return await handler(request)
+            key = self.key(route_name, request)
+            entry = await self.backend.get(key)
+            if entry is None:
+                entry, response = await self._fill(key, handler, request)
+                if entry is None:
+                    return response
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and _etag_matches(if_none_match.encode("latin-1"), entry.etag):
+                return _not_modified(entry)
+            return _CachedResponse(entry.status_code, entry.headers, entry.body)
+
+        return call
+
+    async def _fill(
+        self, key: str, handler: Handler, request: Request
+    ) -> typing.Tuple[typing.Optional[CacheEntry], typing.Optional[Response]]:
+        import asyncio
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            entry = await asyncio.shield(pending)
+            if entry is not None:
+                return entry, None
+            # The leader's response wasn't cacheable, run the handler for this request too
+            return None, await handler(request)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        entry = None
+        try:
+            response = await handler(request)
+            entry = self._entry(response)
+            if entry is not None:
+                await self.backend.set(key, entry)
+        finally:
+            del self._inflight[key]
+            future.set_result(entry)
+        return entry, response
+
+    def _entry(self, response: Response) -> typing.Optional[CacheEntry]:
+        if response.status_code != 200 or type(response).__call__ is not Response.__call__:
+            # Streaming and file responses have their own __call__
+            return None
+        etag = None
+        headers = []
+        for name, value in response.raw_headers:
+            if name in _PRIVATE_HEADERS:
+                return None
+            if name == b"cache-control" and (b"no-store" in value or b"private" in value):
+                return None
+            if name == b"etag":
+                etag = value.decode("latin-1")
+            if name != b"vary":
+                headers.append((name, value))
+        if etag is None:
+            import hashlib
+
+            etag = f'"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+            headers.append((b"etag", etag.encode("latin-1")))
+        if self.vary:
+            headers.append((b"vary", self._vary_header))
+        return CacheEntry(200, headers, response.body, etag, time.time() + self.ttl)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(ttl={self.ttl}, vary={list(self.vary)}, query_keys={self.query_keys})"
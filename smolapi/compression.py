@@ -0,0 +1,342 @@
+import asyncio
+import functools
+import typing
+import zlib
+from .types import Scope, Receive, Send, App, Message
+from smolapi.setting import settings
+
+
+__all__ = ["Compression", "available_encodings"]
+
+# Server preference when the client weights several encodings equally
+_PREFERENCE = ("zstd", "br", "gzip", "deflate")
+_DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6, "deflate": 6}
+_DEFAULT_MINIMUM_SIZE = 500
+_COMPRESSIBLE_TYPES = frozenset((
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "application/graphql-response+json",
+    "application/wasm",
+    "image/svg+xml",
+))
+_FILE_EXTENSIONS = ("http.response.pathsend", "http.response.zerocopysend")
+# Chunks over this size are compressed in the default executor, zlib releases the GIL
+_THREAD_SIZE = 256 * 1024
+
+
+class _Compressor(typing.Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _ZlibCompressor:
+    __slots__ = ("_compressor",)
+
+    def __init__(self, level: int, wbits: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    __slots__ = ("_compressor",)
+
+    def __init__(self, module: typing.Any, level: int) -> None:
+        self._compressor = module.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    __slots__ = ("_module", "_compressor")
+
+    def __init__(self, module: typing.Any, level: int) -> None:
+        self._module = module
+        self._compressor = module.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._module.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _import_first(*names: str) -> typing.Any:
+    import importlib
+
+    for name in names:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            continue
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def available_encodings() -> typing.Dict[str, typing.Callable[[int], _Compressor]]:
+    """
+    Compressor factories by content coding, brotli and zstd only when importable
+
+    Returns:
+        Dict[str, Callable[[int], Compressor]]: Factory taking the level, by encoding name
+    """
+    encodings: typing.Dict[str, typing.Callable[[int], _Compressor]] = {
+        "gzip": lambda level: _ZlibCompressor(level, 16 + zlib.MAX_WBITS),
+        # HTTP "deflate" is the zlib format, not raw deflate
+        "deflate": lambda level: _ZlibCompressor(level, zlib.MAX_WBITS),
+    }
+    brotli = _import_first("brotli", "brotlicffi")
+    if brotli is not None:
+        encodings["br"] = functools.partial(_BrotliCompressor, brotli)
+    zstandard = _import_first("zstandard")
+    if zstandard is not None:
+        encodings["zstd"] = functools.partial(_ZstdCompressor, zstandard)
+    return encodings
+
+
+@functools.lru_cache(maxsize=256)
+def _negotiate(header: bytes, encodings: typing.Tuple[str, ...]) -> typing.Optional[str]:
+    """
+    Encoding to use for an `Accept-Encoding` header, None for identity
+
+    Highest q-value wins, ties go to the order of `encodings`. Headers repeat
+    a lot between clients, the result is cached per header value.
+    """
+    weights: typing.Dict[str, float] = {}
+    for item in header.decode("latin-1").lower().split(","):
+        name, _, params = item.partition(";")
+        name = name.strip()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name] = quality
+    wildcard = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = weights.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _is_compressible(content_type: bytes, types: typing.FrozenSet[str]) -> bool:
+    media_type = content_type.split(b";", 1)[0].strip().decode("latin-1").lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in types
+        or media_type.endswith("+json")
+        or media_type.endswith("+xml")
+    )
+
+
+class Compression:
+    """
+    Pure ASGI middleware compressing responses, `Route(..., middlewares=[Compression()])`
+
+    The encoding is negotiated from `Accept-Encoding`: gzip and deflate always,
+    br and zstd when `brotli`/`brotlicffi` and `zstandard` are installed.
+    Responses are left untouched when they are smaller than `minimum_size`,
+    already encoded, partial, or of a type that doesn't compress (images,
+    archives, ...). Streaming responses are compressed chunk by chunk, each
+    chunk is flushed so the client receives it right away.
+
+    Options left to None are read from settings when the route is compiled:
+    COMPRESSION_MIN_SIZE, COMPRESSION_ENCODINGS, COMPRESSION_LEVELS and COMPRESSION_TYPES.
+
+    Args:
+        minimum_size (int, optional): Smaller bodies are sent as is. Defaults to 500 bytes.
+        encodings (Sequence[str], optional): Encodings enabled, in server preference order.
+            Defaults to zstd, br, gzip, deflate, the ones importable.
+        levels (Dict[str, int], optional): Level per encoding, merged over the defaults
+            (zstd 3, br 4, gzip 6, deflate 6).
+        content_types (Iterable[str], optional): Media types compressed besides text/*, +json and +xml.
+            Defaults to JSON, JavaScript, XML, NDJSON, WebAssembly and SVG.
+    """
+
+    def __init__(
+        self,
+        minimum_size: typing.Optional[int] = None,
+        encodings: typing.Optional[typing.Sequence[str]] = None,
+        levels: typing.Optional[typing.Dict[str, int]] = None,
+        content_types: typing.Optional[typing.Iterable[str]] = None,
+    ) -> None:
+        self.minimum_size = minimum_size
+        self.encodings = encodings
+        self.levels = levels
+        self.content_types = content_types
+
+    def __call__(self, app: App) -> App:
+        available = available_encodings()
+        minimum_size = self.minimum_size
+        if minimum_size is None:
+            minimum_size = settings.COMPRESSION_MIN_SIZE
+        if minimum_size is None:
+            minimum_size = _DEFAULT_MINIMUM_SIZE
+        requested = self.encodings or settings.COMPRESSION_ENCODINGS or _PREFERENCE
+        unknown = [encoding for encoding in requested if encoding not in _PREFERENCE]
+        if unknown:
+            raise ValueError(f"Unsupported content coding: {', '.join(unknown)}")
+        encodings = tuple(encoding for encoding in requested if encoding in available)
+        levels = {**_DEFAULT_LEVELS, **(settings.COMPRESSION_LEVELS or {}), **(self.levels or {})}
+        factories = {encoding: functools.partial(available[encoding], levels[encoding]) for encoding in encodings}
+        types = frozenset(self.content_types or settings.COMPRESSION_TYPES or _COMPRESSIBLE_TYPES)
+
+        async def compressed(scope: Scope, receive: Receive, send: Send) -> None:
+            if scope["type"] != "http" or scope.get("method") == "HEAD":
+                await app(scope, receive, send)
+                return
+            accept = None
+            for name, value in scope.get("headers", ()):
+                if name == b"accept-encoding":
+                    accept = value
+                    break
+            encoding = _negotiate(accept, encodings) if accept else None
+            if encoding is None:
+                await app(scope, receive, send)
+                return
+            extensions = scope.get("extensions")
+            if extensions and any(name in extensions for name in _FILE_EXTENSIONS):
+                # Files sent by the server itself would bypass compression, make them go through body messages
+                scope = {
+                    **scope,
+                    "extensions": {name: value for name, value in extensions.items() if name not in _FILE_EXTENSIONS},
+                }
+            await app(scope, receive, _CompressingSend(send, encoding, factories[encoding], minimum_size, types))
+
+        return compressed
+
+
+class _CompressingSend:
+    """Send callable of one request, holds the start message until the first body chunk"""
+
+    __slots__ = ("send", "encoding", "factory", "minimum_size", "types", "start", "compressor")
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        factory: typing.Callable[[], _Compressor],
+        minimum_size: int,
+        types: typing.FrozenSet[str],
+    ) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.types = types
+        self.start: typing.Optional[Message] = None
+        self.compressor: typing.Optional[_Compressor] = None
+
+    async def __call__(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            if self._should_compress(message):
+                self.start = message
+            else:
+                self.factory = None
+                await self.send(message)
+            return
+        if kind != "http.response.body" or self.factory is None:
+            if self.start is not None:
+                # Not a body message (e.g. an extension), the response goes out as is
+                start, self.start = self.start, None
+                self.factory = None
+                await self.send(start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        compressor = self.compressor
+        if compressor is None:
+            start, self.start = self.start, None
+            if not more_body and len(body) < self.minimum_size:
+                # Single small chunk of a response without content-length
+                self.factory = None
+                await self.send(start)
+                await self.send(message)
+                return
+            compressor = self.compressor = self.factory()
+            await self.send(self._encoded_start(start))
+
+        if len(body) > _THREAD_SIZE:
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(None, _compress_chunk, compressor, body, more_body)
+        else:
+            body = _compress_chunk(compressor, body, more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _should_compress(self, message: Message) -> bool:
+        status = message["status"]
+        if status < 200 or status in (204, 206, 304):
+            return False
+        content_type = None
+        for name, value in message.get("headers", ()):
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+            elif name == b"content-length":
+                try:
+                    if int(value) < self.minimum_size:
+                        return False
+                except ValueError:
+                    # Malformed length, the response is passed through as the app wrote it
+                    return False
+        return content_type is not None and _is_compressible(content_type, self.types)
+
+    def _encoded_start(self, message: Message) -> Message:
+        headers = []
+        vary = None
+        for name, value in message.get("headers", ()):
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                # Encoded bytes differ from the identity ones, the tag becomes weak
+                value = b"W/" + value
+            elif name == b"vary":
+                vary = value
+                continue
+            headers.append((name, value))
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        if vary is None:
+            headers.append((b"vary", b"accept-encoding"))
+        elif b"accept-encoding" in vary.lower() or vary.strip() == b"*":
+            headers.append((b"vary", vary))
+        else:
+            headers.append((b"vary", vary + b", accept-encoding"))
+        return {**message, "headers": headers}
+
+
+def _compress_chunk(compressor: _Compressor, body: bytes, more_body: bool) -> bytes:
+    if more_body:
+        return compressor.compress(body) + compressor.flush() if body else b""
+    return compressor.compress(body) + compressor.finish()
@@ -3,5 +3,5 @@ class SingletonInstance(type):
     _instances = {}
     def __call__(cls, *args, **kwargs):
         if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
+            cls._instances[cls] = super(SingletonInstance, cls).__call__(*args, **kwargs)
         return cls._instances[cls]
\ No newline at end of file
@@ -1,7 +1,7 @@
 from enum import Enum
 
 class HttpMethod(Enum):
-    GET = "GET",
+    GET = "GET"
     HEAD = "HEAD"
     POST = "POST"
     PUT = "PUT"
@@ -0,0 +1,44 @@
+import typing
+from http import HTTPStatus
+
+
+__all__ = ["HttpException", "NotFound", "MethodNotAllowed"]
+
+
+class HttpException(Exception):
+    """
+    Exception carrying an HTTP status, raised anywhere on the request path
+    and turned into an error response by the application
+
+    Args:
+        status_code (int): HTTP status code
+        detail (str, optional): Message sent back to client. Defaults to the status phrase.
+        headers (dict, optional): Extra response headers. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        detail: typing.Optional[str] = None,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> None:
+        self.status_code = status_code
+        self.detail = detail or HTTPStatus(status_code).phrase
+        self.headers = headers or {}
+        super().__init__(status_code, self.detail)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(status_code={self.status_code}, detail={self.detail!r})"
+
+
+class NotFound(HttpException):
+    def __init__(self, detail: typing.Optional[str] = None) -> None:
+        super().__init__(404, detail)
+
+
+class MethodNotAllowed(HttpException):
+    def __init__(
+        self, allowed: typing.Iterable[str], detail: typing.Optional[str] = None
+    ) -> None:
+        self.allowed = frozenset(allowed)
+        super().__init__(405, detail, headers={"allow": ", ".join(sorted(self.allowed))})
@@ -0,0 +1,310 @@
+import asyncio
+import codecs
+import typing
+from collections.abc import Mapping
+from tempfile import SpooledTemporaryFile
+from .exceptions import HttpException
+from .request import _parse_query_string
+from .utils import parse_header_options
+
+
+__all__ = ["UploadFile", "FormData", "parse_multipart", "parse_urlencoded"]
+
+_DEFAULT_SPOOL_SIZE = 1024 * 1024
+# Fields without filename are kept in memory, files spool to disk
+_DEFAULT_MAX_FIELD_SIZE = 1024 * 1024
+_MAX_PART_HEADERS_SIZE = 16 * 1024
+
+# Multipart parser states
+_PREAMBLE = 0
+_DELIMITER = 1
+_HEADERS = 2
+_BODY = 3
+_END = 4
+
+
+class UploadFile:
+    """
+    File part of a multipart form, kept in memory until it grows past
+    `spool_size` and moved to a temporary file after that
+
+    Args:
+        filename (str): Name sent by client
+        content_type (str, optional): Content type of part. Defaults to "".
+        headers (Dict[str, str], optional): Part headers. Defaults to None.
+        spool_size (int, optional): Bytes kept in memory before rolling to disk.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        content_type: str = "",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        spool_size: int = _DEFAULT_SPOOL_SIZE,
+    ) -> None:
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers or {}
+        self.size = 0
+        self._spool_size = spool_size
+        self.file = SpooledTemporaryFile(max_size=spool_size)
+
+    @property
+    def _in_memory(self) -> bool:
+        return not getattr(self.file, "_rolled", True)
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        # The write crossing spool_size copies the memory buffer to disk, it goes to the executor too
+        if self._in_memory and self.size <= self._spool_size:
+            self.file.write(data)
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, self.file.write, data)
+
+    async def read(self, size: int = -1) -> bytes:
+        if self._in_memory:
+            return self.file.read(size)
+        return await asyncio.get_running_loop().run_in_executor(None, self.file.read, size)
+
+    async def seek(self, offset: int) -> None:
+        self.file.seek(offset)
+
+    async def close(self) -> None:
+        self.file.close()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(filename={self.filename!r}, size={self.size})"
+
+
+class FormData(Mapping[str, typing.Union[str, UploadFile]]):
+    """
+    Parsed form fields, values are strings or `UploadFile` for file parts
+    """
+
+    __slots__ = ("_fields",)
+
+    def __init__(
+        self, fields: typing.Optional[typing.Dict[str, typing.List[typing.Any]]] = None
+    ) -> None:
+        self._fields = fields if fields is not None else {}
+
+    def __getitem__(self, __key: str) -> typing.Union[str, UploadFile]:
+        return self._fields[__key][0]
+
+    def get(self, __key: str, default: typing.Any = None) -> typing.Any:
+        values = self._fields.get(__key)
+        return default if values is None else values[0]
+
+    def getlist(self, __key: str) -> typing.List[typing.Union[str, UploadFile]]:
+        return list(self._fields.get(__key, ()))
+
+    def __contains__(self, __key: object) -> bool:
+        return __key in self._fields
+
+    def __dict__(self) -> dict:
+        return self._fields
+
+    def __iter__(self) -> typing.Iterator:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def files(self) -> typing.Iterator[UploadFile]:
+        for values in self._fields.values():
+            for value in values:
+                if isinstance(value, UploadFile):
+                    yield value
+
+    async def close(self) -> None:
+        for upload in self.files():
+            await upload.close()
+
+
+async def parse_urlencoded(
+    stream: typing.AsyncIterator[bytes],
+    max_field_size: int = _DEFAULT_MAX_FIELD_SIZE,
+) -> FormData:
+    """
+    Parse an application/x-www-form-urlencoded body, pairs are decoded as
+    soon as the "&" after them is received
+
+    Args:
+        stream (AsyncIterator[bytes]): Body chunks, see `Request.stream`
+        max_field_size (int, optional): Bytes of one encoded pair. Defaults to 1 MiB.
+
+    Raises:
+        HttpException: 413 when a pair is over max_field_size
+
+    Returns:
+        FormData: Parsed fields
+    """
+    fields: typing.Dict[str, typing.List[typing.Any]] = {}
+    pending = bytearray()
+    async for chunk in stream:
+        start = len(pending)
+        pending += chunk
+        # Only the new bytes can hold an "&", the pending ones were searched already
+        index = pending.rfind(b"&", start)
+        if index >= 0:
+            _parse_query_string(bytes(pending[:index]), fields)
+            del pending[: index + 1]
+        if len(pending) > max_field_size:
+            raise HttpException(413, "Form field too large")
+    if pending:
+        _parse_query_string(bytes(pending), fields)
+    return FormData(fields)
+
+
+async def parse_multipart(
+    stream: typing.AsyncIterator[bytes],
+    boundary: str,
+    spool_size: int = _DEFAULT_SPOOL_SIZE,
+    charset: str = "utf-8",
+    max_field_size: int = _DEFAULT_MAX_FIELD_SIZE,
+) -> FormData:
+    """
+    Incremental multipart/form-data parser
+
+    Chunks are scanned for the boundary as they arrive, only the tail that may
+    hold a partial boundary is kept between chunks. Field values are collected
+    in memory, file parts are written to `UploadFile`.
+
+    Args:
+        stream (AsyncIterator[bytes]): Body chunks, see `Request.stream`
+        boundary (str): Boundary parameter of content-type header
+        spool_size (int, optional): Bytes of a file kept in memory before rolling to disk.
+        charset (str, optional): Encoding of field values. Defaults to "utf-8".
+        max_field_size (int, optional): Bytes of a field without filename. Defaults to 1 MiB.
+
+    Raises:
+        HttpException: 400 on malformed body, 413 when a field is over max_field_size,
+            415 when the charset is unknown
+
+    Returns:
+        FormData: Parsed fields
+    """
+    if not boundary:
+        raise HttpException(400, "Missing multipart boundary")
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        raise HttpException(415, f"Unsupported charset {charset!r}")
+
+    # The first boundary has no leading CRLF, prepend one so every boundary looks the same
+    delimiter = b"\r\n--" + boundary.encode("latin-1")
+    keep = len(delimiter) - 1
+    buffer = bytearray(b"\r\n")
+    fields: typing.Dict[str, typing.List[typing.Any]] = {}
+    state = _PREAMBLE
+    name = ""
+    part: typing.Any = None
+
+    try:
+        async for chunk in stream:
+            if state == _END:
+                # Epilogue is ignored, keep reading so the stream is drained
+                continue
+            buffer += chunk
+            while True:
+                if state == _PREAMBLE:
+                    index = buffer.find(delimiter)
+                    if index < 0:
+                        if len(buffer) > keep:
+                            del buffer[:-keep]
+                        break
+                    del buffer[: index + len(delimiter)]
+                    state = _DELIMITER
+
+                elif state == _DELIMITER:
+                    if len(buffer) < 2:
+                        break
+                    if buffer[:2] == b"--":
+                        state = _END
+                        buffer.clear()
+                        break
+                    if buffer[:2] != b"\r\n":
+                        raise HttpException(400, "Malformed multipart boundary")
+                    del buffer[:2]
+                    state = _HEADERS
+
+                elif state == _HEADERS:
+                    if buffer[:2] == b"\r\n":
+                        raw_headers, size = b"", 2
+                    else:
+                        index = buffer.find(b"\r\n\r\n")
+                        if index < 0:
+                            if len(buffer) > _MAX_PART_HEADERS_SIZE:
+                                raise HttpException(400, "Multipart part headers too large")
+                            break
+                        raw_headers, size = bytes(buffer[:index]), index + 4
+                    del buffer[:size]
+                    headers = _parse_part_headers(raw_headers)
+                    disposition, options = parse_header_options(
+                        headers.get("content-disposition", "")
+                    )
+                    if disposition.lower() != "form-data" or "name" not in options:
+                        raise HttpException(400, "Invalid multipart content-disposition")
+                    name = options["name"]
+                    if "filename" in options:
+                        part = UploadFile(
+                            filename=options["filename"],
+                            content_type=headers.get("content-type", ""),
+                            headers=headers,
+                            spool_size=spool_size,
+                        )
+                        fields.setdefault(name, []).append(part)
+                    else:
+                        part = bytearray()
+                    state = _BODY
+
+                elif state == _BODY:
+                    index = buffer.find(delimiter)
+                    if index < 0:
+                        size = len(buffer) - keep
+                        if size > 0:
+                            await _write_part(part, buffer[:size], max_field_size)
+                            del buffer[:size]
+                        break
+                    await _write_part(part, buffer[:index], max_field_size)
+                    del buffer[: index + len(delimiter)]
+                    if isinstance(part, UploadFile):
+                        await part.seek(0)
+                    else:
+                        fields.setdefault(name, []).append(part.decode(charset, "replace"))
+                    part = None
+                    state = _DELIMITER
+
+                else:
+                    break
+
+        if state != _END:
+            raise HttpException(400, "Multipart body ended before closing boundary")
+    except BaseException:
+        await FormData(fields).close()
+        raise
+
+    return FormData(fields)
+
+
+async def _write_part(part: typing.Union[bytearray, UploadFile], data: bytearray, max_field_size: int) -> None:
+    if isinstance(part, UploadFile):
+        await part.write(bytes(data))
+    else:
+        if len(part) + len(data) > max_field_size:
+            raise HttpException(413, "Multipart field too large")
+        part += data
+
+
+def _parse_part_headers(raw: bytes) -> typing.Dict[str, str]:
+    headers: typing.Dict[str, str] = {}
+    for line in raw.split(b"\r\n"):
+        name, separator, value = line.partition(b":")
+        if not separator:
+            continue
+        try:
+            decoded = value.strip().decode("utf-8")
+        except UnicodeDecodeError:
+            decoded = value.strip().decode("latin-1")
+        headers[name.strip().lower().decode("latin-1")] = decoded
+    return headers
@@ -0,0 +1,421 @@
+import contextvars
+import dataclasses
+import decimal
+import functools
+import inspect
+import os
+import typing
+import uuid
+from .request import Request, Headers, Query, Cookie, _to_bool
+from .response import Response, JsonResponse, PlainTextResponse
+from .parameter import EMPTY, Param, ValidationError, compile_validator, model_fields
+from .exceptions import HttpException
+from smolapi.setting import settings
+
+
+__all__ = ["InvocationPlan", "build_plan", "build_handler", "to_response"]
+
+Extractor = typing.Callable[[Request], typing.Any]
+AsyncExtractor = typing.Callable[[Request], typing.Awaitable[typing.Any]]
+Handler = typing.Callable[[Request], typing.Awaitable[Response]]
+
+_SCALAR_CONVERTERS: typing.Dict[typing.Any, typing.Optional[typing.Callable[[str], typing.Any]]] = {
+    str: None,
+    int: int,
+    float: float,
+    bool: _to_bool,
+    uuid.UUID: uuid.UUID,
+    decimal.Decimal: decimal.Decimal,
+}
+
+# Arguments annotated with these types get the whole request view
+_REQUEST_VIEWS: typing.Dict[type, Extractor] = {
+    Request: lambda request: request,
+    Headers: lambda request: request.headers,
+    Query: lambda request: request.query,
+    Cookie: lambda request: request.cookie,
+}
+
+if typing.TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+_executor: typing.Optional["ThreadPoolExecutor"] = None
+
+
+def _running_loop() -> typing.Any:
+    import asyncio
+
+    return asyncio.get_running_loop()
+
+
+def _get_executor() -> "ThreadPoolExecutor":
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        size = settings.THREAD_POOL_SIZE or min(32, (os.cpu_count() or 1) + 4)
+        _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smolapi-handler")
+    return _executor
+
+
+class InvocationPlan:
+    """
+    Extractors of every handler argument, built once from the handler signature
+
+    Args:
+        function (Callable): Route handler
+        extractors (List[Tuple[str, Extractor]]): Arguments read synchronously from request
+        body_extractors (List[Tuple[str, AsyncExtractor]]): Arguments needing the request body
+    """
+
+    __slots__ = ("function", "extractors", "body_extractors", "is_async")
+
+    def __init__(
+        self,
+        function: typing.Callable,
+        extractors: typing.List[typing.Tuple[str, Extractor]],
+        body_extractors: typing.List[typing.Tuple[str, AsyncExtractor]],
+    ) -> None:
+        self.function = function
+        self.extractors = extractors
+        self.body_extractors = body_extractors
+        self.is_async = _is_async_callable(function)
+
+    async def arguments(self, request: Request) -> typing.Dict[str, typing.Any]:
+        kwargs = {name: extract(request) for name, extract in self.extractors}
+        for name, extract in self.body_extractors:
+            kwargs[name] = await extract(request)
+        return kwargs
+
+    def __repr__(self) -> str:
+        names = [name for name, _ in self.extractors + self.body_extractors]
+        return f"{self.__class__.__name__}({self.function!r}, arguments={names})"
+
+
+def _is_async_callable(function: typing.Callable) -> bool:
+    while isinstance(function, functools.partial):
+        function = function.func
+    return inspect.iscoroutinefunction(function) or inspect.iscoroutinefunction(
+        getattr(function, "__call__", None)
+    )
+
+
+def _missing(label: str, key: str) -> HttpException:
+    return HttpException(400, f"Missing {label} {key!r}")
+
+
+def _invalid(label: str, key: str) -> HttpException:
+    return HttpException(400, f"Invalid {label} {key!r}")
+
+
+def _unwrap(
+    annotation: typing.Any,
+) -> typing.Tuple[typing.Any, typing.Optional[Param], bool, bool]:
+    """Annotation without Annotated/Optional/List wrappers, its marker, if it's optional and if it's a list"""
+    marker = None
+    if typing.get_origin(annotation) is typing.Annotated:
+        annotation, *metadata = typing.get_args(annotation)
+        marker = next((item for item in metadata if isinstance(item, Param)), None)
+
+    optional = False
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        optional = len(args) != len(typing.get_args(annotation))
+        if len(args) == 1:
+            annotation = args[0]
+
+    multi = typing.get_origin(annotation) in (list, typing.List)
+    if multi:
+        args = typing.get_args(annotation)
+        annotation = args[0] if args else str
+    return annotation, marker, optional, multi
+
+
+def _lookup_extractor(
+    mapping: Extractor,
+    key: str,
+    label: str,
+    annotation: typing.Any,
+    default: typing.Any,
+    multi: bool,
+) -> Extractor:
+    convert = _SCALAR_CONVERTERS.get(annotation)
+
+    if multi:
+        def extract(request: Request) -> typing.Any:
+            values = mapping(request).getlist(key)
+            if not values:
+                if default is EMPTY:
+                    raise _missing(label, key)
+                return default
+            if convert is None:
+                return values
+            try:
+                return [convert(value) for value in values]
+            except ValueError:
+                raise _invalid(label, key)
+
+        return extract
+
+    def extract(request: Request) -> typing.Any:
+        value = mapping(request).get(key, EMPTY)
+        if value is EMPTY:
+            if default is EMPTY:
+                raise _missing(label, key)
+            return default
+        if convert is None or not isinstance(value, str):
+            # Path parameters are already converted by the route converter
+            return value
+        try:
+            return convert(value)
+        except ValueError:
+            raise _invalid(label, key)
+
+    return extract
+
+
+def _body_extractor(annotation: typing.Any, default: typing.Any) -> AsyncExtractor:
+    from .form import FormData
+
+    if annotation is FormData:
+        async def extract_form(request: Request) -> typing.Any:
+            return await request.form()
+
+        return extract_form
+
+    validator = None
+    if annotation is not inspect.Parameter.empty and annotation is not typing.Any:
+        validator = compile_validator(annotation)
+
+    async def extract(request: Request) -> typing.Any:
+        body = await request.body()
+        if body is None:
+            if default is EMPTY:
+                raise HttpException(400, "Missing request body")
+            return default
+        if validator is None:
+            return body
+        try:
+            return validator(body)
+        except ValidationError as exc:
+            raise HttpException(422, str(exc))
+
+    return extract
+
+
+def _resource_extractor(pool: typing.Any) -> AsyncExtractor:
+    from .pool import PoolTimeout
+
+    async def extract(request: Request) -> typing.Any:
+        try:
+            resource = await pool.acquire()
+        except PoolTimeout:
+            raise HttpException(503, "Service busy, try again later", headers={"retry-after": "1"})
+        request.add_cleanup(functools.partial(pool.release, resource))
+        return resource
+
+    return extract
+
+
+def _query_model_extractor(annotation: typing.Any) -> Extractor:
+    validator = compile_validator(annotation)
+    # Repeated values only go to list fields, every other field gets the first one
+    list_fields = set()
+    for name, field in model_fields(annotation).items():
+        field, _, _, multi = _unwrap(field)
+        if multi or typing.get_origin(field) in (set, frozenset, tuple):
+            list_fields.add(name)
+
+    def extract(request: Request) -> typing.Any:
+        query = request.query
+        data = {key: query.getlist(key) if key in list_fields else query[key] for key in query}
+        try:
+            return validator(data)
+        except ValidationError as exc:
+            raise HttpException(422, str(exc))
+
+    return extract
+
+
+def _is_model_type(annotation: typing.Any) -> bool:
+    return dataclasses.is_dataclass(annotation) or typing.is_typeddict(annotation)
+
+
+def _is_body_type(annotation: typing.Any) -> bool:
+    from .form import FormData
+
+    return annotation is FormData or _is_model_type(annotation)
+
+
+def build_plan(
+    function: typing.Callable, path_parameters: typing.Iterable[str] = ()
+) -> InvocationPlan:
+    """
+    Inspect a handler once and plan how to get each of its arguments
+
+    Arguments are resolved in this order: explicit `Param` marker (including
+    `Resource`, acquired after the other arguments), a request
+    view annotation (Request, Headers, Query, Cookie), an argument named like
+    a path parameter, a body type (dataclass, TypedDict, FormData), an argument
+    named `request`, and finally a query parameter of the same name.
+
+    Args:
+        function (Callable): Route handler
+        path_parameters (Iterable[str], optional): Path parameter names of the route.
+
+    Raises:
+        TypeError: Handler signature can't be planned
+
+    Returns:
+        InvocationPlan: Plan of the handler
+    """
+    path_parameters = set(path_parameters)
+    signature = inspect.signature(function)
+    try:
+        hints = typing.get_type_hints(function, include_extras=True)
+    except Exception:
+        hints = {}
+
+    extractors: typing.List[typing.Tuple[str, Extractor]] = []
+    body_extractors: typing.List[typing.Tuple[str, AsyncExtractor]] = []
+    for name, parameter in signature.parameters.items():
+        if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+            continue
+        if parameter.kind is parameter.POSITIONAL_ONLY:
+            raise TypeError(f"Positional only argument {name!r} of {function!r} can't be injected")
+
+        raw_annotation = hints.get(name, parameter.annotation)
+        annotation, marker, optional, multi = _unwrap(raw_annotation)
+        default = parameter.default
+        if isinstance(default, Param):
+            marker, default = default, default.default
+        if default is parameter.empty:
+            default = marker.default if marker is not None else EMPTY
+        if default is EMPTY and optional:
+            default = None
+
+        source = marker.source if marker is not None else None
+        key = marker.alias if marker is not None and marker.alias else name
+
+        if source is None:
+            view = _REQUEST_VIEWS.get(annotation) if isinstance(annotation, type) else None
+            if view is None and isinstance(annotation, type):
+                view = next(
+                    (extract for base, extract in _REQUEST_VIEWS.items() if issubclass(annotation, base)),
+                    None,
+                )
+            if view is not None:
+                extractors.append((name, view))
+                continue
+            if name in path_parameters:
+                source = "path"
+            elif _is_body_type(annotation):
+                source = "body"
+            elif name == "request" and annotation is parameter.empty:
+                extractors.append((name, _REQUEST_VIEWS[Request]))
+                continue
+            else:
+                source = "query"
+
+        if source == "body":
+            body_extractors.append((name, _body_extractor(annotation, default)))
+        elif source == "resource":
+            body_extractors.append((name, _resource_extractor(marker.pool)))
+        elif source == "path":
+            extractors.append(
+                (name, _lookup_extractor(_path_params, key, "path parameter", annotation, default, False))
+            )
+        elif source == "query" and _is_model_type(annotation):
+            extractors.append((name, _query_model_extractor(annotation)))
+        elif source == "query":
+            extractors.append(
+                (name, _lookup_extractor(_query, key, "query parameter", annotation, default, multi))
+            )
+        elif source == "header":
+            if marker is None or not marker.alias:
+                key = key.replace("_", "-")
+            extractors.append(
+                (name, _lookup_extractor(_headers, key, "header", annotation, default, multi))
+            )
+        elif source == "cookie":
+            extractors.append(
+                (name, _lookup_extractor(_cookies, key, "cookie", annotation, default, False))
+            )
+        else:
+            raise TypeError(f"Unknown parameter source {source!r} for argument {name!r}")
+
+    return InvocationPlan(function, extractors, body_extractors)
+
+
+def _path_params(request: Request) -> typing.Mapping[str, typing.Any]:
+    return request.scope.get("path_params") or {}
+
+
+def _query(request: Request) -> Query:
+    return request.query
+
+
+def _headers(request: Request) -> Headers:
+    return request.headers
+
+
+def _cookies(request: Request) -> Cookie:
+    return request.cookie
+
+
+def to_response(result: typing.Any) -> typing.Any:
+    """
+    Turn a handler result into something the server can be sent: responses
+    and ASGI callables as is, str as text, bytes as raw body, None as 204
+    and everything else as JSON
+    """
+    if isinstance(result, Response) or callable(result):
+        return result
+    if result is None:
+        return Response(status_code=204)
+    if isinstance(result, str):
+        return PlainTextResponse(result)
+    if isinstance(result, (bytes, bytearray, memoryview)):
+        return Response(result, media_type="application/octet-stream")
+    return JsonResponse(result)
+
+
+def build_handler(
+    function: typing.Callable, path_parameters: typing.Iterable[str] = ()
+) -> Handler:
+    """
+    Request handler running the invocation plan of `function`, sync functions
+    are run in a bounded thread pool (settings.THREAD_POOL_SIZE)
+
+    Args:
+        function (Callable): Route handler
+        path_parameters (Iterable[str], optional): Path parameter names of the route.
+
+    Returns:
+        Handler: Coroutine function taking the request and returning the response
+    """
+    plan = build_plan(function, path_parameters)
+    extractors = plan.extractors
+
+    if plan.is_async and not plan.body_extractors and len(extractors) == 1 and extractors[0][1] is _REQUEST_VIEWS[Request]:
+        # Plain `async def handler(request)`, nothing to plan
+        async def call_request(request: Request) -> Response:
+            return to_response(await function(request))
+
+        return call_request
+
+    if plan.is_async:
+        async def call(request: Request) -> Response:
+            return to_response(await function(**await plan.arguments(request)))
+
+        return call
+
+    async def call_sync(request: Request) -> Response:
+        kwargs = await plan.arguments(request)
+        context = contextvars.copy_context()
+        result = await _running_loop().run_in_executor(
+            _get_executor(), functools.partial(context.run, function, **kwargs)
+        )
+        return to_response(result)
+
+    return call_sync
@@ -1,9 +1,337 @@
-import logger
+import random
+import sys
+import threading
+import time
+import typing
+from collections import deque
+from .types import Scope, Receive, Send, App, Message
+from smolapi.setting import settings
+
+if typing.TYPE_CHECKING:
+    import logging
+
+
+__all__ = ["Logger", "LogWriter", "AccessLog", "get_logger", "get_writer", "install_handler"]
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+_LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+# Queued records are tuples, they are turned into JSON by the writer thread:
+# (_APP, timestamp, level, logger name, message, fields) for application logs and
+# (_ACCESS, timestamp, route, method, path, status, duration, client) for access logs
+_APP = 0
+_ACCESS = 1
+
+
+class LogWriter:
+    """
+    Background thread writing queued records as JSON lines
+
+    `submit` only appends to a bounded deque, records are formatted and
+    written by the thread in batches of up to `batch_size`, at least every
+    `flush_interval` seconds. When the buffer is full new records are
+    dropped and counted in `dropped`, the request path never waits on I/O.
+
+    Args:
+        stream (TextIO, optional): Destination. Defaults to sys.stderr.
+        max_queue (int, optional): Records buffered at most. Defaults to settings.LOG_QUEUE_SIZE or 10000.
+        batch_size (int, optional): Records written per write call. Defaults to settings.LOG_BATCH_SIZE or 256.
+        flush_interval (float, optional): Seconds between writes of partial batches.
+            Defaults to settings.LOG_FLUSH_INTERVAL or 0.5.
+    """
+
+    def __init__(
+        self,
+        stream: typing.Optional[typing.TextIO] = None,
+        max_queue: typing.Optional[int] = None,
+        batch_size: typing.Optional[int] = None,
+        flush_interval: typing.Optional[float] = None,
+    ) -> None:
+        self.stream = stream if stream is not None else sys.stderr
+        self.max_queue = max_queue or settings.LOG_QUEUE_SIZE or 10000
+        self.batch_size = batch_size or settings.LOG_BATCH_SIZE or 256
+        self.flush_interval = flush_interval or settings.LOG_FLUSH_INTERVAL or 0.5
+        self.dropped = 0
+        self.written = 0
+        self._buffer: typing.Deque[tuple] = deque()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._closed = False
+        self._thread: typing.Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, record: tuple) -> bool:
+        """
+        Queue a record, safe to call from any thread or the event loop
+
+        Returns:
+            bool: False when the record was dropped because the buffer is full
+        """
+        buffer = self._buffer
+        if len(buffer) >= self.max_queue or self._closed:
+            self.dropped += 1
+            return False
+        buffer.append(record)
+        if self._thread is None:
+            self._start()
+        if len(buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until every queued record is written"""
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self._buffer or not self._idle.is_set():
+            self._wakeup.set()
+            if time.monotonic() > deadline:
+                break
+            self._idle.wait(0.01)
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            thread = threading.Thread(target=self._run, name="smolapi-log-writer", daemon=True)
+            thread.start()
+            self._thread = thread
+
+    def _run(self) -> None:
+        buffer = self._buffer
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while buffer:
+                self._idle.clear()
+                batch = []
+                while buffer and len(batch) < self.batch_size:
+                    batch.append(_format(buffer.popleft()))
+                try:
+                    self.stream.write("".join(batch))
+                    self.stream.flush()
+                except Exception:
+                    # Logging must not take the application down, the batch is lost
+                    self.dropped += len(batch)
+                else:
+                    self.written += len(batch)
+            self._idle.set()
+            if self._closed:
+                return
+
+
+def _format(record: tuple) -> str:
+    from . import serializer
+
+    if record[0] == _APP:
+        _, timestamp, level, name, message, fields = record
+        data = {"ts": timestamp, "level": level, "logger": name, "msg": message}
+        if fields:
+            data.update(fields)
+    else:
+        _, timestamp, route, method, path, status, duration, client = record
+        data = {
+            "ts": timestamp,
+            "type": "access",
+            "route": route,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "client": client,
+        }
+    try:
+        line = serializer.dumps(data)
+    except (TypeError, ValueError):
+        data = {key: value if isinstance(value, (str, int, float, bool, type(None))) else repr(value) for key, value in data.items()}
+        line = serializer.dumps(data)
+    return line.decode("utf-8") + "\n"
+
+
+_writer: typing.Optional[LogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> LogWriter:
+    """Process wide writer, started on the first record and flushed at exit"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                import atexit
+
+                _writer = LogWriter()
+                atexit.register(_writer.close)
+    return _writer
 
 
 class Logger:
-    def __init__(self) -> None:
-        pass
-    
-    # @classmethod
-    # def 
\ No newline at end of file
+    """
+    Structured logger, `logger.info("user created", user_id=1)` queues one JSON line
+
+    Records below the level are skipped before any work is done, the others
+    are queued as tuples and formatted by the writer thread.
+
+    Args:
+        name (str): Logger name in records
+        level (str | int, optional): Minimum level. Defaults to settings.LOG_LEVEL or INFO.
+        writer (LogWriter, optional): Defaults to the process wide writer.
+    """
+
+    __slots__ = ("name", "level", "_writer")
+
+    def __init__(
+        self,
+        name: str,
+        level: typing.Union[str, int, None] = None,
+        writer: typing.Optional[LogWriter] = None,
+    ) -> None:
+        self.name = name
+        level = level if level is not None else settings.LOG_LEVEL or "INFO"
+        self.level = LEVELS[level.upper()] if isinstance(level, str) else level
+        self._writer = writer
+
+    @property
+    def writer(self) -> LogWriter:
+        if self._writer is None:
+            self._writer = get_writer()
+        return self._writer
+
+    def log(self, level: int, message: str, **fields: typing.Any) -> None:
+        if level < self.level:
+            return
+        self.writer.submit((_APP, time.time(), _LEVEL_NAMES.get(level, str(level)), self.name, message, fields))
+
+    def debug(self, message: str, **fields: typing.Any) -> None:
+        self.log(10, message, **fields)
+
+    def info(self, message: str, **fields: typing.Any) -> None:
+        self.log(20, message, **fields)
+
+    def warning(self, message: str, **fields: typing.Any) -> None:
+        self.log(30, message, **fields)
+
+    def error(self, message: str, **fields: typing.Any) -> None:
+        self.log(40, message, **fields)
+
+    def exception(self, message: str, **fields: typing.Any) -> None:
+        import traceback
+
+        self.log(40, message, exc_info=traceback.format_exc(), **fields)
+
+
+_loggers: typing.Dict[str, Logger] = {}
+
+
+def get_logger(name: str = "smolapi") -> Logger:
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = Logger(name)
+    return logger
+
+
+def install_handler(
+    logger: typing.Union[str, "logging.Logger", None] = None, writer: typing.Optional[LogWriter] = None
+) -> "logging.Handler":
+    """
+    Send records of a stdlib logger (root by default) through the writer thread,
+    the message is merged on the calling thread and the record isn't kept
+
+    Returns:
+        logging.Handler: Installed handler, remove it with `logger.removeHandler`
+    """
+    import logging
+
+    class WriterHandler(logging.Handler):
+        def __init__(self, writer: LogWriter) -> None:
+            super().__init__()
+            self.writer = writer
+
+        def emit(self, record: logging.LogRecord) -> None:
+            fields = None
+            if record.exc_info:
+                fields = {"exc_info": (self.formatter or logging.Formatter()).formatException(record.exc_info)}
+            self.writer.submit((_APP, record.created, record.levelname, record.name, record.getMessage(), fields))
+
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
+    handler = WriterHandler(writer or get_writer())
+    logger.addHandler(handler)
+    return handler
+
+
+class AccessLog:
+    """
+    Access log of every route, one JSON line per request
+
+    Routes are wrapped at compilation, see `Application(access_log=...)`.
+    Requests are sampled per route: `sample_rates` maps route names to the
+    fraction of requests logged, server errors are always logged.
+
+    Args:
+        sample_rate (float, optional): Default fraction logged. Defaults to
+            settings.ACCESS_LOG_SAMPLE_RATE or 1.
+        sample_rates (Dict[str, float], optional): Fraction logged per route name.
+        writer (LogWriter, optional): Defaults to the process wide writer.
+    """
+
+    def __init__(
+        self,
+        sample_rate: typing.Optional[float] = None,
+        sample_rates: typing.Optional[typing.Dict[str, float]] = None,
+        writer: typing.Optional[LogWriter] = None,
+    ) -> None:
+        if sample_rate is None:
+            sample_rate = settings.ACCESS_LOG_SAMPLE_RATE
+        self.sample_rate = 1.0 if sample_rate is None else sample_rate
+        self.sample_rates = dict(sample_rates or {})
+        self._writer = writer
+
+    @property
+    def writer(self) -> LogWriter:
+        if self._writer is None:
+            self._writer = get_writer()
+        return self._writer
+
+    def wrap(self, route_name: str, app: App) -> App:
+        """ASGI app logging the requests of a route, the rate is resolved here once"""
+        rate = self.sample_rates.get(route_name, self.sample_rate)
+        submit = self.writer.submit
+        clock = time.perf_counter
+        sample = random.random
+
+        async def logged(scope: Scope, receive: Receive, send: Send) -> None:
+            started = clock()
+            status = 500
+
+            async def send_status(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                await send(message)
+
+            try:
+                await app(scope, receive, send_status)
+            finally:
+                if status >= 500 or rate >= 1 or sample() < rate:
+                    client = scope.get("client")
+                    submit((
+                        _ACCESS,
+                        time.time(),
+                        route_name,
+                        scope.get("method"),
+                        scope.get("path"),
+                        status,
+                        clock() - started,
+                        client[0] if client else None,
+                    ))
+
+        return logged
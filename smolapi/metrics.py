@@ -0,0 +1,317 @@
+import heapq
+import time
+import typing
+from .request import Request
+from .response import Response
+from .exceptions import HttpException
+from .middleware import Handler, _error_response
+from .types import Scope, Receive, Send, App, Message
+
+
+__all__ = ["Metrics", "RouteMetrics", "SlowRequest", "PHASES"]
+
+PHASES = ("routing", "body", "handler", "send")
+_ROUTING, _BODY, _HANDLER, _SEND = range(len(PHASES))
+
+# Bucket i holds durations below 2**i microseconds, the last one everything above
+_BUCKETS = 28
+_BUCKET_BOUNDS = tuple((1 << index) / 1e6 for index in range(_BUCKETS - 1))
+_STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+# perf_counter of the request start, set by Application when metrics are enabled
+STARTED_KEY = "smolapi.started"
+
+
+def _bucket(seconds: float) -> int:
+    index = int(seconds * 1e6).bit_length()
+    return index if index < _BUCKETS else _BUCKETS - 1
+
+
+class RouteMetrics:
+    """
+    Counters and latency histograms of one route, preallocated at route compilation
+
+    Histograms of every phase live in one flat list of log2 buckets in
+    microseconds, recording a duration is a bit_length and two increments.
+    """
+
+    __slots__ = ("name", "requests", "statuses", "buckets", "sums")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.requests = 0
+        self.statuses = [0] * len(_STATUS_CLASSES)
+        self.buckets = [0] * (len(PHASES) * _BUCKETS)
+        self.sums = [0.0] * len(PHASES)
+
+    def clear(self) -> None:
+        # In place, instrumented routes hold references to these lists
+        self.requests = 0
+        self.statuses[:] = [0] * len(_STATUS_CLASSES)
+        self.buckets[:] = [0] * (len(PHASES) * _BUCKETS)
+        self.sums[:] = [0.0] * len(PHASES)
+
+    def observe(self, phase: int, seconds: float) -> None:
+        self.buckets[phase * _BUCKETS + _bucket(seconds)] += 1
+        self.sums[phase] += seconds
+
+    def count(self, phase: str) -> int:
+        offset = PHASES.index(phase) * _BUCKETS
+        return sum(self.buckets[offset : offset + _BUCKETS])
+
+    def quantile(self, phase: str, q: float) -> float:
+        """
+        Estimated quantile of a phase in seconds, the upper bound of the bucket holding it
+
+        Args:
+            phase (str): One of PHASES
+            q (float): Quantile between 0 and 1, e.g. 0.99
+
+        Returns:
+            float: Seconds, 0 when nothing was recorded
+        """
+        offset = PHASES.index(phase) * _BUCKETS
+        counts = self.buckets[offset : offset + _BUCKETS]
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                return _BUCKET_BOUNDS[index] if index < len(_BUCKET_BOUNDS) else float("inf")
+        return float("inf")
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "requests": self.requests,
+            "statuses": dict(zip(_STATUS_CLASSES, self.statuses)),
+            "phases": {
+                phase: {
+                    "count": self.count(phase),
+                    "sum": self.sums[index],
+                    "p50": self.quantile(phase, 0.5),
+                    "p99": self.quantile(phase, 0.99),
+                }
+                for index, phase in enumerate(PHASES)
+            },
+        }
+
+
+class SlowRequest:
+    """Phase breakdown of one slow request, in seconds"""
+
+    __slots__ = ("route", "method", "path", "status", "total", "phases", "timestamp")
+
+    def __init__(
+        self, route: str, method: str, path: str, status: int, phases: typing.Tuple[float, ...]
+    ) -> None:
+        self.route = route
+        self.method = method
+        self.path = path
+        self.status = status
+        self.total = sum(phases)
+        self.phases = dict(zip(PHASES, phases))
+        self.timestamp = time.time()
+
+    def __lt__(self, other: "SlowRequest") -> bool:
+        return self.total < other.total
+
+    def __repr__(self) -> str:
+        phases = ", ".join(f"{name}={seconds * 1000:.3f}ms" for name, seconds in self.phases.items())
+        return f"<SlowRequest {self.method} {self.path} ({self.route}) {self.status} {self.total * 1000:.3f}ms: {phases}>"
+
+
+class Metrics:
+    """
+    Per-route request counts, status classes and phase latency histograms
+
+    Phases are routing, body (read and parse through `Request.body`),
+    handler (middlewares and handler, body excluded) and send. Pass it to
+    `Application(metrics=...)`, routes are instrumented at compilation so an
+    application without metrics pays nothing.
+
+    The slowest requests are kept with their phase breakdown. Requests over
+    `slow_threshold` are also passed to `on_slow`, one out of `slow_sample_rate`.
+
+    Args:
+        slowest (int, optional): Slow requests kept by `slowest_requests`. Defaults to 20.
+        slow_threshold (float, optional): Seconds over which `on_slow` is called. Defaults to None.
+        on_slow (Callable[[SlowRequest], None], optional): Hook receiving slow requests.
+        slow_sample_rate (int, optional): Pass one slow request out of this many to `on_slow`. Defaults to 1.
+    """
+
+    def __init__(
+        self,
+        slowest: int = 20,
+        slow_threshold: typing.Optional[float] = None,
+        on_slow: typing.Optional[typing.Callable[[SlowRequest], None]] = None,
+        slow_sample_rate: int = 1,
+    ) -> None:
+        self.routes: typing.Dict[str, RouteMetrics] = {}
+        self.unmatched = 0
+        self._slowest: typing.List[SlowRequest] = []
+        self._slowest_size = slowest
+        # Cheapest total to enter the slowest list, avoids building records for fast requests
+        self._slow_floor = 0.0
+        self._slow_threshold = slow_threshold
+        self._on_slow = on_slow
+        self._slow_sample_rate = max(slow_sample_rate, 1)
+        self._slow_seen = 0
+
+    def route(self, name: str) -> RouteMetrics:
+        metrics = self.routes.get(name)
+        if metrics is None:
+            metrics = self.routes[name] = RouteMetrics(name)
+        return metrics
+
+    def snapshot(self) -> typing.Dict[str, typing.Any]:
+        """Metrics of every route as plain data"""
+        return {
+            "unmatched": self.unmatched,
+            "routes": {name: metrics.as_dict() for name, metrics in self.routes.items()},
+        }
+
+    def slowest_requests(self) -> typing.List[SlowRequest]:
+        return sorted(self._slowest, reverse=True)
+
+    def dump_slowest(self) -> str:
+        return "\n".join(map(repr, self.slowest_requests()))
+
+    def reset(self) -> None:
+        for metrics in self.routes.values():
+            metrics.clear()
+        self.unmatched = 0
+        self._slowest = []
+        self._slow_floor = 0.0
+
+    def _record_slow(
+        self, route: RouteMetrics, scope: Scope, status: int, phases: typing.Tuple[float, ...]
+    ) -> None:
+        total = sum(phases)
+        threshold = self._slow_threshold
+        keep = self._slowest_size > 0 and (len(self._slowest) < self._slowest_size or total > self._slow_floor)
+        notify = self._on_slow is not None and threshold is not None and total >= threshold
+        if not keep and not notify:
+            return
+        record = SlowRequest(route.name, scope.get("method", ""), scope.get("path", ""), status, phases)
+        if keep:
+            if len(self._slowest) < self._slowest_size:
+                heapq.heappush(self._slowest, record)
+            else:
+                heapq.heapreplace(self._slowest, record)
+            if len(self._slowest) == self._slowest_size:
+                self._slow_floor = self._slowest[0].total
+        if notify:
+            self._slow_seen += 1
+            if self._slow_seen % self._slow_sample_rate == 0:
+                self._on_slow(record)
+
+    def prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP smolapi_requests_total Requests by route and status class",
+            "# TYPE smolapi_requests_total counter",
+        ]
+        for name, metrics in self.routes.items():
+            route = _label(name)
+            for status, count in zip(_STATUS_CLASSES, metrics.statuses):
+                if count:
+                    lines.append(f'smolapi_requests_total{{route="{route}",status="{status}"}} {count}')
+        lines += [
+            "# HELP smolapi_unmatched_requests_total Requests not matching any route",
+            "# TYPE smolapi_unmatched_requests_total counter",
+            f"smolapi_unmatched_requests_total {self.unmatched}",
+            "# HELP smolapi_request_phase_seconds Time spent in each phase of a request",
+            "# TYPE smolapi_request_phase_seconds histogram",
+        ]
+        for name, metrics in self.routes.items():
+            route = _label(name)
+            for index, phase in enumerate(PHASES):
+                offset = index * _BUCKETS
+                counts = metrics.buckets[offset : offset + _BUCKETS]
+                labels = f'route="{route}",phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(_BUCKET_BOUNDS, counts):
+                    cumulative += count
+                    lines.append(f'smolapi_request_phase_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'smolapi_request_phase_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f"smolapi_request_phase_seconds_sum{{{labels}}} {metrics.sums[index]}")
+                lines.append(f"smolapi_request_phase_seconds_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    async def endpoint(self, request: Request) -> Response:
+        """Handler serving `prometheus`, e.g. `Route.get("/metrics", metrics.endpoint)`"""
+        return Response(self.prometheus(), media_type="text/plain; version=0.0.4")
+
+    def instrument(self, route_name: str, handler: Handler) -> App:
+        """ASGI app of a route recording its metrics around the request handler, see `build_route_app`"""
+        metrics = self.route(route_name)
+        statuses = metrics.statuses
+        buckets = metrics.buckets
+        sums = metrics.sums
+        last = _BUCKETS - 1
+        clock = time.perf_counter
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            started = clock()
+            routing = started - scope.get(STARTED_KEY, started)
+            request = Request(scope, receive, send)
+            status = 500
+            handled = sent = None
+            try:
+                try:
+                    response = await handler(request)
+                except HttpException as exc:
+                    response = _error_response(exc)
+                handled = clock()
+                status = getattr(response, "status_code", None)
+                if status is None:
+                    # Raw ASGI callable, read the status from the messages
+                    captured = [500]
+
+                    async def send_status(message: Message) -> None:
+                        if message["type"] == "http.response.start":
+                            captured[0] = message["status"]
+                        await send(message)
+
+                    await response(scope, receive, send_status)
+                    status = captured[0]
+                else:
+                    await response(scope, receive, send)
+                sent = clock()
+            finally:
+                await request.close()
+                if sent is None:
+                    # Failed in the handler or while sending
+                    sent = clock()
+                    handled = handled or sent
+                body = request._body_time
+                handler_time = handled - started - body
+                send_time = sent - handled
+                metrics.requests += 1
+                statuses[(status // 100 - 1) if 100 <= status < 600 else 4] += 1
+                # Inlined `RouteMetrics.observe` of every phase, this runs on each request
+                index = int(routing * 1e6).bit_length()
+                buckets[index if index < last else last] += 1
+                index = int(body * 1e6).bit_length()
+                buckets[_BUCKETS + (index if index < last else last)] += 1
+                index = int(handler_time * 1e6).bit_length()
+                buckets[2 * _BUCKETS + (index if index < last else last)] += 1
+                index = int(send_time * 1e6).bit_length()
+                buckets[3 * _BUCKETS + (index if index < last else last)] += 1
+                sums[_ROUTING] += routing
+                sums[_BODY] += body
+                sums[_HANDLER] += handler_time
+                sums[_SEND] += send_time
+                total = routing + body + handler_time + send_time
+                if total > self._slow_floor or (self._slow_threshold is not None and total >= self._slow_threshold):
+                    self._record_slow(metrics, scope, status, (routing, body, handler_time, send_time))
+
+        return app
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,195 @@
+import inspect
+import typing
+from .types import Scope, Receive, Send, App, Message
+from .request import Request
+from .response import Response, PlainTextResponse
+from .exceptions import HttpException
+from .invocation import build_handler
+
+if typing.TYPE_CHECKING:
+    import asyncio
+    from .routing import Route
+    from .metrics import Metrics
+
+
+__all__ = ["BaseMiddleware", "CallNext", "build_route_app"]
+
+CallNext = typing.Callable[[Request], typing.Awaitable[Response]]
+Handler = typing.Callable[[Request], typing.Awaitable[Response]]
+
+
+class BaseMiddleware:
+    """
+    Request/response middleware, receives the request and the next handler
+    of the chain and returns the response
+
+    Any other middleware is treated as pure ASGI: a callable taking the
+    inner ASGI app and returning the wrapping one, e.g. `class M: def __init__(self, app)`.
+    Coroutine functions with `(request, call_next)` signature are request/response
+    middlewares too.
+    """
+
+    async def dispatch(self, request: Request, call_next: CallNext) -> Response:
+        return await call_next(request)
+
+
+def _is_request_middleware(middleware: typing.Any) -> bool:
+    return isinstance(middleware, BaseMiddleware) or inspect.iscoroutinefunction(middleware)
+
+
+def _bind(middleware: typing.Any, call_next: Handler) -> Handler:
+    dispatch = middleware.dispatch if isinstance(middleware, BaseMiddleware) else middleware
+
+    async def call(request: Request) -> Response:
+        return await dispatch(request, call_next)
+
+    return call
+
+
+async def _not_implemented(request: Request) -> Response:
+    raise HttpException(501)
+
+
+def _endpoint(route: "Route") -> Handler:
+    if route.function is None:
+        handler = _not_implemented
+    else:
+        handler = build_handler(route.function, route.path_parameters)
+    if route.cache is not None:
+        handler = route.cache.wrap(route, handler)
+
+    async def call(request: Request) -> Response:
+        try:
+            return await handler(request)
+        except HttpException as exc:
+            return _error_response(exc)
+
+    return call
+
+
+def _error_response(exc: HttpException) -> Response:
+    return PlainTextResponse(exc.detail, status_code=exc.status_code, headers=exc.headers)
+
+
+def _request_app(handler: Handler) -> App:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        request = Request(scope, receive, send)
+        try:
+            try:
+                response = await handler(request)
+            except HttpException as exc:
+                response = _error_response(exc)
+            await response(scope, receive, send)
+        finally:
+            await request.close()
+
+    return app
+
+
+class _AppResponse(Response):
+    """
+    Response of an ASGI app run below a request middleware, the start message
+    is known, body messages are relayed as the app sends them
+    """
+
+    def __init__(
+        self, start: Message, messages: "asyncio.Queue[typing.Optional[Message]]", task: "asyncio.Future"
+    ) -> None:
+        self.status_code = start["status"]
+        self.raw_headers = list(start.get("headers", []))
+        self.body = b""
+        self._start = start
+        self._messages = messages
+        self._task = task
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({**self._start, "status": self.status_code, "headers": self.raw_headers})
+        try:
+            while True:
+                message = await self._messages.get()
+                if message is None:
+                    break
+                await send(message)
+        finally:
+            # Errors raised by the app after its start message surface here
+            await self._task
+
+
+def _app_handler(app: App) -> Handler:
+    """Handler running an ASGI app, for request middlewares declared outside ASGI ones"""
+
+    async def call(request: Request) -> Response:
+        import asyncio
+
+        replay = request._body_bytes
+        messages: "asyncio.Queue[typing.Optional[Message]]" = asyncio.Queue()
+        start = asyncio.get_running_loop().create_future()
+
+        async def receive() -> Message:
+            nonlocal replay
+            if replay is not None:
+                # Body already read by an outer middleware, hand it over again
+                body, replay = bytes(replay), None
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await request._receive()
+
+        async def send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.set_result(message)
+            else:
+                messages.put_nowait(message)
+
+        async def run() -> None:
+            try:
+                await app(request.scope, receive, send)
+            finally:
+                messages.put_nowait(None)
+
+        task = asyncio.ensure_future(run())
+        await asyncio.wait((start, task), return_when=asyncio.FIRST_COMPLETED)
+        if not start.done():
+            start.cancel()
+            task.result()
+            raise RuntimeError("ASGI app returned without sending a response")
+        return _AppResponse(start.result(), messages, task)
+
+    return call
+
+
+def build_route_app(route: "Route", metrics: typing.Optional["Metrics"] = None) -> App:
+    """
+    Compose the middlewares of a route around its function into one ASGI app
+
+    Middlewares run in the declared order, outer routers first, whatever
+    their kind. Pure ASGI ones below a request/response one are run through
+    an adapter, the leading ASGI ones wrap the request handler directly.
+    Every closure of the chain is created here, once, so a request only pays the calls.
+
+    Args:
+        route (Route): Flattened route, see `Router.unpack_route`
+        metrics (Metrics, optional): Records the route metrics when given. Defaults to None.
+
+    Returns:
+        App: ASGI app serving the route
+    """
+    middlewares = route.middlewares
+    outer = 0
+    while outer < len(middlewares) and not _is_request_middleware(middlewares[outer]):
+        outer += 1
+
+    handler = _endpoint(route)
+    app: typing.Optional[App] = None
+    for middleware in reversed(middlewares[outer:]):
+        if _is_request_middleware(middleware):
+            if app is not None:
+                handler, app = _app_handler(app), None
+            handler = _bind(middleware, handler)
+        else:
+            if app is None:
+                app = _request_app(handler)
+            app = middleware(app)
+
+    app = _request_app(handler) if metrics is None else metrics.instrument(route.name, handler)
+    for middleware in reversed(middlewares[:outer]):
+        app = middleware(app)
+    return app
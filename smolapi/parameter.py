@@ -0,0 +1,472 @@
+import typing
+
+
+__all__ = [
+    "Param",
+    "PathParam",
+    "QueryParam",
+    "HeaderParam",
+    "CookieParam",
+    "BodyParam",
+    "Resource",
+    "ValidationError",
+    "compile_validator",
+    "validate",
+]
+
+
+class _Empty:
+    def __repr__(self) -> str:
+        return "EMPTY"
+
+
+EMPTY: typing.Any = _Empty()
+
+
+class Param:
+    """
+    Declares where a handler argument comes from, either as default value
+    (`page: int = QueryParam(default=1)`) or as `typing.Annotated` metadata
+    (`token: Annotated[str, HeaderParam("x-token")]`)
+
+    Args:
+        alias (str, optional): Name in the request when it differs from the argument name.
+        default (Any, optional): Value used when missing, the argument is required without it.
+    """
+
+    source = ""
+
+    def __init__(self, alias: typing.Optional[str] = None, default: typing.Any = EMPTY) -> None:
+        self.alias = alias
+        self.default = default
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(alias={self.alias!r}, default={self.default!r})"
+
+
+class PathParam(Param):
+    source = "path"
+
+
+class QueryParam(Param):
+    source = "query"
+
+
+class HeaderParam(Param):
+    """Header argument, `x_token` is looked up as `x-token` unless an alias is given"""
+
+    source = "header"
+
+
+class CookieParam(Param):
+    source = "cookie"
+
+
+class BodyParam(Param):
+    """Parsed request body, see `Request.body`"""
+
+    source = "body"
+
+
+class Resource(Param):
+    """
+    Resource acquired from a pool when the handler is called and released
+    once the response is sent, e.g. `conn = Resource(db_pool)`
+
+    Args:
+        pool (Any): Object with async `acquire()` and `release(resource)`, see `smolapi.pool.Pool`
+        default (Any, optional): Unused, resources are always acquired.
+    """
+
+    source = "resource"
+
+    def __init__(self, pool: typing.Any, default: typing.Any = EMPTY) -> None:
+        super().__init__(None, default)
+        self.pool = pool
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.pool!r})"
+
+
+class ValidationError(ValueError):
+    """
+    Raised when data doesn't match a declared model
+
+    Args:
+        errors (List[Tuple[Tuple, str]]): Location of each error in the data and its message
+    """
+
+    def __init__(self, errors: typing.List[typing.Tuple[typing.Tuple[typing.Any, ...], str]]) -> None:
+        self.errors = errors
+        super().__init__(str(self))
+
+    def __str__(self) -> str:
+        return "; ".join(
+            f"{'.'.join(map(str, location)) or '<root>'}: {message}"
+            for location, message in self.errors
+        )
+
+
+Validator = typing.Callable[[typing.Any], typing.Any]
+
+_VALIDATORS: typing.Dict[typing.Any, Validator] = {}
+
+
+def _fail(message: str) -> typing.NoReturn:
+    raise ValidationError([((), message)])
+
+
+def _validate_any(value: typing.Any) -> typing.Any:
+    return value
+
+
+def _validate_str(value: typing.Any) -> str:
+    if type(value) is str or isinstance(value, str):
+        return value
+    _fail("must be a string")
+
+
+def _validate_int(value: typing.Any) -> int:
+    if type(value) is int:
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    elif isinstance(value, float) and value.is_integer():
+        return int(value)
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return int(value)
+    _fail("must be an integer")
+
+
+def _validate_float(value: typing.Any) -> float:
+    if type(value) is float:
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    _fail("must be a number")
+
+
+_BOOL_STRINGS = {"1": True, "true": True, "yes": True, "on": True, "0": False, "false": False, "no": False, "off": False}
+
+
+def _validate_bool(value: typing.Any) -> bool:
+    if value is True or value is False:
+        return value
+    if isinstance(value, str):
+        result = _BOOL_STRINGS.get(value.lower())
+        if result is not None:
+            return result
+    elif value == 0 or value == 1:
+        return bool(value)
+    _fail("must be a boolean")
+
+
+def _parsing_validator(kind: type, parse: typing.Callable[[str], typing.Any], expected: str) -> Validator:
+    def validate(value: typing.Any) -> typing.Any:
+        if isinstance(value, kind):
+            return value
+        if isinstance(value, str):
+            try:
+                return parse(value)
+            except (ValueError, ArithmeticError):
+                pass
+        _fail(f"must be {expected}")
+
+    return validate
+
+
+def _decimal_validator() -> Validator:
+    import decimal
+
+    parse = _parsing_validator(decimal.Decimal, decimal.Decimal, "a decimal")
+
+    def validate(value: typing.Any) -> typing.Any:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return decimal.Decimal(str(value))
+        return parse(value)
+
+    return validate
+
+
+def _scalar_validator(tp: typing.Any) -> typing.Optional[Validator]:
+    import datetime
+    import decimal
+    import uuid
+
+    scalars = {
+        typing.Any: _validate_any,
+        object: _validate_any,
+        str: _validate_str,
+        int: _validate_int,
+        float: _validate_float,
+        bool: _validate_bool,
+        uuid.UUID: _parsing_validator(uuid.UUID, uuid.UUID, "a UUID"),
+        datetime.datetime: _parsing_validator(datetime.datetime, datetime.datetime.fromisoformat, "a datetime"),
+        datetime.date: _parsing_validator(datetime.date, datetime.date.fromisoformat, "a date"),
+        datetime.time: _parsing_validator(datetime.time, datetime.time.fromisoformat, "a time"),
+        decimal.Decimal: _decimal_validator(),
+    }
+    return scalars.get(tp)
+
+
+def _with_location(location: typing.Any, error: ValidationError) -> typing.List:
+    return [((location, *path), message) for path, message in error.errors]
+
+
+def _optional_validator(inner: Validator) -> Validator:
+    def validate(value: typing.Any) -> typing.Any:
+        if value is None:
+            return None
+        return inner(value)
+
+    return validate
+
+
+def _union_validator(options: typing.List[Validator]) -> Validator:
+    def validate(value: typing.Any) -> typing.Any:
+        for option in options:
+            try:
+                return option(value)
+            except ValidationError:
+                continue
+        _fail("doesn't match any allowed type")
+
+    return validate
+
+
+def _sequence_validator(item: Validator, build: typing.Callable[[typing.List], typing.Any]) -> Validator:
+    def validate(value: typing.Any) -> typing.Any:
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            _fail("must be an array")
+        result = []
+        errors = []
+        for index, element in enumerate(value):
+            try:
+                result.append(item(element))
+            except ValidationError as exc:
+                errors += _with_location(index, exc)
+        if errors:
+            raise ValidationError(errors)
+        return build(result)
+
+    return validate
+
+
+def _tuple_validator(items: typing.List[Validator]) -> Validator:
+    def validate(value: typing.Any) -> tuple:
+        if not isinstance(value, (list, tuple)) or len(value) != len(items):
+            _fail(f"must be an array of {len(items)} items")
+        result = []
+        errors = []
+        for index, (item, element) in enumerate(zip(items, value)):
+            try:
+                result.append(item(element))
+            except ValidationError as exc:
+                errors += _with_location(index, exc)
+        if errors:
+            raise ValidationError(errors)
+        return tuple(result)
+
+    return validate
+
+
+def _mapping_validator(key: Validator, item: Validator) -> Validator:
+    def validate(value: typing.Any) -> dict:
+        if not isinstance(value, typing.Mapping):
+            _fail("must be an object")
+        result = {}
+        errors = []
+        for name, element in value.items():
+            try:
+                result[key(name)] = item(element)
+            except ValidationError as exc:
+                errors += _with_location(name, exc)
+        if errors:
+            raise ValidationError(errors)
+        return result
+
+    return validate
+
+
+def _literal_validator(values: typing.Tuple[typing.Any, ...]) -> Validator:
+    allowed = {(type(value), value) for value in values}
+
+    def validate(value: typing.Any) -> typing.Any:
+        try:
+            if (type(value), value) in allowed:
+                return value
+        except TypeError:
+            # Unhashable client value, a list or an object, is never a literal
+            pass
+        _fail(f"must be one of {', '.join(map(repr, values))}")
+
+    return validate
+
+
+def _enum_validator(tp: typing.Any) -> Validator:
+    members = {member.value: member for member in tp}
+
+    def validate(value: typing.Any) -> typing.Any:
+        if isinstance(value, tp):
+            return value
+        try:
+            return members[value]
+        except (KeyError, TypeError):
+            _fail(f"must be one of {', '.join(map(repr, members))}")
+
+    return validate
+
+
+def _model_validator(
+    fields: typing.List[typing.Tuple[str, Validator, bool, typing.Callable[[], typing.Any]]],
+    build: typing.Callable[[typing.Dict[str, typing.Any]], typing.Any],
+) -> Validator:
+    """Validator of an object with known fields: (name, validator, required, default factory)"""
+
+    def validate(value: typing.Any) -> typing.Any:
+        if type(value) is not dict and not isinstance(value, typing.Mapping):
+            _fail("must be an object")
+        result = {}
+        errors = []
+        for name, validator, required, default in fields:
+            element = value.get(name, _MISSING)
+            if element is _MISSING:
+                if required:
+                    errors.append(((name,), "field required"))
+                elif default is not None:
+                    result[name] = default()
+                continue
+            try:
+                result[name] = validator(element)
+            except ValidationError as exc:
+                errors += _with_location(name, exc)
+        if errors:
+            raise ValidationError(errors)
+        return build(result)
+
+    return validate
+
+
+_MISSING = object()
+
+
+def _dataclass_validator(tp: type) -> Validator:
+    import dataclasses
+
+    hints = typing.get_type_hints(tp)
+    fields = []
+    for field in dataclasses.fields(tp):
+        if not field.init:
+            continue
+        required = field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+        # Defaults are applied by the dataclass constructor itself
+        fields.append((field.name, compile_validator(hints[field.name]), required, None))
+    return _model_validator(fields, lambda values: tp(**values))
+
+
+def _typeddict_validator(tp: type) -> Validator:
+    hints = typing.get_type_hints(tp)
+    required_keys = getattr(tp, "__required_keys__", frozenset(hints))
+    fields = [
+        (name, compile_validator(annotation), name in required_keys, None)
+        for name, annotation in hints.items()
+    ]
+    return _model_validator(fields, dict)
+
+
+def _build_validator(tp: typing.Any) -> Validator:
+    import dataclasses
+    import enum
+
+    scalar = _scalar_validator(tp)
+    if scalar is not None:
+        return scalar
+    if tp is None or tp is type(None):
+        return _literal_validator((None,))
+
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if origin is typing.Annotated:
+        return compile_validator(args[0])
+    if origin is typing.Union or (origin is not None and origin.__name__ == "UnionType"):
+        options = [arg for arg in args if arg is not type(None)]
+        inner = compile_validator(options[0]) if len(options) == 1 else _union_validator(
+            [compile_validator(option) for option in options]
+        )
+        return _optional_validator(inner) if len(options) != len(args) else inner
+    if origin is typing.Literal:
+        return _literal_validator(args)
+    if origin in (list, set, frozenset) or tp in (list, set, frozenset):
+        build = origin or tp
+        return _sequence_validator(compile_validator(args[0]) if args else _validate_any, build)
+    if origin is tuple or tp is tuple:
+        if not args or (len(args) == 2 and args[1] is Ellipsis):
+            return _sequence_validator(compile_validator(args[0]) if args else _validate_any, tuple)
+        return _tuple_validator([compile_validator(arg) for arg in args])
+    if origin in (dict, typing.Mapping) or tp is dict:
+        key, item = args if args else (typing.Any, typing.Any)
+        return _mapping_validator(compile_validator(key), compile_validator(item))
+    if isinstance(tp, type) and issubclass(tp, enum.Enum):
+        return _enum_validator(tp)
+    if dataclasses.is_dataclass(tp):
+        return _dataclass_validator(tp)
+    if typing.is_typeddict(tp):
+        return _typeddict_validator(tp)
+    raise TypeError(f"Can't build a validator for {tp!r}")
+
+
+def compile_validator(tp: typing.Any) -> Validator:
+    """
+    Validator/coercer function of a type, built once and cached
+
+    The type is walked once into a tree of closures (dataclasses, TypedDicts,
+    containers, Optional/Union, Literal, Enum and scalars), so validating
+    data doesn't look at type hints again. Strings are coerced to numbers,
+    booleans, UUIDs, dates and Decimals, so the same validator works on
+    query strings and JSON bodies.
+
+    Args:
+        tp (Any): Type to validate against
+
+    Raises:
+        TypeError: Type is not supported
+
+    Returns:
+        Validator: Function returning the validated value or raising `ValidationError`
+    """
+    try:
+        return _VALIDATORS[tp]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable annotations are not cached
+        return _build_validator(tp)
+
+    # Placeholder first, so recursive models resolve to the finished validator
+    resolved: typing.List[Validator] = []
+    _VALIDATORS[tp] = lambda value: resolved[0](value)
+    try:
+        validator = _build_validator(tp)
+    except BaseException:
+        del _VALIDATORS[tp]
+        raise
+    resolved.append(validator)
+    _VALIDATORS[tp] = validator
+    return validator
+
+
+def validate(tp: typing.Any, value: typing.Any) -> typing.Any:
+    return compile_validator(tp)(value)
+
+
+def model_fields(tp: typing.Any) -> typing.Dict[str, typing.Any]:
+    """Field annotations of a dataclass or TypedDict model"""
+    return typing.get_type_hints(tp)
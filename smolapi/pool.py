@@ -0,0 +1,421 @@
+import time
+import typing
+from collections import deque
+from .provider import Provider, Dependency
+
+if typing.TYPE_CHECKING:
+    import asyncio
+
+
+__all__ = ["Pool", "PoolTimeout", "PoolMetrics"]
+
+T = typing.TypeVar("T")
+
+
+class PoolTimeout(TimeoutError):
+    """No resource was released before the acquire timeout"""
+
+
+class PoolMetrics:
+    """Counters of a pool since startup, waits are acquires that found the pool exhausted"""
+
+    __slots__ = (
+        "acquired",
+        "released",
+        "created",
+        "closed",
+        "evicted",
+        "failed_checks",
+        "waits",
+        "timeouts",
+        "wait_time",
+        "max_wait_time",
+    )
+
+    def __init__(self) -> None:
+        self.acquired = 0
+        self.released = 0
+        self.created = 0
+        self.closed = 0
+        self.evicted = 0
+        self.failed_checks = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.waits += 1
+        self.wait_time += seconds
+        if seconds > self.max_wait_time:
+            self.max_wait_time = seconds
+
+    def __dict__(self) -> typing.Dict[str, typing.Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.__dict__()!r})"
+
+
+class Pool(Provider, typing.Generic[T]):
+    """
+    Provider keeping a bounded set of reusable resources, e.g. database connections
+
+    Resources come either from the `create`/`close`/`check` callables or
+    from a subclass overriding `create_resource`, `close_resource` and
+    `check_resource`. `min_size` resources are created on startup. An acquire
+    on an exhausted pool waits for a release, up to `acquire_timeout`.
+    Resources idle longer than `idle_timeout` are closed down to `min_size`.
+    Idle resources are health checked before reuse once they have been idle
+    for `check_interval`, and periodically in the background.
+
+    Handlers get a resource for the duration of the request with the
+    `Resource` marker, it's released once the response is sent:
+
+        db = AsyncpgPool(name="db", max_size=20)
+
+        async def get_user(user_id: int, conn = Resource(db)): ...
+
+    Args:
+        create (Callable, optional): Coroutine function returning a new resource.
+        close (Callable, optional): Coroutine function closing a resource.
+        check (Callable, optional): Coroutine function returning False for broken resources.
+        name (str, optional): Provider name. Defaults to the class name.
+        min_size (int, optional): Resources kept open. Defaults to 1.
+        max_size (int, optional): Resources open at most. Defaults to 10.
+        acquire_timeout (float, optional): Seconds to wait for a resource, None waits forever. Defaults to 10.
+        idle_timeout (float, optional): Seconds before an idle resource is closed. Defaults to 300.
+        check_interval (float, optional): Idle seconds before a resource is checked again. Defaults to 30.
+        depends_on (Sequence, optional): Providers to start first.
+    """
+
+    def __init__(
+        self,
+        create: typing.Optional[typing.Callable[[], typing.Awaitable[T]]] = None,
+        close: typing.Optional[typing.Callable[[T], typing.Awaitable[None]]] = None,
+        check: typing.Optional[typing.Callable[[T], typing.Awaitable[bool]]] = None,
+        *,
+        name: typing.Optional[str] = None,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: typing.Optional[float] = 10.0,
+        idle_timeout: float = 300.0,
+        check_interval: float = 30.0,
+        depends_on: typing.Sequence[Dependency] = (),
+    ) -> None:
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        if name is not None:
+            self.name = name
+        if depends_on:
+            self.depends_on = depends_on
+        self._create = create
+        self._close = close
+        self._check = check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.metrics = PoolMetrics()
+        # (resource, released at, checked at), most recently released last
+        self._idle: typing.Deque[typing.Tuple[T, float, float]] = deque()
+        self._waiters: "typing.Deque[asyncio.Future[typing.Optional[T]]]" = deque()
+        self._size = 0
+        self._closed = True
+        self._maintenance: typing.Optional["asyncio.Task[None]"] = None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @property
+    def in_use(self) -> int:
+        return self._size - len(self._idle)
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """Current pool state and counters, e.g. for a metrics endpoint"""
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            **self.metrics.__dict__(),
+        }
+
+    async def create_resource(self) -> T:
+        if self._create is None:
+            raise NotImplementedError(f"{self!r} needs a create callable or a create_resource override")
+        return await self._create()
+
+    async def close_resource(self, resource: T) -> None:
+        if self._close is not None:
+            await self._close(resource)
+
+    async def check_resource(self, resource: T) -> bool:
+        if self._check is None:
+            return True
+        return await self._check(resource)
+
+    async def startup(self) -> None:
+        import asyncio
+
+        self._closed = False
+        while self._size < self.min_size:
+            self._size += 1
+            try:
+                resource = await self._new()
+            except BaseException:
+                self._size -= 1
+                raise
+            now = time.monotonic()
+            self._idle.append((resource, now, now))
+        self._maintenance = asyncio.ensure_future(self._maintain())
+
+    async def shutdown(self) -> None:
+        """Close idle resources, resources still in use are closed when released"""
+        import asyncio
+
+        self._closed = True
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            await asyncio.gather(self._maintenance, return_exceptions=True)
+            self._maintenance = None
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(RuntimeError(f"{self!r} is shut down"))
+        while self._idle:
+            resource, _, _ = self._idle.popleft()
+            await self._discard(resource)
+
+    async def acquire(self, timeout: typing.Optional[float] = None) -> T:
+        """
+        Take a resource out of the pool, it must be given back with `release`
+
+        Args:
+            timeout (float, optional): Seconds to wait when exhausted. Defaults to `acquire_timeout`.
+
+        Raises:
+            PoolTimeout: No resource became available in time
+            RuntimeError: Pool is not started
+
+        Returns:
+            T: Resource
+        """
+        import asyncio
+
+        if self._closed:
+            raise RuntimeError(f"{self!r} is not started")
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = None
+
+        while True:
+            resource = await self._take_idle()
+            if resource is not _NOTHING:
+                break
+            if self._size < self.max_size:
+                self._size += 1
+                try:
+                    resource = await self._new()
+                except BaseException:
+                    self._size -= 1
+                    self._wake()
+                    raise
+                break
+
+            # Exhausted, wait for a release to hand a resource over
+            if waited is None:
+                waited = time.monotonic()
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                done, _ = await asyncio.wait((waiter,), timeout=remaining)
+            except BaseException:
+                self._abandon(waiter)
+                raise
+            if not done:
+                self._abandon(waiter)
+                self.metrics.timeouts += 1
+                self.metrics.record_wait(time.monotonic() - waited)
+                raise PoolTimeout(f"No resource available in {self!r} after {timeout}s")
+            resource = waiter.result()
+            if resource is not None:
+                break
+            # A slot was freed without a resource, try again
+
+        if waited is not None:
+            self.metrics.record_wait(time.monotonic() - waited)
+        self.metrics.acquired += 1
+        return resource
+
+    async def release(self, resource: T, discard: bool = False) -> None:
+        """
+        Give a resource back to the pool
+
+        Args:
+            resource (T): Resource returned by `acquire`
+            discard (bool, optional): Close the resource instead, e.g. after an error. Defaults to False.
+        """
+        self.metrics.released += 1
+        if discard or self._closed:
+            await self._discard(resource)
+            self._wake()
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(resource)
+                return
+        now = time.monotonic()
+        self._idle.append((resource, now, now))
+
+    def connection(self) -> "_Acquired[T]":
+        """
+        Resource held for the duration of an `async with` block
+
+            async with pool.connection() as conn:
+                ...
+        """
+        return _Acquired(self)
+
+    async def _new(self) -> T:
+        resource = await self.create_resource()
+        self.metrics.created += 1
+        return resource
+
+    async def _discard(self, resource: T) -> None:
+        self._size -= 1
+        self.metrics.closed += 1
+        try:
+            await self.close_resource(resource)
+        except Exception:
+            # Broken resources often fail to close, the slot is freed anyway
+            pass
+
+    async def _take_idle(self) -> typing.Any:
+        while self._idle:
+            resource, released, checked = self._idle.pop()
+            if time.monotonic() - checked >= self.check_interval and not await self._healthy(resource):
+                continue
+            return resource
+        return _NOTHING
+
+    async def _healthy(self, resource: T) -> bool:
+        try:
+            healthy = await self.check_resource(resource)
+        except Exception:
+            healthy = False
+        if not healthy:
+            self.metrics.failed_checks += 1
+            await self._discard(resource)
+        return healthy
+
+    def _wake(self) -> None:
+        # A slot was freed, let one waiter create a resource
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _abandon(self, waiter: "asyncio.Future[typing.Optional[T]]") -> None:
+        if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+            resource = waiter.result()
+            # Handed over right as the wait ended, pass it on
+            if resource is None:
+                self._wake()
+            else:
+                now = time.monotonic()
+                self._idle.append((resource, now, now))
+                self._hand_over()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _hand_over(self) -> None:
+        while self._idle and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(self._idle.pop()[0])
+
+    async def _maintain(self) -> None:
+        import asyncio
+
+        interval = max(min(self.idle_timeout, self.check_interval) / 2, 0.01)
+        while True:
+            await asyncio.sleep(interval)
+            await self.evict()
+
+    async def evict(self) -> None:
+        """Close resources idle for too long, check the others and refill to `min_size`"""
+        now = time.monotonic()
+        kept: typing.Deque[typing.Tuple[T, float, float]] = deque()
+        expired: typing.List[T] = []
+        stale: typing.List[typing.Tuple[T, float]] = []
+        # Oldest first, so the most recently used resources are the ones kept
+        while self._idle:
+            resource, released, checked = self._idle.popleft()
+            if now - released >= self.idle_timeout and self._size - len(expired) > self.min_size:
+                expired.append(resource)
+            elif now - checked >= self.check_interval:
+                stale.append((resource, released))
+            else:
+                kept.append((resource, released, checked))
+        self._idle = kept
+
+        for resource in expired:
+            self.metrics.evicted += 1
+            await self._discard(resource)
+        for resource, released in stale:
+            if await self._healthy(resource):
+                self._idle.appendleft((resource, released, time.monotonic()))
+                self._hand_over()
+
+        while not self._closed and self._size < self.min_size:
+            self._size += 1
+            try:
+                resource = await self._new()
+            except Exception:
+                self._size -= 1
+                break
+            now = time.monotonic()
+            self._idle.append((resource, now, now))
+            self._hand_over()
+        self._wake_free_slots()
+
+    def _wake_free_slots(self) -> None:
+        for _ in range(self.max_size - self._size):
+            if not self._waiters:
+                break
+            self._wake()
+
+
+class _Acquired(typing.Generic[T]):
+    __slots__ = ("_pool", "_resource")
+
+    def __init__(self, pool: Pool[T]) -> None:
+        self._pool = pool
+
+    async def __aenter__(self) -> T:
+        self._resource = await self._pool.acquire()
+        return self._resource
+
+    async def __aexit__(self, exc_type: typing.Any, exc: typing.Any, traceback: typing.Any) -> None:
+        await self._pool.release(self._resource)
+
+
+_NOTHING = object()
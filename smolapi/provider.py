@@ -1,7 +1,230 @@
-from typing import Self
-from smolapi.routing import Router, Route
+import time
+import typing
 from abc import ABCMeta
+from smolapi.setting import settings
+
+if typing.TYPE_CHECKING:
+    from .startup import StartupReport
+
+
+__all__ = ["Provider", "ProviderGroup"]
+
+Dependency = typing.Union[str, type, "Provider"]
+
 
 class Provider(metaclass=ABCMeta):
-    def __new__(cls: type[Self]) -> Self:
-        return object.__new__(cls)
\ No newline at end of file
+    """
+    Shared resource started before the application serves requests and
+    stopped after the last one, e.g. database pools, caches or models
+
+    Providers list the providers they need in `depends_on`, by name, class or
+    instance. Independent providers start concurrently, a provider starts as
+    soon as all of its dependencies are up, and shuts down only after every
+    provider depending on it is down.
+
+    Attributes:
+        name (str): Name used in dependencies and reports. Defaults to the class name.
+        depends_on (Sequence[str | type | Provider]): Providers to start first.
+        startup_timeout (float): Seconds allowed for `startup`. Defaults to
+            settings.PROVIDER_STARTUP_TIMEOUT, no limit when unset.
+        shutdown_timeout (float): Seconds allowed for `shutdown`. Defaults to
+            settings.PROVIDER_SHUTDOWN_TIMEOUT or 10.
+    """
+
+    name: typing.Optional[str] = None
+    depends_on: typing.Sequence[Dependency] = ()
+    startup_timeout: typing.Optional[float] = None
+    shutdown_timeout: typing.Optional[float] = None
+
+    def __new__(cls, *args: typing.Any, **kwargs: typing.Any) -> "Provider":
+        return object.__new__(cls)
+
+    @property
+    def provider_name(self) -> str:
+        return self.name or self.__class__.__name__
+
+    async def startup(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.provider_name!r}>"
+
+
+def _startup_timeout(provider: Provider) -> typing.Optional[float]:
+    if provider.startup_timeout is not None:
+        return provider.startup_timeout
+    return settings.PROVIDER_STARTUP_TIMEOUT
+
+
+def _shutdown_timeout(provider: Provider) -> typing.Optional[float]:
+    if provider.shutdown_timeout is not None:
+        return provider.shutdown_timeout
+    timeout = settings.PROVIDER_SHUTDOWN_TIMEOUT
+    return 10.0 if timeout is None else timeout
+
+
+class ProviderGroup:
+    """
+    Providers of an application with their dependency graph, resolved once
+
+    Args:
+        providers (Iterable[Provider], optional): Providers to manage. Defaults to None.
+
+    Raises:
+        ValueError: Duplicate name, unknown dependency or dependency cycle
+    """
+
+    def __init__(self, providers: typing.Optional[typing.Iterable[Provider]] = None) -> None:
+        self.__providers: typing.List[Provider] = []
+        self.__dependencies: typing.Dict[Provider, typing.List[Provider]] = {}
+        self.__started: typing.List[Provider] = []
+        for provider in providers or []:
+            self.add(provider)
+
+    def __iter__(self) -> typing.Iterator[Provider]:
+        return iter(self.__providers)
+
+    def __len__(self) -> int:
+        return len(self.__providers)
+
+    def get(self, name: str) -> Provider:
+        for provider in self.__providers:
+            if provider.provider_name == name:
+                return provider
+        raise LookupError(f"No provider named {name!r}")
+
+    def add(self, provider: Provider) -> None:
+        if not isinstance(provider, Provider):
+            raise TypeError(f"{provider!r} is not a Provider")
+        if any(other.provider_name == provider.provider_name for other in self.__providers):
+            raise ValueError(f"Provider {provider.provider_name!r} is already registered")
+        self.__providers.append(provider)
+        self.__dependencies.clear()
+
+    def _resolve(self, dependency: Dependency) -> Provider:
+        for provider in self.__providers:
+            if (
+                provider is dependency
+                or provider.provider_name == dependency
+                or (isinstance(dependency, type) and isinstance(provider, dependency))
+            ):
+                return provider
+        raise ValueError(f"Unknown provider dependency {dependency!r}")
+
+    def resolve(self) -> typing.Dict[Provider, typing.List[Provider]]:
+        """
+        Dependencies of each provider, checked for cycles
+
+        Returns:
+            Dict[Provider, List[Provider]]: Providers in dependency order with their dependencies
+        """
+        if self.__dependencies or not self.__providers:
+            return self.__dependencies
+        dependencies = {
+            provider: [self._resolve(dependency) for dependency in provider.depends_on]
+            for provider in self.__providers
+        }
+
+        ordered: typing.Dict[Provider, typing.List[Provider]] = {}
+        visiting: typing.Set[Provider] = set()
+
+        def visit(provider: Provider, path: typing.List[Provider]) -> None:
+            if provider in ordered:
+                return
+            if provider in visiting:
+                cycle = " -> ".join(p.provider_name for p in path + [provider])
+                raise ValueError(f"Provider dependency cycle: {cycle}")
+            visiting.add(provider)
+            for dependency in dependencies[provider]:
+                visit(dependency, path + [provider])
+            visiting.discard(provider)
+            ordered[provider] = dependencies[provider]
+
+        for provider in self.__providers:
+            visit(provider, [])
+        self.__dependencies = ordered
+        return ordered
+
+    async def startup(self, report: typing.Optional["StartupReport"] = None) -> None:
+        """
+        Start every provider, each one as soon as its dependencies are started
+
+        When a provider fails, the ones still starting are cancelled and the
+        ones already started are shut down before the error is raised.
+
+        Args:
+            report (StartupReport, optional): Report receiving the startup time of each provider.
+
+        Raises:
+            TimeoutError: A provider exceeded its startup timeout
+        """
+        import asyncio
+
+        graph = self.resolve()
+        tasks: typing.Dict[Provider, "asyncio.Task[None]"] = {}
+
+        async def start(provider: Provider) -> None:
+            for dependency in graph[provider]:
+                await tasks[dependency]
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(provider.startup(), _startup_timeout(provider))
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"Provider {provider.provider_name!r} didn't start in {_startup_timeout(provider)}s"
+                )
+            self.__started.append(provider)
+            if report is not None:
+                report.providers.append((provider.provider_name, time.perf_counter() - started))
+
+        for provider in graph:
+            tasks[provider] = asyncio.ensure_future(start(provider))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            try:
+                await self.shutdown()
+            except RuntimeError:
+                # The startup error is the one worth reporting
+                pass
+            raise
+
+    async def shutdown(self) -> None:
+        """
+        Shut down started providers in reverse dependency order, every
+        provider gets its own timeout and failures don't stop the others
+
+        Raises:
+            RuntimeError: One or more providers failed to shut down
+        """
+        import asyncio
+
+        graph = self.resolve()
+        started = set(self.__started)
+        tasks: typing.Dict[Provider, "asyncio.Task[None]"] = {}
+        errors: typing.List[str] = []
+
+        async def stop(provider: Provider) -> None:
+            dependents = [tasks[other] for other in graph if provider in graph[other] and other in tasks]
+            await asyncio.gather(*dependents, return_exceptions=True)
+            timeout = _shutdown_timeout(provider)
+            try:
+                await asyncio.wait_for(provider.shutdown(), timeout)
+            except asyncio.TimeoutError:
+                errors.append(f"{provider.provider_name}: didn't stop in {timeout}s")
+            except Exception as exc:
+                errors.append(f"{provider.provider_name}: {exc!r}")
+
+        for provider in graph:
+            if provider in started:
+                tasks[provider] = asyncio.ensure_future(stop(provider))
+        await asyncio.gather(*tasks.values())
+        self.__started = [provider for provider in self.__started if provider not in started]
+        if errors:
+            raise RuntimeError(f"Providers failed to shut down: {'; '.join(errors)}")
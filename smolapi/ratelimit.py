@@ -0,0 +1,234 @@
+import abc
+import math
+import time
+import typing
+from collections import OrderedDict
+from .request import Request
+from .response import Response
+from .exceptions import HttpException
+from .middleware import BaseMiddleware, CallNext
+from smolapi.setting import settings
+
+
+__all__ = ["RateLimit", "RateLimitBackend", "MemoryRateLimitBackend"]
+
+_DEFAULT_SWEEP_INTERVAL = 60.0
+# Idle buckets looked at per request while a sweep is running
+_SWEEP_BATCH = 4
+# Bucket state, a two item list updated in place: tokens left and monotonic time of the update
+_TOKENS = 0
+_UPDATED = 1
+# Bucket shared by requests without key, not a valid address or header value
+_UNKEYED = "\x00unkeyed"
+
+
+class RateLimitBackend(abc.ABC):
+    """
+    Storage of token buckets, implement it to share limits between processes
+
+    A backend holds the buckets of one `RateLimit`, keys are the client
+    keys as they are, a shared store should prefix them itself.
+    """
+
+    @abc.abstractmethod
+    async def acquire(self, key: str, rate: float, capacity: float, cost: float = 1) -> float:
+        """
+        Take `cost` tokens from the bucket of key, refilled at `rate` per second up to `capacity`
+
+        Returns:
+            float: 0 when the tokens were taken, otherwise seconds until enough are available
+        """
+
+    async def reset(self, key: typing.Optional[str] = None) -> None:
+        raise NotImplementedError()
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    In process token buckets, one small list per active key
+
+    Buckets are refilled lazily from the time elapsed since their last use,
+    nothing runs between requests. Buckets are kept least recently used
+    first. Every `sweep_interval` seconds a sweep drops idle keys from the
+    oldest end, up to the first bucket not yet full again, a full bucket is
+    the same as no bucket. The sweep is spread over the following requests,
+    each one looks at a few buckets only, so the store only holds clients
+    seen recently and no request pays for all of them.
+
+    Args:
+        sweep_interval (float, optional): Seconds between sweeps of idle keys.
+            Defaults to settings.RATE_LIMIT_SWEEP_INTERVAL or 60.
+    """
+
+    def __init__(self, sweep_interval: typing.Optional[float] = None) -> None:
+        self.sweep_interval = sweep_interval or settings.RATE_LIMIT_SWEEP_INTERVAL or _DEFAULT_SWEEP_INTERVAL
+        self._buckets: "OrderedDict[str, typing.List[float]]" = OrderedDict()
+        self._rate = 0.0
+        self._capacity = 0.0
+        self._next_sweep = time.monotonic() + self.sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1) -> float:
+        """Synchronous `acquire`, what it awaits"""
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._rate, self._capacity = rate, capacity
+            if self._evict(now, _SWEEP_BATCH):
+                self._next_sweep = now + self.sweep_interval
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if cost > capacity:
+                return math.inf
+            self._buckets[key] = [capacity - cost, now]
+            return 0.0
+        self._buckets.move_to_end(key)
+        tokens = bucket[_TOKENS] + (now - bucket[_UPDATED]) * rate
+        if tokens > capacity:
+            tokens = capacity
+        bucket[_UPDATED] = now
+        if tokens >= cost:
+            bucket[_TOKENS] = tokens - cost
+            return 0.0
+        bucket[_TOKENS] = tokens
+        return (cost - tokens) / rate if cost <= capacity else math.inf
+
+    async def acquire(self, key: str, rate: float, capacity: float, cost: float = 1) -> float:
+        return self.take(key, rate, capacity, cost)
+
+    def _evict(self, now: float, limit: int) -> bool:
+        """
+        Drop up to `limit` of the least recently used buckets refilled to capacity
+
+        Returns:
+            bool: True when the sweep is over, the oldest bucket left isn't full
+        """
+        buckets = self._buckets
+        rate, capacity = self._rate, self._capacity
+        for _ in range(limit):
+            if not buckets:
+                return True
+            key = next(iter(buckets))
+            tokens, updated = buckets[key]
+            if tokens + (now - updated) * rate < capacity:
+                return True
+            del buckets[key]
+        return False
+
+    def sweep(self, now: typing.Optional[float] = None) -> int:
+        """
+        Drop every bucket refilled to capacity at once, e.g. from a background task
+
+        Returns:
+            int: Keys dropped
+        """
+        if now is None:
+            now = time.monotonic()
+        self._next_sweep = now + self.sweep_interval
+        rate, capacity = self._rate, self._capacity
+        if not rate:
+            return 0
+        idle = [
+            key
+            for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * rate >= capacity
+        ]
+        for key in idle:
+            del self._buckets[key]
+        return len(idle)
+
+    async def reset(self, key: typing.Optional[str] = None) -> None:
+        if key is None:
+            self._buckets.clear()
+        else:
+            self._buckets.pop(key, None)
+
+
+def _client_key(request: Request) -> typing.Optional[str]:
+    client = request.scope.get("client")
+    return client[0] if client else None
+
+
+def _identity_key(request: Request) -> typing.Optional[str]:
+    identity = request.scope.get("smolapi.identity")
+    if identity is None:
+        # Unauthenticated requests are limited per address
+        return _client_key(request)
+    return identity.subject
+
+
+def _header_key(name: str) -> typing.Callable[[Request], typing.Optional[str]]:
+    name = name.lower()
+
+    def key(request: Request) -> typing.Optional[str]:
+        value = request.headers.get(name)
+        if value is None:
+            # Leaving the header out must not skip the limit
+            return _client_key(request)
+        return value
+
+    return key
+
+
+class RateLimit(BaseMiddleware):
+    """
+    Request middleware limiting requests with a token bucket per client
+
+    A client may send `burst` requests at once, then `limit` per `period`
+    seconds. Refused requests get a 429 with `Retry-After`, the handler
+    isn't called. Buckets belong to the instance: attach one to a route to
+    limit that route, to a router to share the limit between its routes.
+
+    `key` selects the client: "client" for the address in the scope,
+    "identity" for the subject authenticated by a `Security` placed before
+    it (the address when anonymous), "header:<name>" for a header value
+    (the address when missing), or a callable taking the request. Requests
+    without any key, e.g. no client in the scope, share one bucket.
+
+    Args:
+        limit (int): Requests allowed per period
+        period (float, optional): Seconds. Defaults to 1.
+        burst (int, optional): Bucket capacity. Defaults to limit.
+        key (str | Callable[[Request], Optional[str]], optional): Defaults to "client".
+        backend (RateLimitBackend, optional): Defaults to a new MemoryRateLimitBackend.
+
+    Raises:
+        ValueError: limit, period or burst isn't positive, or key is unknown
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float = 1.0,
+        burst: typing.Optional[int] = None,
+        key: typing.Union[str, typing.Callable[[Request], typing.Optional[str]]] = "client",
+        backend: typing.Optional[RateLimitBackend] = None,
+    ) -> None:
+        if limit <= 0 or period <= 0 or (burst is not None and burst <= 0):
+            raise ValueError("limit, period and burst must be positive")
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+        self.capacity = float(burst if burst is not None else limit)
+        self.backend = backend if backend is not None else MemoryRateLimitBackend()
+        if callable(key):
+            self._key = key
+        elif key == "client":
+            self._key = _client_key
+        elif key == "identity":
+            self._key = _identity_key
+        elif key.startswith("header:"):
+            self._key = _header_key(key[len("header:") :])
+        else:
+            raise ValueError(f"Unknown rate limit key: {key!r}")
+
+    async def dispatch(self, request: Request, call_next: CallNext) -> Response:
+        key = self._key(request)
+        if key is None:
+            key = _UNKEYED
+        wait = await self.backend.acquire(key, self.rate, self.capacity)
+        if wait:
+            retry_after = str(math.ceil(wait)) if wait != math.inf else str(math.ceil(self.period))
+            raise HttpException(429, headers={"retry-after": retry_after})
+        return await call_next(request)
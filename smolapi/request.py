@@ -1,115 +1,374 @@
 from collections.abc import MutableMapping, Mapping
-import json
-import re
+import time
 import typing
 from .types import Scope, Receive, Send
-from urllib.parse import unquote
-from functools import reduce
+from urllib.parse import unquote_to_bytes
+from .exceptions import HttpException
+from .utils import parse_header_options
+from . import serializer
+from smolapi.setting import settings
 # from core.types import Headers as HeadersType
-from http import cookies as http_cookies
-# It's stupid but it work, mostly
-REGEX_QUERY_STRING=r"^(.*?)=(.*)$"
 COOKIE_KEYS = b"cookie"
 
 HeadersType = typing.List[typing.Tuple[bytes, bytes]]
 
+if typing.TYPE_CHECKING:
+    from .form import FormData
+
+_DEFAULT_MAX_BODY_SIZE = 16 * 1024 * 1024
+# Larger bodies grow their buffer as chunks arrive, content-length alone can't make us allocate more
+_MAX_PREALLOCATION = 1024 * 1024
+_TRUE_VALUES = frozenset(("", "1", "true", "yes", "on"))
+_FALSE_VALUES = frozenset(("0", "false", "no", "off"))
+
+
+def _unquote_plus(raw: bytes) -> str:
+    if b"+" in raw:
+        raw = raw.replace(b"+", b" ")
+    if b"%" in raw:
+        raw = unquote_to_bytes(raw)
+    return raw.decode("utf-8", "replace")
+
+
+def _parse_query_string(
+    query_string: bytes,
+    result: typing.Optional[typing.Dict[str, typing.List[str]]] = None,
+) -> typing.Dict[str, typing.List[str]]:
+    """
+    Parse urlencoded bytes, key and value of each pair are unquoted on their own
+    so encoded "&" and "=" are kept inside values
+
+    Args:
+        query_string (bytes): Raw query string, without leading "?"
+        result (dict, optional): Mapping to add the pairs to. Defaults to a new dict.
+
+    Returns:
+        Dict[str, List[str]]: Values of each key, in received order
+    """
+    if result is None:
+        result = {}
+    for pair in query_string.split(b"&"):
+        if not pair:
+            continue
+        key, _, value = pair.partition(b"=")
+        key = _unquote_plus(key)
+        value = _unquote_plus(value) if value else ""
+        values = result.get(key)
+        if values is None:
+            result[key] = [value]
+        else:
+            values.append(value)
+    return result
+
+
 class Query(Mapping[str, typing.Any]):
-    def __init__(self, scope: Scope) -> None:
-        self.query_string = scope.get("query_string", b"")
-        query_arr = str(self).split('&')
-        query_dict = {}
-        for v in query_arr:
-            matches = re.search(REGEX_QUERY_STRING, v, re.IGNORECASE) 
-            assert matches, f"Incorrect query string {v}"
-            matches = matches.groups()
-            key = matches[0]
-            value = matches[1]
-            if query_dict.get(key, None):
-                query_dict.get(key).append(value)
-            else:
-                query_dict[key] = [value]
-        self._query_dict = query_dict
-    
+    """
+    Query string parameters, parsed from raw scope bytes on first read
+
+    A key without "=" (flag) or with an empty value maps to "".
+    """
+
+    __slots__ = ("query_string", "_query_dict")
+
+    def __init__(
+        self,
+        scope: typing.Optional[Scope] = None,
+        query_string: typing.Optional[bytes] = None,
+    ) -> None:
+        self.query_string: bytes = (
+            query_string if query_string is not None else scope.get("query_string", b"")
+        )
+        self._query_dict: typing.Optional[typing.Dict[str, typing.List[str]]] = None
+
+    def _parsed(self) -> typing.Dict[str, typing.List[str]]:
+        if self._query_dict is None:
+            self._query_dict = _parse_query_string(self.query_string)
+        return self._query_dict
+
     def __str__(self) -> str:
-        return unquote(self.query_string.decode("utf-8"))
-    
-    def __getitem__(self, __key: str) -> typing.Any:
-        data = self._query_dict.get(__key)
-        return data if len(data) > 1 else data[0]
-    
+        return self.query_string.decode("latin-1")
+
+    def __getitem__(self, __key: str) -> str:
+        return self._parsed()[__key][0]
+
+    def get(self, __key: str, default: typing.Any = None) -> typing.Any:
+        values = self._parsed().get(__key)
+        return default if values is None else values[0]
+
+    def getlist(self, __key: str) -> typing.List[str]:
+        return list(self._parsed().get(__key, ()))
+
+    def get_int(self, __key: str, default: typing.Optional[int] = None) -> typing.Optional[int]:
+        return self._get_typed(__key, default, int, "an integer")
+
+    def get_float(
+        self, __key: str, default: typing.Optional[float] = None
+    ) -> typing.Optional[float]:
+        return self._get_typed(__key, default, float, "a number")
+
+    def get_bool(
+        self, __key: str, default: typing.Optional[bool] = None
+    ) -> typing.Optional[bool]:
+        """
+        Boolean parameter, a bare flag such as `?verbose` reads as True
+
+        Raises:
+            HttpException: 400 when value is not a known boolean literal
+        """
+        return self._get_typed(__key, default, _to_bool, "a boolean")
+
+    def _get_typed(
+        self,
+        __key: str,
+        default: typing.Any,
+        convert: typing.Callable[[str], typing.Any],
+        expected: str,
+    ) -> typing.Any:
+        values = self._parsed().get(__key)
+        if values is None:
+            return default
+        try:
+            return convert(values[0])
+        except ValueError:
+            raise HttpException(400, f"Query parameter {__key!r} must be {expected}")
+
+    def __contains__(self, __key: object) -> bool:
+        return __key in self._parsed()
+
     def __dict__(self) -> dict:
-        return self._query_dict
-    
+        return self._parsed()
+
     def __iter__(self) -> typing.Iterator:
-        return iter(self._query_dict)
-    
+        return iter(self._parsed())
+
     def __len__(self) -> int:
-        return len(self._query_dict)
-    
+        return len(self._parsed())
+
+
+def _to_bool(value: str) -> bool:
+    value = value.lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise ValueError(value)
+
 
 class Headers(Mapping[str, str]):
-    def __init__(self, scope: Scope) -> None:
-        headers: HeadersType = scope.get("headers", [])
-        headers_dict: dict[str, str] = reduce(lambda prev, item: {**prev, item[0].decode("latin-1"): item[1].decode("latin-1")}, headers, {})
-        self._headers = headers
-        self._headers_dict = headers_dict
-    
+    """
+    Read only view over the raw ASGI header list
+
+    The list from scope is wrapped as is, names are matched case-insensitively
+    through an index built on first lookup and values are decoded on access.
+    """
+
+    __slots__ = ("_headers", "_index")
+
+    def __init__(
+        self,
+        scope: typing.Optional[Scope] = None,
+        raw: typing.Optional[HeadersType] = None,
+    ) -> None:
+        self._headers: HeadersType = raw if raw is not None else scope.get("headers", [])
+        self._index: typing.Optional[typing.Dict[bytes, typing.List[bytes]]] = None
+
+    @property
+    def raw(self) -> HeadersType:
+        return self._headers
+
+    def _lookup(self, __key: str) -> typing.Optional[typing.List[bytes]]:
+        index = self._index
+        if index is None:
+            index = {}
+            for name, value in self._headers:
+                name = name.lower()
+                values = index.get(name)
+                if values is None:
+                    index[name] = [value]
+                else:
+                    values.append(value)
+            self._index = index
+        return index.get(__key.lower().encode("latin-1"))
+
     def __getitem__(self, __key: str) -> str:
-        return self._headers_dict.get(__key, None)
-    
+        values = self._lookup(__key)
+        if values is None:
+            raise KeyError(__key)
+        return values[0].decode("latin-1")
+
+    def get(self, __key: str, default: typing.Any = None) -> typing.Any:
+        values = self._lookup(__key)
+        return default if values is None else values[0].decode("latin-1")
+
+    def getlist(self, __key: str) -> typing.List[str]:
+        """
+        All values of a repeated header, in the order they were received
+
+        Args:
+            __key (str): Header name, case-insensitive
+
+        Returns:
+            List[str]: Header values, empty if the header is missing
+        """
+        values = self._lookup(__key)
+        return [value.decode("latin-1") for value in values] if values else []
+
+    def __contains__(self, __key: object) -> bool:
+        return isinstance(__key, str) and self._lookup(__key) is not None
+
     def __dict__(self) -> dict[str, str]:
-        return self._headers_dict
-    
+        return {key: self[key] for key in self}
+
     def __iter__(self) -> typing.Iterator:
-        return iter(self._headers_dict)
-    
+        self._lookup("")
+        return (name.decode("latin-1") for name in self._index)
+
     def __len__(self) -> int:
-        return len(self._headers_dict)
-    
-    
+        self._lookup("")
+        return len(self._index)
 
-class Cookie(Mapping[str,str]):
-    def __init__(self, scope: Scope) -> None:
-        headers: HeadersType = scope.get("headers", [])
-        cookie: typing.Optional[typing.Tuple[bytes, bytes]] = next(filter(lambda item: item[0].lower() == COOKIE_KEYS, headers), None)
-        
-        if not cookie:
-            self._cookie_dict = {}
-            return
-        self._cookie = http_cookies._unquote(cookie[1].decode("utf-8"))
-        cookie_vals: typing.List[str] = self._cookie.split(";")
-        cookie_dict: dict[str, str] = {}
-        for v in cookie_vals:
-            matches = re.search(REGEX_QUERY_STRING, v, re.IGNORECASE)
-            assert matches, f"Incorrect format for cookie string {v}"
-            matches = matches.groups()
-            cookie_dict[matches[0]] = matches[1]
-        
-        self._cookie_dict = cookie_dict
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._headers!r})"
+
+
+
+def _unquote_cookie(value: bytes) -> bytes:
+    """Value of a quoted cookie, without quotes and with backslash and octal escapes resolved"""
+    value = value[1:-1]
+    if b"\\" not in value:
+        return value
+    result = bytearray()
+    index = 0
+    length = len(value)
+    while index < length:
+        char = value[index]
+        if char != 0x5C or index + 1 == length:  # backslash
+            result.append(char)
+            index += 1
+            continue
+        octal = value[index + 1 : index + 4]
+        if len(octal) == 3 and all(0x30 <= digit <= 0x37 for digit in octal):
+            result.append(int(octal, 8) & 0xFF)
+            index += 4
+        else:
+            result.append(value[index + 1])
+            index += 2
+    return bytes(result)
+
+
+class Cookie(Mapping[str, str]):
+    """
+    Cookies of the request, read from every `cookie` header
+
+    Headers are split into raw name/value pairs on first access, values are
+    unquoted and decoded only when read. The first value of a repeated
+    name wins, like browsers sending the most specific cookie first.
+    """
+
+    __slots__ = ("_headers", "_raw", "_decoded")
+
+    def __init__(
+        self,
+        scope: typing.Optional[Scope] = None,
+        raw: typing.Optional[HeadersType] = None,
+    ) -> None:
+        self._headers: HeadersType = raw if raw is not None else scope.get("headers", [])
+        self._raw: typing.Optional[typing.Dict[str, bytes]] = None
+        self._decoded: typing.Dict[str, str] = {}
+
+    def _pairs(self) -> typing.Dict[str, bytes]:
+        pairs = self._raw
+        if pairs is None:
+            pairs = {}
+            for name, value in self._headers:
+                if name.lower() != COOKIE_KEYS:
+                    continue
+                for chunk in value.split(b";"):
+                    key, separator, item = chunk.partition(b"=")
+                    if not separator:
+                        continue
+                    key = key.strip().decode("latin-1")
+                    if key and key not in pairs:
+                        pairs[key] = item.strip()
+            self._raw = pairs
+        return pairs
 
     def __getitem__(self, __key: str) -> str:
-        return self._cookie_dict.get(__key, None)
-    
+        value = self._decoded.get(__key)
+        if value is not None:
+            return value
+        raw = self._pairs()[__key]
+        if len(raw) > 1 and raw[0] == 0x22 and raw[-1] == 0x22:  # double quotes
+            raw = _unquote_cookie(raw)
+        try:
+            value = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            value = raw.decode("latin-1")
+        self._decoded[__key] = value
+        return value
+
+    def __contains__(self, __key: object) -> bool:
+        return __key in self._pairs()
+
     def __dict__(self) -> dict[str, str]:
-        return self._cookie_dict
-    
+        return {key: self[key] for key in self}
+
     def __iter__(self) -> typing.Iterator:
-        return iter(self._cookie_dict)
-    
+        return iter(self._pairs())
+
     def __len__(self) -> int:
-        return len(self._cookie_dict)
-    
+        return len(self._pairs())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.__dict__()!r})"
+
+
 class URI(Mapping[str, str]):
     def __init__(self, scope: Scope) -> None:
         self._scope = scope
     
+_NOT_READ: typing.Any = object()
+
+
 class Request(Mapping[str, typing.Any]):
+    """
+    HTTP request of an ASGI connection
+
+    The scope is referenced, not copied, and the header, query and cookie
+    views are created on first access into their own slots.
+    """
+
+    __slots__ = (
+        "scope",
+        "_receive",
+        "_send",
+        "_is_stream_finished",
+        "_disconnected",
+        "_headers",
+        "_query",
+        "_cookie",
+        "_body",
+        "_body_bytes",
+        "_json",
+        "_body_time",
+        "_cleanups",
+    )
+
     def __init__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        self.scope = dict(scope)
+        self.scope = scope
         self._receive = receive
         self._send = send
         self._is_stream_finished = False
         self._disconnected = False
+        self._headers: typing.Optional[Headers] = None
+        self._query: typing.Optional[Query] = None
+        self._cookie: typing.Optional[Cookie] = None
+        self._body: typing.Any = _NOT_READ
+        self._body_bytes: typing.Optional[bytearray] = None
+        self._json: typing.Any = _NOT_READ
+        # Seconds spent reading and parsing the body in `body`, reported by metrics
+        self._body_time = 0.0
+        self._cleanups: typing.Optional[typing.List[typing.Callable[[], typing.Awaitable[None]]]] = None
     
     def __getitem__(self, __key: str) -> typing.Any:
         return self.scope.get(__key, None)
@@ -128,24 +387,49 @@ class Request(Mapping[str, typing.Any]):
     def scheme(self) -> str:
         return self.scope["scheme"]
     
+    @property
+    def content_length(self) -> typing.Optional[int]:
+        value = self.headers.get("content-length")
+        if value is None:
+            return None
+        try:
+            length = int(value)
+        except ValueError:
+            raise HttpException(400, "Invalid content-length header")
+        if length < 0:
+            raise HttpException(400, "Invalid content-length header")
+        return length
+
+    @property
+    def is_disconnected(self) -> bool:
+        return self._disconnected
+
     @property
     def headers(self) -> Headers:
-        if not hasattr(self, "_header"):
-            setattr(self, "_header", Headers(scope=self.scope))
-        return self._header
+        headers = self._headers
+        if headers is None:
+            headers = self._headers = Headers(scope=self.scope)
+        return headers
     
     @property
     def query(self) -> Query:
-        if not hasattr(self, "_query"):
-            setattr(self, "_query", Query(scope=self.scope))
-        return self._query
+        query = self._query
+        if query is None:
+            query = self._query = Query(scope=self.scope)
+        return query
     
     @property
     def cookie(self) -> Cookie:
-        if not hasattr(self, "_cookie"):
-            setattr(self, "_cookie", Cookie(scope=self.scope))
-        return self._cookie
+        cookie = self._cookie
+        if cookie is None:
+            cookie = self._cookie = Cookie(scope=self.scope)
+        return cookie
     
+    @property
+    def identity(self) -> typing.Any:
+        """`smolapi.security.Identity` set by a `Security` middleware, None without one"""
+        return self.scope.get("smolapi.identity")
+
     #TODO: Implement this shit later 
     @property
     def url(self) -> typing.NoReturn:
@@ -155,34 +439,183 @@ class Request(Mapping[str, typing.Any]):
     # Refactor this case to applied with HTTP/2
     
     # @abstractmethod
-    async def body(self) -> typing.Optional[typing.Union[dict, str]]:
-        if not hasattr(self, "_body"):
-            if self.method in ["GET", "HEAD"]:
+    async def body(self) -> typing.Any:
+        """
+        Body parsed according to content-type: str for text, decoded JSON,
+        or `FormData` for urlencoded and multipart forms. None for other types.
+        """
+        if self._body is _NOT_READ:
+            if self.method in ("GET", "HEAD"):
                 self._body = None
                 return self._body
-            chunk_data: typing.List[bytes] = []
-            async for chunk in self._stream():
-                chunk_data.append(chunk)
-            content_type = self.headers.get("content-type")
-            print(chunk_data, content_type)
-            self._body = _body_parser(content_type, b"".join(chunk_data or [])) or None
-            
+            started = time.perf_counter()
+            try:
+                self._body = await _body_parser(self, self.headers.get("content-type", ""))
+            finally:
+                self._body_time += time.perf_counter() - started
+
         return self._body
 
-    
-    async def _stream(self) -> typing.AsyncGenerator[bytes, None]:
-        if hasattr(self, "_body"):
-            yield self._body
-            yield b""
+    async def json(self) -> typing.Any:
+        """
+        Body decoded as JSON whatever the content-type, None for an empty body
+
+        Raises:
+            HttpException: 400 when the body isn't valid JSON
+        """
+        if self._json is _NOT_READ:
+            started = time.perf_counter()
+            try:
+                self._json = await _parse_json(self, {})
+            finally:
+                self._body_time += time.perf_counter() - started
+        return self._json
+
+    async def form(self) -> "FormData":
+        from .form import FormData
+
+        body = await self.body()
+        if not isinstance(body, FormData):
+            raise HttpException(415, "Expected a form content type")
+        return body
+
+    def add_cleanup(self, callback: typing.Callable[[], typing.Awaitable[None]]) -> None:
+        """Coroutine function called by `close`, after the response is sent, latest added first"""
+        if self._cleanups is None:
+            self._cleanups = []
+        self._cleanups.append(callback)
+
+    async def close(self) -> None:
+        """Release resources held by the request, such as uploaded files and pooled resources"""
+        error: typing.Optional[Exception] = None
+        while self._cleanups:
+            callback = self._cleanups.pop()
+            try:
+                await callback()
+            except Exception as exc:
+                # Run the remaining cleanups before reporting the first failure
+                error = error or exc
+        body = self._body
+        if body is not _NOT_READ and hasattr(body, "close"):
+            await body.close()
+        if error is not None:
+            raise error
+
+    async def body_bytes(self, max_body_size: typing.Optional[int] = None) -> bytearray:
+        """
+        Read the whole body, the buffer is allocated once from content-length
+        when the client sends a small one
+
+        Args:
+            max_body_size (int, optional): Limit in bytes. Defaults to settings.MAX_BODY_SIZE or 16 MiB.
+
+        Raises:
+            HttpException: 413 when body is over the limit, 400 when it is longer than content-length
+
+        Returns:
+            bytearray: Raw body, shared by every later call
+        """
+        if self._body_bytes is not None:
+            return self._body_bytes
+
+        limit = max_body_size if max_body_size is not None else _max_body_size()
+        length = self.content_length
+        if length is not None and length > limit:
+            raise HttpException(413)
+        if length is None or length > _MAX_PREALLOCATION:
+            buffer = bytearray()
+            async for chunk in self.stream(limit):
+                buffer += chunk
+                if length is not None and len(buffer) > length:
+                    raise HttpException(400, "Request body is longer than content-length")
+        else:
+            buffer = bytearray(length)
+            view = memoryview(buffer)
+            position = 0
+            try:
+                async for chunk in self.stream(limit):
+                    end = position + len(chunk)
+                    if end > length:
+                        raise HttpException(400, "Request body is longer than content-length")
+                    view[position:end] = chunk
+                    position = end
+            finally:
+                view.release()
+            if position < length:
+                # Client disconnected before sending everything
+                del buffer[position:]
+
+        self._body_bytes = buffer
+        return buffer
+
+    async def stream(
+        self, max_body_size: typing.Optional[int] = None
+    ) -> typing.AsyncIterator[bytes]:
+        """
+        Iterate over body chunks as they arrive, nothing is kept in memory
+
+        The iteration stops quietly when client disconnects, see `is_disconnected`.
+
+        Args:
+            max_body_size (int, optional): Limit in bytes. Defaults to settings.MAX_BODY_SIZE or 16 MiB.
+
+        Raises:
+            HttpException: 413 as soon as content-length or received bytes go over the limit
+        """
+        if self._body_bytes is not None:
+            if self._body_bytes:
+                yield bytes(self._body_bytes)
             return
+
+        limit = max_body_size if max_body_size is not None else _max_body_size()
+        length = self.content_length
+        if length is not None and length > limit:
+            raise HttpException(413)
+
+        received = 0
+        async for chunk in self._stream():
+            received += len(chunk)
+            if received > limit:
+                raise HttpException(413)
+            yield chunk
+
+    async def stream_to(
+        self,
+        sink: typing.Any,
+        max_body_size: typing.Optional[int] = None,
+    ) -> int:
+        """
+        Write body chunks straight into a sink without buffering the body
+
+        Args:
+            sink (Any): File-like object with `write`, or a callable taking each chunk.
+                Coroutine writers are awaited.
+            max_body_size (int, optional): Limit in bytes. Defaults to settings.MAX_BODY_SIZE or 16 MiB.
+
+        Returns:
+            int: Number of bytes written
+        """
+        import inspect
+
+        write = getattr(sink, "write", sink)
+        is_async = inspect.iscoroutinefunction(write)
+        written = 0
+        async for chunk in self.stream(max_body_size):
+            if is_async:
+                await write(chunk)
+            else:
+                write(chunk)
+            written += len(chunk)
+        return written
+
+    async def _stream(self) -> typing.AsyncGenerator[bytes, None]:
         if self._is_stream_finished:
-            return
+            raise RuntimeError("Request body has already been consumed")
         self._is_stream_finished = True
         while True:
             data = await self._receive()
-            print(data)
             if data["type"] == "http.request":
-                body = data["body"] or b""
+                body = data.get("body", b"")
                 if body:
                     yield body
                 if not data.get("more_body", False):
@@ -193,30 +626,90 @@ class Request(Mapping[str, typing.Any]):
                 break
             else:
                 break
-            
-        yield b""
 
 
-def _body_parser(content_type: str, body: typing.Optional[bytes] = b"") -> typing.Optional[typing.Union[str, dict]]:
+def _max_body_size() -> int:
+    return settings.MAX_BODY_SIZE or _DEFAULT_MAX_BODY_SIZE
+
+
+def parse_content_type(value: str) -> typing.Tuple[str, typing.Dict[str, str]]:
     """
-    Non stream body parser for http request
+    Split a content-type header into its lowercase media type and parameters
 
     Args:
-        content_type (str): request content type
-        body (bytes): byte data
+        value (str): Header value, e.g. "application/json; charset=utf-8"
+
+    Returns:
+        Tuple[str, Dict[str, str]]: Media type and parameters
+    """
+    media_type, params = parse_header_options(value)
+    return media_type.lower(), params
+
+
+async def _parse_text(request: "Request", params: typing.Dict[str, str]) -> str:
+    body = await request.body_bytes()
+    charset = params.get("charset", "utf-8")
+    try:
+        return body.decode(charset, "replace")
+    except LookupError:
+        raise HttpException(415, f"Unsupported charset {charset!r}")
+
+
+async def _parse_json(request: "Request", params: typing.Dict[str, str]) -> typing.Any:
+    body = await request.body_bytes()
+    if not body:
+        return None
+    try:
+        return serializer.loads(body)
+    except ValueError:
+        raise HttpException(400, "Invalid JSON body")
+
+
+async def _parse_urlencoded(request: "Request", params: typing.Dict[str, str]) -> "FormData":
+    from .form import parse_urlencoded, _DEFAULT_MAX_FIELD_SIZE
+
+    return await parse_urlencoded(
+        request.stream(), max_field_size=settings.MULTIPART_MAX_FIELD_SIZE or _DEFAULT_MAX_FIELD_SIZE
+    )
+
 
-    Raises:
-        NotImplementedError: Too lazy to implement
+async def _parse_multipart(request: "Request", params: typing.Dict[str, str]) -> "FormData":
+    from .form import parse_multipart, _DEFAULT_MAX_FIELD_SIZE, _DEFAULT_SPOOL_SIZE
+
+    return await parse_multipart(
+        request.stream(),
+        boundary=params.get("boundary", ""),
+        spool_size=settings.MULTIPART_SPOOL_SIZE or _DEFAULT_SPOOL_SIZE,
+        charset=params.get("charset", "utf-8"),
+        max_field_size=settings.MULTIPART_MAX_FIELD_SIZE or _DEFAULT_MAX_FIELD_SIZE,
+    )
+
+_BODY_PARSERS: typing.Dict[
+    str, typing.Callable[["Request", typing.Dict[str, str]], typing.Awaitable[typing.Any]]
+] = {
+    "text/plain": _parse_text,
+    "application/json": _parse_json,
+    "application/x-www-form-urlencoded": _parse_urlencoded,
+    "multipart/form-data": _parse_multipart,
+}
+
+
+async def _body_parser(request: "Request", content_type: str) -> typing.Any:
+    """
+    Stream body parser for http request, picks the parser by media type.
+    Form parsers consume the body chunk by chunk, text and JSON read it once.
+
+    Args:
+        request (Request): Request whose body is parsed
+        content_type (str): request content type
 
     Returns:
-        dict: Dict or string of data extracted from body
+        Any: Parsed body, None when the media type has no parser
     """
-    content_type_lower = content_type.lower()
-    if content_type_lower == "text/plain":
-        return body.decode("utf-8")
-    if content_type_lower == "application/json":
-        return json.loads(body)
-    if content_type == "text/xml" or content_type == "application/xml": #code nhu nay khong chay nhe
-        raise NotImplementedError()
-    
-    return None
\ No newline at end of file
+    media_type, params = parse_content_type(content_type)
+    parser = _BODY_PARSERS.get(media_type)
+    if parser is None and media_type.endswith("+json"):
+        parser = _parse_json
+    if parser is None:
+        return None
+    return await parser(request, params)
@@ -1,29 +1,466 @@
-import typing 
+import functools
+import os
+import typing
 from .types import Scope, Receive, Send
-from abc import ABC, abstractproperty
-
-class HttpResponse(ABC):
-    
-    
-    def __init__(self) -> None:
-        pass
-    
+from . import serializer
+
+if typing.TYPE_CHECKING:
+    import datetime
+
+
+__all__ = [
+    "Response",
+    "HttpResponse",
+    "PlainTextResponse",
+    "HTMLResponse",
+    "JsonResponse",
+    "StreamingResponse",
+    "FileResponse",
+]
+
+RawHeaders = typing.List[typing.Tuple[bytes, bytes]]
+
+_FILE_CHUNK_SIZE = 64 * 1024
+
+# RFC 6265 token characters of cookie names, and cookie-octets allowed unquoted in values
+_COOKIE_NAME_CHARS = frozenset(b"!#$%&'*+-.^_`|~0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+_COOKIE_VALUE_CHARS = frozenset(range(0x21, 0x7F)) - frozenset(b'",;\\')
+_SAMESITE = {"lax": b"Lax", "strict": b"Strict", "none": b"None"}
+
+
+class Response:
+    """
+    Response with a body rendered once into bytes on creation
+
+    Args:
+        content (Any, optional): Response content, see `render`. Defaults to None.
+        status_code (int, optional): HTTP status. Defaults to 200.
+        headers (Dict[str, str], optional): Extra headers. Defaults to None.
+        media_type (str, optional): Overrides the class media type. Defaults to None.
+    """
+
+    media_type: typing.Optional[str] = None
+    charset = "utf-8"
+
+    def __init__(
+        self,
+        content: typing.Any = None,
+        status_code: int = 200,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        media_type: typing.Optional[str] = None,
+    ) -> None:
+        self.status_code = status_code
+        if media_type is not None:
+            self.media_type = media_type
+        self.body = self.render(content)
+        self.raw_headers = self.init_headers(headers)
+
     @property
-    @abstractproperty
-    def content_type(self):
-        return "text/plain"
-    
-    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> Any:
+    def content_type(self) -> typing.Optional[str]:
+        if self.media_type is None:
+            return None
+        if self.media_type.startswith("text/"):
+            return f"{self.media_type}; charset={self.charset}"
+        return self.media_type
+
+    def render(self, content: typing.Any) -> bytes:
+        if content is None:
+            return b""
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return content.encode(self.charset)
+
+    def init_headers(
+        self,
+        headers: typing.Optional[typing.Dict[str, str]],
+        content_length: bool = True,
+    ) -> RawHeaders:
+        raw_headers = [
+            (key.lower().encode("latin-1"), value.encode("latin-1"))
+            for key, value in (headers or {}).items()
+        ]
+        names = {key for key, _ in raw_headers}
+        if content_length and b"content-length" not in names:
+            raw_headers.append((b"content-length", str(len(self.body)).encode("latin-1")))
+        content_type = self.content_type
+        if content_type and b"content-type" not in names:
+            raw_headers.append((b"content-type", content_type.encode("latin-1")))
+        return raw_headers
+
+    def set_cookie(
+        self,
+        key: str,
+        value: str = "",
+        max_age: typing.Optional[int] = None,
+        expires: typing.Union[int, float, "datetime.datetime", None] = None,
+        path: typing.Optional[str] = "/",
+        domain: typing.Optional[str] = None,
+        secure: bool = False,
+        httponly: bool = False,
+        samesite: typing.Optional[str] = "lax",
+    ) -> None:
+        """
+        Add a `Set-Cookie` header, values outside RFC 6265 cookie-octets are sent quoted
+
+        Args:
+            key (str): Cookie name
+            value (str, optional): Cookie value. Defaults to "".
+            max_age (int, optional): Lifetime in seconds. Defaults to a session cookie.
+            expires (int | float | datetime, optional): Expiry date, or seconds from now.
+            path (str, optional): Defaults to "/".
+            domain (str, optional): Defaults to None.
+            secure (bool, optional): Defaults to False.
+            httponly (bool, optional): Defaults to False.
+            samesite (str, optional): "lax", "strict" or "none". Defaults to "lax".
+
+        Raises:
+            ValueError: Invalid cookie name or samesite value
+        """
+        self.raw_headers.append((
+            b"set-cookie",
+            _cookie_pair(key, value)
+            + _cookie_expires(expires)
+            + _cookie_attributes(max_age, path, domain, secure, httponly, samesite),
+        ))
+
+    def delete_cookie(
+        self,
+        key: str,
+        path: typing.Optional[str] = "/",
+        domain: typing.Optional[str] = None,
+        secure: bool = False,
+        httponly: bool = False,
+        samesite: typing.Optional[str] = "lax",
+    ) -> None:
+        """Expire a cookie on the client, path and domain must match the ones it was set with"""
+        self.raw_headers.append((
+            b"set-cookie",
+            _cookie_pair(key, "") + _EXPIRED + _cookie_attributes(0, path, domain, secure, httponly, samesite),
+        ))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         await send({
-            
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
         })
+        await send({"type": "http.response.body", "body": self.body})
 
-class JsonResponse(HttpResponse):
-    
-    def __init__(self) -> None:
-        super().__init__()
-        
-    @property
-    def content_type(self):
-        return "application/json"
-    
\ No newline at end of file
+
+def _cookie_pair(key: str, value: str) -> bytes:
+    name = key.encode("latin-1")
+    if not name or not _COOKIE_NAME_CHARS.issuperset(name):
+        raise ValueError(f"Invalid cookie name {key!r}")
+    raw = value.encode("utf-8")
+    if _COOKIE_VALUE_CHARS.issuperset(raw):
+        return name + b"=" + raw
+    # Quoted with backslash and octal escapes, see `request.Cookie`
+    quoted = bytearray(b'"')
+    for char in raw:
+        if char in _COOKIE_VALUE_CHARS or char in b", ":
+            quoted.append(char)
+        elif char in b'"\\':
+            quoted += b"\\" + bytes((char,))
+        else:
+            quoted += b"\\%03o" % char
+    quoted += b'"'
+    return name + b"=" + bytes(quoted)
+
+
+_EXPIRED = b"; Expires=Thu, 01 Jan 1970 00:00:00 GMT"
+
+
+def _cookie_expires(expires: typing.Union[int, float, "datetime.datetime", None]) -> bytes:
+    # Relative expiries change on every call, they are kept out of the cached attributes
+    if expires is None:
+        return b""
+    from email.utils import format_datetime, formatdate
+
+    if isinstance(expires, (int, float)):
+        import time
+
+        date = formatdate(time.time() + expires, usegmt=True)
+    else:
+        date = format_datetime(expires, usegmt=True)
+    return b"; Expires=" + date.encode("latin-1")
+
+
+@functools.lru_cache(maxsize=256)
+def _cookie_attributes(
+    max_age: typing.Optional[int],
+    path: typing.Optional[str],
+    domain: typing.Optional[str],
+    secure: bool,
+    httponly: bool,
+    samesite: typing.Optional[str],
+) -> bytes:
+    # Most responses set cookies with the same attributes, they are formatted once
+    parts = []
+    if max_age is not None:
+        parts.append(b"Max-Age=%d" % max_age)
+    if domain:
+        parts.append(b"Domain=" + domain.encode("latin-1"))
+    if path:
+        parts.append(b"Path=" + path.encode("latin-1"))
+    if secure:
+        parts.append(b"Secure")
+    if httponly:
+        parts.append(b"HttpOnly")
+    if samesite:
+        try:
+            parts.append(b"SameSite=" + _SAMESITE[samesite.lower()])
+        except KeyError:
+            raise ValueError(f"Invalid samesite value {samesite!r}")
+    return b"".join(b"; " + part for part in parts)
+
+
+# Kept for code written against the first response class
+HttpResponse = Response
+
+
+class PlainTextResponse(Response):
+    media_type = "text/plain"
+
+
+class HTMLResponse(Response):
+    media_type = "text/html"
+
+
+class JsonResponse(Response):
+    """Response encoded with the configured JSON codec, see `smolapi.serializer`"""
+
+    media_type = "application/json"
+
+    def render(self, content: typing.Any) -> bytes:
+        return serializer.dumps(content)
+
+
+class StreamingResponse(Response):
+    """
+    Response sending every chunk of an iterator as soon as it is produced
+
+    Sync iterators are advanced in the default executor so a blocking
+    generator does not stall the event loop.
+
+    Args:
+        content (AsyncIterable | Iterable): Chunks of bytes or str
+        status_code (int, optional): HTTP status. Defaults to 200.
+        headers (Dict[str, str], optional): Extra headers. Defaults to None.
+        media_type (str, optional): Content type of stream. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        content: typing.Union[typing.AsyncIterable[typing.Any], typing.Iterable[typing.Any]],
+        status_code: int = 200,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        media_type: typing.Optional[str] = None,
+    ) -> None:
+        self.status_code = status_code
+        if media_type is not None:
+            self.media_type = media_type
+        self.body = b""
+        self.body_iterator = content
+        self.raw_headers = self.init_headers(headers, content_length=False)
+
+    async def _iterate(self) -> typing.AsyncIterator[typing.Any]:
+        if hasattr(self.body_iterator, "__aiter__"):
+            async for chunk in self.body_iterator:
+                yield chunk
+            return
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        iterator = iter(self.body_iterator)
+        done = object()
+        while True:
+            chunk = await loop.run_in_executor(None, next, iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        async for chunk in self._iterate():
+            if not isinstance(chunk, (bytes, bytearray, memoryview)):
+                chunk = chunk.encode(self.charset)
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class FileResponse(Response):
+    """
+    Response streaming a file from disk in fixed size chunks
+
+    The file is never loaded whole: reads run in the default executor, or
+    are delegated to the server through the `http.response.zerocopysend` /
+    `http.response.pathsend` ASGI extensions when available. Conditional
+    (`If-None-Match`) and single `Range` requests are answered with 304 and 206.
+
+    Args:
+        path (str | PathLike): File to send
+        status_code (int, optional): HTTP status. Defaults to 200.
+        headers (Dict[str, str], optional): Extra headers. Defaults to None.
+        media_type (str, optional): Content type. Guessed from file name by default.
+        filename (str, optional): Sent as attachment with this name. Defaults to None.
+        chunk_size (int, optional): Bytes read per chunk. Defaults to 64 KiB.
+    """
+
+    def __init__(
+        self,
+        path: typing.Union[str, "os.PathLike[str]"],
+        status_code: int = 200,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        media_type: typing.Optional[str] = None,
+        filename: typing.Optional[str] = None,
+        chunk_size: int = _FILE_CHUNK_SIZE,
+    ) -> None:
+        import mimetypes
+
+        self.path = os.fspath(path)
+        self.status_code = status_code
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.media_type = (
+            media_type
+            or mimetypes.guess_type(filename or self.path)[0]
+            or "application/octet-stream"
+        )
+        self.body = b""
+        headers = dict(headers or {})
+        if filename is not None:
+            headers.setdefault("content-disposition", _content_disposition(filename))
+        self.raw_headers = self.init_headers(headers, content_length=False)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        import asyncio
+        from email.utils import formatdate
+
+        loop = asyncio.get_running_loop()
+        stat = await loop.run_in_executor(None, os.stat, self.path)
+        size = stat.st_size
+        etag = f'"{int(stat.st_mtime_ns):x}-{size:x}"'
+        headers = self.raw_headers + [
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", formatdate(stat.st_mtime, usegmt=True).encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+        ]
+        request_headers = _request_headers(scope)
+
+        if self.status_code == 200 and _etag_matches(request_headers.get(b"if-none-match"), etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        status = self.status_code
+        start, end = 0, size
+        range_header = request_headers.get(b"range")
+        if_range = request_headers.get(b"if-range")
+        if status == 200 and range_header and (if_range is None or if_range.decode("latin-1") == etag):
+            byte_range = _parse_range(range_header.decode("latin-1"), size)
+            if byte_range is None:
+                headers.append((b"content-range", f"bytes */{size}".encode("latin-1")))
+                headers.append((b"content-length", b"0"))
+                await send({"type": "http.response.start", "status": 416, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            if byte_range != (0, size):
+                start, end = byte_range
+                status = 206
+                headers.append(
+                    (b"content-range", f"bytes {start}-{end - 1}/{size}".encode("latin-1"))
+                )
+
+        count = end - start
+        headers.append((b"content-length", str(count).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+
+        if scope.get("method") == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.pathsend" in extensions and status == 200:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+
+        file = await loop.run_in_executor(None, open, self.path, "rb")
+        try:
+            if "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": start,
+                    "count": count,
+                })
+                return
+
+            if start:
+                await loop.run_in_executor(None, file.seek, start)
+            remaining = count
+            while remaining > 0:
+                chunk = await loop.run_in_executor(None, file.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank while sending, close the body anyway
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await loop.run_in_executor(None, file.close)
+
+
+def _content_disposition(filename: str) -> str:
+    from urllib.parse import quote
+
+    quoted = quote(filename)
+    if quoted == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename*=utf-8''{quoted}"
+
+
+def _request_headers(scope: Scope) -> typing.Dict[bytes, bytes]:
+    wanted = (b"range", b"if-range", b"if-none-match")
+    return {name.lower(): value for name, value in scope.get("headers", []) if name.lower() in wanted}
+
+
+def _etag_matches(header: typing.Optional[bytes], etag: str) -> bool:
+    if not header:
+        return False
+    value = header.decode("latin-1").strip()
+    if value == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in value.split(","))
+
+
+def _parse_range(value: str, size: int) -> typing.Optional[typing.Tuple[int, int]]:
+    """
+    Single byte range of a `Range` header as a [start, end) tuple
+
+    Multiple ranges are answered with the whole file, None means unsatisfiable.
+    """
+    unit, _, ranges = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return 0, size
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if not first:
+            # Suffix range, last N bytes
+            length = int(last)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size
+        start = int(first)
+        end = int(last) + 1 if last else size
+    except ValueError:
+        return 0, size
+    if start >= size or end <= start:
+        return None
+    return start, min(end, size)
@@ -1,14 +1,22 @@
 import typing
 import re
+import uuid
 from .enums import HttpMethod
-import inspect
+from .exceptions import NotFound, MethodNotAllowed
+from .middleware import build_route_app
+from .types import App
 
+if typing.TYPE_CHECKING:
+    from .cache import Cache
+    from .metrics import Metrics
+    from .logger import AccessLog
 
-__all__ = ["Route", "Router"]
+
+__all__ = ["Route", "Router", "RouteTree", "Converter", "register_converter"]
 
 
 _ALLOWED_PATH_PARAMETER_CHARS = "[a-zA-Z0-9\_\-]+"
-_PATH_PARAMETER_REGEX = f"""{{({_ALLOWED_PATH_PARAMETER_CHARS})}}"""
+_PATH_PARAMETER_REGEX = f"""{{({_ALLOWED_PATH_PARAMETER_CHARS})(?::{_ALLOWED_PATH_PARAMETER_CHARS})?}}"""
 _REPLACED_STRING = "(?P<\\1>[a-zA-Z0-9\_\-]+)"
 
 
@@ -17,17 +25,22 @@ class Route:
         self: typing.Self,
         url: str,
         function: typing.Callable = None,
-        methods: typing.List[HttpMethod] = [],
-        middlewares: typing.List = [],
+        methods: typing.Optional[typing.List[HttpMethod]] = None,
+        middlewares: typing.Optional[typing.List] = None,
         name: typing.Optional[str] = None,
         description: typing.Optional[str] = None,
+        cache: typing.Optional["Cache"] = None,
     ) -> None:
         self._url = url
         self._function = function
-        self._methods = methods
-        self._middlewares = middlewares
+        self._methods = list(methods or [])
+        self._middlewares = list(middlewares or [])
         self._name = name
+        self._auto_name: typing.Optional[str] = None
         self._description = description
+        self._cache = cache
+        self._root: typing.Optional[str] = None
+        self._app: typing.Optional[App] = None
 
     def __dict__(self):
         return {
@@ -51,27 +64,71 @@ class Route:
     def url(self) -> str:
         return self._url
 
+    @property
+    def function(self) -> typing.Optional[typing.Callable]:
+        return self._function
+
     @property
     def methods(self) -> typing.List[HttpMethod]:
         return self._methods
 
+    @property
+    def path_parameters(self) -> typing.List[str]:
+        return re.findall(_PATH_PARAMETER_REGEX, self._url)
+
+    @property
+    def middlewares(self) -> typing.List:
+        return self._middlewares
+
+    @property
+    def cache(self) -> typing.Optional["Cache"]:
+        return self._cache
+
+    @property
+    def app(self) -> App:
+        """ASGI app running the middlewares and function of the route, built on first access"""
+        if self._app is None:
+            self._app = build_route_app(self)
+        return self._app
+
     @property
     def root(self) -> str:
         return self._root or ""
 
-    @root.setter
-    def root(self: typing.Self, value: str) -> None:
-        self._root = value
-        new_url = f"{self._root}/{self._url}"
-        self._url = re.sub("\/+", "/", new_url)
-        self._pattern = None  # Reset pattern attribute
+    def with_root(
+        self: typing.Self, root: str, middlewares: typing.Sequence = ()
+    ) -> typing.Self:
+        """
+        Copy of the route mounted under another url, the route itself is left untouched
+
+        Args:
+            root (str): Url prefix of the route
+            middlewares (Sequence, optional): Middlewares of parent routers, run before
+                the route ones. Defaults to ().
+
+        Returns:
+            Route: New route with prefixed url
+        """
+        route = Route(
+            url=_join_url(root, self._url),
+            function=self._function,
+            methods=self._methods,
+            middlewares=[*middlewares, *self._middlewares],
+            name=self._name,
+            description=self._description,
+            cache=self._cache,
+        )
+        route._root = _join_url(root, self.root)
+        return route
 
     @property
     def name(self: typing.Self) -> str:
-        if self._name is None:
+        if self._name is not None:
+            return self._name
+        if self._auto_name is None:
             name = self._url.split("/")
             if not name:
-                self._name = ".".join(self._methods).lower() + ".default"
+                self._auto_name = ".".join(self._methods).lower() + ".default"
             else:
                 split_names = []
                 for name in self._url.split("/"):
@@ -83,11 +140,11 @@ class Route:
                         split_names.append(name)
                 if not split_names:
                     split_names.append("default")
-                self._name = ".".join(
+                self._auto_name = ".".join(
                     list(map(lambda method: method.name, self._methods))
                     + split_names
                 ).lower()
-        return self._name
+        return self._auto_name
 
     @name.setter
     def name(self, value: str) -> None:
@@ -95,14 +152,13 @@ class Route:
 
     def get_path_parameters_value(self, url: str) -> typing.Dict[str, typing.Any]:
         values: typing.Optional[re.Match[str]] = re.match(self._pattern, url)
-        print(self._pattern, self._url)
         if not values:
             raise ValueError("URL not match with pattern")
         return values.groupdict()
 
     @classmethod
     def get(
-        cls, url, function: typing.Callable, name=None, description=None, middlewares=[]
+        cls, url, function: typing.Callable, name=None, description=None, middlewares=None, cache=None
     ) -> typing.Self:
         return Route(
             url=url,
@@ -111,11 +167,12 @@ class Route:
             methods=[HttpMethod.GET, HttpMethod.HEAD],
             name=name,
             description=description,
+            cache=cache,
         )
 
     @classmethod
     def post(
-        cls, url, function: typing.Callable, name=None, description=None, middlewares=[]
+        cls, url, function: typing.Callable, name=None, description=None, middlewares=None
     ) -> typing.Self:
         return Route(
             url=url,
@@ -128,7 +185,7 @@ class Route:
 
     @classmethod
     def put(
-        cls, url, function: typing.Callable, name=None, description=None, middlewares=[]
+        cls, url, function: typing.Callable, name=None, description=None, middlewares=None
     ) -> typing.Self:
         return Route(
             url=url,
@@ -141,7 +198,7 @@ class Route:
 
     @classmethod
     def patch(
-        cls, url, function: typing.Callable, name=None, description=None, middlewares=[]
+        cls, url, function: typing.Callable, name=None, description=None, middlewares=None
     ) -> typing.Self:
         return Route(
             url=url,
@@ -154,7 +211,7 @@ class Route:
 
     @classmethod
     def delete(
-        cls, url, function: typing.Callable, name=None, description=None, middlewares=[]
+        cls, url, function: typing.Callable, name=None, description=None, middlewares=None
     ) -> typing.Self:
         return Route(
             url=url,
@@ -171,14 +228,14 @@ class Router:
         self: typing.Self,
         *args,
         prefix: str = "",
-        middlewares: typing.List[typing.Callable] = [],
+        middlewares: typing.Optional[typing.List[typing.Callable]] = None,
     ) -> None:
         for arg in list(args):
             if not isinstance(arg, Route) and not isinstance(arg, Router):
                 raise SyntaxError("Route must be an instance of class Route or Router")
         self._routes = list(args)
         self._prefix = prefix
-        self._middlewares = middlewares
+        self._middlewares = list(middlewares or [])
 
     def __dict__(self: typing.Self):
         return dict(self.unpack_route())
@@ -199,26 +256,346 @@ class Router:
     def root(self, value: str) -> None:
         self._root = value
 
-    def add_route(self, route: Route) -> None:
+    def add_route(self, route: typing.Union[Route, "Router"]) -> None:
+        if not isinstance(route, Route) and not isinstance(route, Router):
+            raise SyntaxError("Route must be an instance of class Route or Router")
         self._routes.append(route)
 
     def add_middleware(self, middleware: typing.Callable) -> None:
         self._middlewares.append(middleware)
 
-    def unpack_route(self) -> typing.List[Route]:
+    def unpack_route(
+        self, root: str = "", middlewares: typing.Sequence = ()
+    ) -> typing.List[Route]:
+        """
+        Flatten nested routers into a list of routes with their full url
+        and middlewares, outer routers first
+
+        Routes are copied with `Route.with_root`, so unpacking the same
+        router many times always gives the same result.
+
+        Args:
+            root (str, optional): Url prefix of the parent router. Defaults to "".
+            middlewares (Sequence, optional): Middlewares of the parent routers. Defaults to ().
+
+        Returns:
+            List[Route]: Flattened routes
+        """
+        prefix = _join_url(root, self.prefix)
+        middlewares = [*middlewares, *self._middlewares]
         routes = []
         for route in self._routes:
             if isinstance(route, Route) or issubclass(route.__class__, Route):
-                route.root = self.prefix
-                routes.append(route)
+                routes.append(route.with_root(prefix, middlewares))
                 continue
 
             if isinstance(route, Router):
-                route.prefix = f"{self.prefix}/{route.prefix}"
-                sub_routes = route.unpack_route()
-                routes += sub_routes
+                routes += route.unpack_route(prefix, middlewares)
 
         return routes
 
+    def compile(
+        self, metrics: typing.Optional["Metrics"] = None, access_log: typing.Optional["AccessLog"] = None
+    ) -> "RouteTree":
+        """
+        Flatten the router and build the tree used for dispatching requests,
+        the middleware chain of every route is composed here as well
+
+        Args:
+            metrics (Metrics, optional): Instrument every route with it. Defaults to None.
+            access_log (AccessLog, optional): Log the requests of every route with it. Defaults to None.
+
+        Returns:
+            RouteTree: Compiled route tree
+        """
+        routes = self.unpack_route()
+        for route in routes:
+            route._app = build_route_app(route, metrics)
+            if access_log is not None:
+                route._app = access_log.wrap(route.name, route._app)
+        return RouteTree(routes)
+
+
+def _join_url(root: str, url: str) -> str:
+    return re.sub("\/+", "/", f"/{root}/{url}")
+
+
+def _split_path(path: str) -> typing.List[str]:
+    # Empty segments come from leading, trailing or repeated slashes
+    return [segment for segment in path.split("/") if segment]
+
+
+class Converter:
+    """
+    Path parameter converter, used as `{name:converter}` in route urls
+
+    `convert` turns a matched segment into the handler value and raises
+    ValueError to reject it, so the request falls through to other routes.
+    `to_url` does the reverse when building urls.
+    Converters with lower `priority` are tried first on the same segment.
+    """
+
+    priority = 1
+    # Matches every remaining segment instead of one
+    consumes_rest = False
+
+    def convert(self, value: str) -> typing.Any:
+        return value
+
+    def to_url(self, value: typing.Any) -> str:
+        return str(value)
+
+
+class StringConverter(Converter):
+    pass
+
+
+class IntegerConverter(Converter):
+    priority = 0
+
+    def convert(self, value: str) -> int:
+        # isdigit alone accepts other scripts' digits, "/١٢" would alias "/12"
+        if not (value.isascii() and value.isdigit()):
+            raise ValueError(value)
+        return int(value)
+
+    def to_url(self, value: typing.Any) -> str:
+        value = int(value)
+        if value < 0:
+            raise ValueError("Negative values are not supported")
+        return str(value)
+
+
+class FloatConverter(Converter):
+    priority = 0
+
+    def convert(self, value: str) -> float:
+        if not value.isascii():
+            raise ValueError(value)
+        result = float(value)
+        if result != result or result in (float("inf"), float("-inf")):
+            raise ValueError(value)
+        return result
+
+
+class UUIDConverter(Converter):
+    priority = 0
+
+    def convert(self, value: str) -> uuid.UUID:
+        return uuid.UUID(value)
+
+
+class PathConverter(Converter):
+    priority = 2
+    consumes_rest = True
+
+
+_CONVERTERS: typing.Dict[str, Converter] = {
+    "str": StringConverter(),
+    "int": IntegerConverter(),
+    "float": FloatConverter(),
+    "uuid": UUIDConverter(),
+    "path": PathConverter(),
+}
+
+
+def register_converter(name: str, converter: Converter) -> None:
+    """
+    Make a converter available as `{param:name}` in route urls, must be
+    registered before routes are compiled
+
+    Args:
+        name (str): Converter name used in urls
+        converter (Converter): Converter instance
+    """
+    _CONVERTERS[name] = converter
+
+
+def _parse_parameter(segment: str) -> typing.Optional[typing.Tuple[str, str]]:
+    if not ("{" in segment or "}" in segment):
+        return None
+    if not (segment.startswith("{") and segment.endswith("}")):
+        raise ValueError(f"Path parameter must take a whole segment, got {segment!r}")
+    name, _, converter = segment[1:-1].partition(":")
+    converter = converter or "str"
+    if not re.fullmatch(_ALLOWED_PATH_PARAMETER_CHARS, name):
+        raise ValueError(f"Invalid path parameter name {name!r}")
+    if converter not in _CONVERTERS:
+        raise ValueError(f"Unknown path parameter converter {converter!r}")
+    return name, converter
+
+
+class _RouteNode:
+    __slots__ = ("static", "parameters", "routes")
+
+    def __init__(self) -> None:
+        self.static: typing.Dict[str, "_RouteNode"] = {}
+        # (name, converter, child) sorted by converter priority
+        self.parameters: typing.List[typing.Tuple[str, Converter, "_RouteNode"]] = []
+        self.routes: typing.Dict[str, Route] = {}
+
+    def parameter_child(self, name: str, converter: Converter) -> "_RouteNode":
+        for parameter_name, parameter_converter, child in self.parameters:
+            if parameter_name == name and parameter_converter is converter:
+                return child
+        child = _RouteNode()
+        self.parameters.append((name, converter, child))
+        self.parameters.sort(key=lambda parameter: parameter[1].priority)
+        return child
+
+
+class RouteTree:
+    """
+    Prefix tree of routes, one level per path segment
+
+    Every node keeps its static children by segment, its `{param}` children
+    with their converter and the routes ending there by HTTP method, so a
+    lookup walks the path once instead of trying every route pattern.
+    Parameter values are converted while matching, a segment rejected by a
+    converter lets the next candidate route match.
+
+    Args:
+        routes (Iterable[Route]): Flattened routes, see `Router.unpack_route`
+    """
+
+    def __init__(self, routes: typing.Iterable[Route] = ()) -> None:
+        self._root = _RouteNode()
+        self._names: typing.Dict[str, Route] = {}
+        for route in routes:
+            self.add(route)
+
+    def add(self, route: Route) -> None:
+        node = self._root
+        segments = _split_path(route.url)
+        for index, segment in enumerate(segments):
+            parameter = _parse_parameter(segment)
+            if parameter is None:
+                node = node.static.setdefault(segment, _RouteNode())
+                continue
+            name, converter_name = parameter
+            converter = _CONVERTERS[converter_name]
+            if converter.consumes_rest and index != len(segments) - 1:
+                raise ValueError(f"{segment!r} must be the last segment of {route.url!r}")
+            node = node.parameter_child(name, converter)
+
+        for method in route.methods:
+            if method.name in node.routes:
+                raise ValueError(f"Duplicated route {method.name} {route.url}")
+            node.routes[method.name] = route
+
+        if self._names.get(route.name, route) is not route:
+            raise ValueError(f"Duplicated route name {route.name!r}")
+        self._names[route.name] = route
+
+    def match(
+        self, method: str, path: str
+    ) -> typing.Tuple[Route, typing.Dict[str, typing.Any]]:
+        """
+        Find the route handling a request
+
+        Args:
+            method (str): HTTP method of request
+            path (str): Request path, as given in ASGI scope
+
+        Raises:
+            NotFound: No route matches the path
+            MethodNotAllowed: Path matches but not with this method
+
+        Returns:
+            Tuple[Route, Dict[str, Any]]: Matched route and its converted path parameters
+        """
+        params: typing.Dict[str, typing.Any] = {}
+        allowed: typing.Set[str] = set()
+        route = self._match(self._root, _split_path(path), 0, method, params, allowed)
+        if route is None:
+            if allowed:
+                raise MethodNotAllowed(allowed)
+            raise NotFound()
+        return route, params
+
+    def _match(
+        self,
+        node: _RouteNode,
+        segments: typing.List[str],
+        index: int,
+        method: str,
+        params: typing.Dict[str, typing.Any],
+        allowed: typing.Set[str],
+    ) -> typing.Optional[Route]:
+        if index == len(segments):
+            route = node.routes.get(method)
+            if route is None:
+                allowed.update(node.routes)
+            return route
+
+        segment = segments[index]
+        # Static segments win over parameters, parameters are only tried on a miss
+        child = node.static.get(segment)
+        if child is not None:
+            route = self._match(child, segments, index + 1, method, params, allowed)
+            if route is not None:
+                return route
+
+        for name, converter, child in node.parameters:
+            if converter.consumes_rest:
+                raw, next_index = "/".join(segments[index:]), len(segments)
+            else:
+                raw, next_index = segment, index + 1
+            try:
+                value = converter.convert(raw)
+            except ValueError:
+                continue
+            route = self._match(child, segments, next_index, method, params, allowed)
+            if route is not None:
+                params[name] = value
+                return route
+
+        return None
+
+    def url_path_for(self, name: str, **params: typing.Any) -> str:
+        """
+        Build the path of a named route
+
+        Args:
+            name (str): Route name, see `Route.name`
+            **params: Path parameter values
+
+        Raises:
+            LookupError: No route with this name, or parameters don't match the route
+
+        Returns:
+            str: Url path
+        """
+        from urllib.parse import quote
+
+        route = self._names.get(name)
+        if route is None:
+            raise LookupError(f"No route named {name!r}")
+        segments = []
+        used = set()
+        for segment in _split_path(route.url):
+            parameter = _parse_parameter(segment)
+            if parameter is None:
+                segments.append(segment)
+                continue
+            parameter_name, converter_name = parameter
+            if parameter_name not in params:
+                raise LookupError(f"Missing path parameter {parameter_name!r} for route {name!r}")
+            converter = _CONVERTERS[converter_name]
+            value = converter.to_url(params[parameter_name])
+            segments.append(quote(value, safe="/" if converter.consumes_rest else ""))
+            used.add(parameter_name)
+        if used != params.keys():
+            extra = ", ".join(sorted(params.keys() - used))
+            raise LookupError(f"Unknown path parameters {extra} for route {name!r}")
+        return "/" + "/".join(segments)
+
+    def __iter__(self) -> typing.Iterator[Route]:
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            yield from node.routes.values()
+            stack.extend(node.static.values())
+            stack.extend(child for _, _, child in node.parameters)
 
 
@@ -0,0 +1,459 @@
+import abc
+import base64
+import hashlib
+import hmac
+import inspect
+import time
+import typing
+from collections import OrderedDict
+from .request import Request
+from .response import Response
+from .exceptions import HttpException
+from .middleware import BaseMiddleware, CallNext
+from . import serializer
+from smolapi.setting import settings
+
+
+__all__ = [
+    "Identity",
+    "AuthCache",
+    "Authenticator",
+    "HMACToken",
+    "JWTBearer",
+    "APIKey",
+    "Security",
+    "IDENTITY_KEY",
+]
+
+# Scope key of the authenticated identity, read through `Request.identity`
+IDENTITY_KEY = "smolapi.identity"
+
+_DEFAULT_CACHE_SIZE = 10000
+_DEFAULT_CACHE_TTL = 60.0
+
+
+class Identity:
+    """
+    Authenticated client, what authenticators return and routes check
+
+    Args:
+        subject (str): Identifier of the client, the `sub` claim of tokens
+        scopes (Iterable[str], optional): Granted scopes. Defaults to none.
+        roles (Iterable[str], optional): Granted roles. Defaults to none.
+        claims (Dict[str, Any], optional): Every claim of the credential. Defaults to None.
+        expires_at (float, optional): Expiry as a unix timestamp. Defaults to None, never.
+    """
+
+    __slots__ = ("subject", "scopes", "roles", "claims", "expires_at")
+
+    def __init__(
+        self,
+        subject: str,
+        scopes: typing.Iterable[str] = (),
+        roles: typing.Iterable[str] = (),
+        claims: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        expires_at: typing.Optional[float] = None,
+    ) -> None:
+        self.subject = subject
+        self.scopes = frozenset(scopes)
+        self.roles = frozenset(roles)
+        self.claims = claims or {}
+        self.expires_at = expires_at
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(subject={self.subject!r}, scopes={sorted(self.scopes)}, roles={sorted(self.roles)})"
+
+
+class AuthCache:
+    """
+    Bounded LRU of verified identities, keyed by a digest of the credential
+
+    Entries expire after `ttl` seconds or with the identity, whichever is
+    first, so a revoked API key or an expired token is verified again soon.
+
+    Args:
+        max_size (int, optional): Identities kept at most. Defaults to settings.AUTH_CACHE_SIZE or 10000.
+        ttl (float, optional): Seconds an identity is trusted without verification.
+            Defaults to settings.AUTH_CACHE_TTL or 60.
+    """
+
+    def __init__(self, max_size: typing.Optional[int] = None, ttl: typing.Optional[float] = None) -> None:
+        self.max_size = max_size or settings.AUTH_CACHE_SIZE or _DEFAULT_CACHE_SIZE
+        self.ttl = ttl or settings.AUTH_CACHE_TTL or _DEFAULT_CACHE_TTL
+        self._entries: "OrderedDict[bytes, typing.Tuple[Identity, float]]" = OrderedDict()
+
+    def get(self, key: bytes) -> typing.Optional[Identity]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: bytes, identity: Identity) -> None:
+        expires_at = time.time() + self.ttl
+        if identity.expires_at is not None and identity.expires_at < expires_at:
+            expires_at = identity.expires_at
+        self._entries[key] = (identity, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Authenticator(abc.ABC):
+    """
+    Reads a credential from a request header and turns it into an `Identity`
+
+    Verified credentials are kept in `cache`, a repeated credential skips
+    `authenticate` until its entry expires. Attach it to routes with
+    `require`, e.g. `Route.get("/me", me, middlewares=[auth.require("profile")])`.
+
+    Args:
+        header (str, optional): Header carrying the credential. Defaults to authorization.
+        scheme (str, optional): Expected scheme prefix, e.g. Bearer. None takes the whole value.
+        cache (AuthCache, optional): Defaults to a new AuthCache.
+    """
+
+    def __init__(
+        self,
+        header: str = "authorization",
+        scheme: typing.Optional[str] = "Bearer",
+        cache: typing.Optional[AuthCache] = None,
+    ) -> None:
+        self.header = header.lower()
+        self.scheme = scheme
+        self.cache = cache if cache is not None else AuthCache()
+        self._prefix = f"{scheme.lower()} " if scheme else None
+        self.challenge = {"www-authenticate": scheme} if scheme else {}
+
+    def credential(self, request: Request) -> typing.Optional[str]:
+        """Credential of the request, None when the header is missing or has another scheme"""
+        value = request.headers.get(self.header)
+        if not value:
+            return None
+        prefix = self._prefix
+        if prefix is None:
+            return value
+        if value[: len(prefix)].lower() != prefix:
+            return None
+        return value[len(prefix) :].strip() or None
+
+    async def identify(self, credential: str) -> Identity:
+        """
+        Identity of a credential, from the cache or verified by `authenticate`
+
+        Raises:
+            HttpException: 401 when the credential is invalid
+        """
+        key = hashlib.blake2b(credential.encode("latin-1"), digest_size=20).digest()
+        identity = self.cache.get(key)
+        if identity is not None:
+            return identity
+        try:
+            identity = await self.authenticate(credential)
+        except ValueError:
+            identity = None
+        if identity is None:
+            raise HttpException(401, "Invalid credentials", headers=self.challenge)
+        self.cache.set(key, identity)
+        return identity
+
+    @abc.abstractmethod
+    async def authenticate(self, credential: str) -> typing.Optional[Identity]:
+        """Verify a credential, None or ValueError when it is invalid"""
+
+    def require(
+        self, *scopes: str, roles: typing.Iterable[str] = (), optional: bool = False
+    ) -> "Security":
+        return Security(self, scopes, roles, optional=optional)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid base64")
+
+
+def _secret(secret: typing.Union[str, bytes]) -> bytes:
+    if not secret:
+        raise ValueError("Secret must not be empty")
+    return secret.encode("utf-8") if isinstance(secret, str) else secret
+
+
+def _identity(claims: typing.Any, leeway: float = 0) -> Identity:
+    """Identity of decoded token claims, checking exp and nbf"""
+    if not isinstance(claims, dict):
+        raise ValueError("Claims must be an object")
+    now = time.time()
+    expires_at = claims.get("exp")
+    if expires_at is not None:
+        if not isinstance(expires_at, (int, float)) or expires_at + leeway <= now:
+            raise ValueError("Token expired")
+        expires_at += leeway
+    not_before = claims.get("nbf")
+    if not_before is not None and (not isinstance(not_before, (int, float)) or not_before - leeway > now):
+        raise ValueError("Token not valid yet")
+    # OAuth puts scopes in a space separated "scope" claim, lists are accepted too
+    scopes = _names(claims.get("scope", claims.get("scopes", ())), "scope")
+    roles = _names(claims.get("roles", ()), "roles")
+    return Identity(str(claims.get("sub", "")), scopes, roles, claims, expires_at)
+
+
+def _names(value: typing.Any, claim: str) -> typing.List[str]:
+    """Scopes or roles of a claim, a space separated string or a list of strings"""
+    if isinstance(value, str):
+        return value.split()
+    if isinstance(value, (list, tuple)) and all(isinstance(name, str) for name in value):
+        return list(value)
+    raise ValueError(f"Invalid {claim} claim")
+
+
+def _claims(
+    subject: str,
+    scopes: typing.Iterable[str],
+    roles: typing.Iterable[str],
+    expires_in: typing.Optional[float],
+    extra: typing.Dict[str, typing.Any],
+) -> typing.Dict[str, typing.Any]:
+    claims: typing.Dict[str, typing.Any] = {"sub": subject, **extra}
+    scopes = scopes.split() if isinstance(scopes, str) else list(scopes)
+    if scopes:
+        claims["scope"] = " ".join(scopes)
+    roles = roles.split() if isinstance(roles, str) else list(roles)
+    if roles:
+        claims["roles"] = roles
+    if expires_in is not None:
+        claims["exp"] = int(time.time() + expires_in)
+    return claims
+
+
+class HMACToken(Authenticator):
+    """
+    Compact signed tokens: base64url JSON claims, a dot and their HMAC-SHA256
+
+    Lighter than JWT when the issuer is the application itself, tokens are
+    minted with `sign`.
+
+    Args:
+        secret (str | bytes): Signing key
+        header (str, optional): Defaults to authorization.
+        scheme (str, optional): Defaults to Bearer.
+        cache (AuthCache, optional): Defaults to a new AuthCache.
+    """
+
+    def __init__(
+        self,
+        secret: typing.Union[str, bytes],
+        header: str = "authorization",
+        scheme: typing.Optional[str] = "Bearer",
+        cache: typing.Optional[AuthCache] = None,
+    ) -> None:
+        super().__init__(header, scheme, cache)
+        self._secret = _secret(secret)
+
+    def sign(
+        self,
+        subject: str,
+        scopes: typing.Iterable[str] = (),
+        roles: typing.Iterable[str] = (),
+        expires_in: typing.Optional[float] = None,
+        **claims: typing.Any,
+    ) -> str:
+        payload = _b64encode(serializer.dumps(_claims(subject, scopes, roles, expires_in, claims)))
+        signature = hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest()
+        return f"{payload}.{_b64encode(signature)}"
+
+    async def authenticate(self, credential: str) -> typing.Optional[Identity]:
+        payload, _, signature = credential.rpartition(".")
+        if not payload:
+            return None
+        expected = hmac.new(self._secret, payload.encode("latin-1"), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        return _identity(serializer.loads(_b64decode(payload)))
+
+
+class JWTBearer(Authenticator):
+    """
+    JSON Web Tokens signed with HS256, other algorithms are rejected
+
+    `exp` and `nbf` are checked with `leeway` seconds of tolerance, `aud`
+    and `iss` when `audience` and `issuer` are set. Scopes are read from
+    the `scope` claim, roles from `roles`.
+
+    Args:
+        secret (str | bytes): HMAC key shared with the issuer
+        audience (str, optional): Required `aud`. Defaults to None, not checked.
+        issuer (str, optional): Required `iss`. Defaults to None, not checked.
+        leeway (float, optional): Clock skew tolerated, in seconds. Defaults to 0.
+        header (str, optional): Defaults to authorization.
+        scheme (str, optional): Defaults to Bearer.
+        cache (AuthCache, optional): Defaults to a new AuthCache.
+    """
+
+    def __init__(
+        self,
+        secret: typing.Union[str, bytes],
+        audience: typing.Optional[str] = None,
+        issuer: typing.Optional[str] = None,
+        leeway: float = 0,
+        header: str = "authorization",
+        scheme: typing.Optional[str] = "Bearer",
+        cache: typing.Optional[AuthCache] = None,
+    ) -> None:
+        super().__init__(header, scheme, cache)
+        self._secret = _secret(secret)
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+
+    def encode(
+        self,
+        subject: str,
+        scopes: typing.Iterable[str] = (),
+        roles: typing.Iterable[str] = (),
+        expires_in: typing.Optional[float] = None,
+        **claims: typing.Any,
+    ) -> str:
+        claims = _claims(subject, scopes, roles, expires_in, claims)
+        if self.audience is not None:
+            claims.setdefault("aud", self.audience)
+        if self.issuer is not None:
+            claims.setdefault("iss", self.issuer)
+        signing_input = (
+            _b64encode(serializer.dumps({"alg": "HS256", "typ": "JWT"})) + "." + _b64encode(serializer.dumps(claims))
+        )
+        signature = hmac.new(self._secret, signing_input.encode("ascii"), hashlib.sha256).digest()
+        return f"{signing_input}.{_b64encode(signature)}"
+
+    async def authenticate(self, credential: str) -> typing.Optional[Identity]:
+        signing_input, _, signature = credential.rpartition(".")
+        header, _, payload = signing_input.partition(".")
+        if not header or not payload or "." in payload:
+            return None
+        # Algorithm first, "none" and asymmetric algorithms never reach the HMAC
+        header = serializer.loads(_b64decode(header))
+        if not isinstance(header, dict) or header.get("alg") != "HS256":
+            return None
+        expected = hmac.new(self._secret, signing_input.encode("latin-1"), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        claims = serializer.loads(_b64decode(payload))
+        identity = _identity(claims, self.leeway)
+        if self.audience is not None:
+            audience = claims.get("aud")
+            if audience != self.audience and not (isinstance(audience, list) and self.audience in audience):
+                return None
+        if self.issuer is not None and claims.get("iss") != self.issuer:
+            return None
+        return identity
+
+
+class APIKey(Authenticator):
+    """
+    API keys looked up in a mapping or through a callable
+
+    A mapping is indexed by the SHA-256 of its keys on creation, the keys
+    themselves are not kept. A callable receives the key and returns the
+    identity or None, it may be a coroutine function, e.g. a database query.
+
+    Args:
+        keys (Mapping[str, Identity | str] | Callable[[str], Identity | None]): Identity,
+            or subject name, of each key
+        header (str, optional): Defaults to x-api-key.
+        scheme (str, optional): Defaults to None, the whole header value is the key.
+        cache (AuthCache, optional): Defaults to a new AuthCache.
+    """
+
+    def __init__(
+        self,
+        keys: typing.Union[typing.Mapping[str, typing.Union[Identity, str]], typing.Callable[[str], typing.Any]],
+        header: str = "x-api-key",
+        scheme: typing.Optional[str] = None,
+        cache: typing.Optional[AuthCache] = None,
+    ) -> None:
+        super().__init__(header, scheme, cache)
+        self._lookup: typing.Optional[typing.Callable[[str], typing.Any]] = None
+        self._keys: typing.Dict[bytes, Identity] = {}
+        if callable(keys):
+            self._lookup = keys
+        else:
+            for key, identity in keys.items():
+                if isinstance(identity, str):
+                    identity = Identity(identity)
+                self._keys[hashlib.sha256(key.encode("utf-8")).digest()] = identity
+
+    async def authenticate(self, credential: str) -> typing.Optional[Identity]:
+        if self._lookup is None:
+            return self._keys.get(hashlib.sha256(credential.encode("latin-1")).digest())
+        identity = self._lookup(credential)
+        if inspect.isawaitable(identity):
+            identity = await identity
+        return identity
+
+
+class Security(BaseMiddleware):
+    """
+    Request middleware authenticating requests and checking their grants
+
+    The identity must hold every scope of `scopes` and, when `roles` is
+    given, at least one of them. Requirements are frozen here, once per
+    route, a request only pays a cache lookup and two set operations.
+    The identity is stored in the scope, read it with `request.identity`.
+
+    Args:
+        authenticator (Authenticator): Reads and verifies the credential
+        scopes (Iterable[str], optional): Scopes all required. Defaults to none.
+        roles (Iterable[str], optional): Roles of which one is required. Defaults to none.
+        optional (bool, optional): Let requests without credential through, with no identity.
+            Defaults to False.
+    """
+
+    def __init__(
+        self,
+        authenticator: Authenticator,
+        scopes: typing.Iterable[str] = (),
+        roles: typing.Iterable[str] = (),
+        optional: bool = False,
+    ) -> None:
+        self.authenticator = authenticator
+        self.scopes = frozenset(scopes)
+        self.roles = frozenset(roles)
+        self.optional = optional
+        forbidden_headers = {}
+        if authenticator.scheme and authenticator.scheme.lower() == "bearer" and self.scopes:
+            forbidden_headers["www-authenticate"] = (
+                f'Bearer error="insufficient_scope", scope="{" ".join(sorted(self.scopes))}"'
+            )
+        self._forbidden_headers = forbidden_headers
+
+    def allows(self, identity: Identity) -> bool:
+        if self.scopes and not self.scopes <= identity.scopes:
+            return False
+        return not self.roles or not self.roles.isdisjoint(identity.roles)
+
+    async def dispatch(self, request: Request, call_next: CallNext) -> Response:
+        authenticator = self.authenticator
+        credential = authenticator.credential(request)
+        if credential is None:
+            if self.optional:
+                return await call_next(request)
+            raise HttpException(401, headers=authenticator.challenge)
+        identity = await authenticator.identify(credential)
+        if not self.allows(identity):
+            raise HttpException(403, headers=self._forbidden_headers)
+        request.scope[IDENTITY_KEY] = identity
+        return await call_next(request)
@@ -0,0 +1,194 @@
+import dataclasses
+import datetime
+import decimal
+import enum
+import typing
+import uuid
+from abc import ABC, abstractmethod
+
+
+__all__ = ["JsonCodec", "register_codec", "configure", "get_codec", "loads", "dumps"]
+
+
+def _dataclass_fields(obj: typing.Any) -> typing.Dict[str, typing.Any]:
+    names = _DATACLASS_FIELDS.get(type(obj))
+    if names is None:
+        names = _DATACLASS_FIELDS[type(obj)] = tuple(
+            field.name for field in dataclasses.fields(obj)
+        )
+    return {name: getattr(obj, name) for name in names}
+
+
+_DATACLASS_FIELDS: typing.Dict[type, typing.Tuple[str, ...]] = {}
+
+# Exact type lookup first, the isinstance checks below only run for subclasses
+_ENCODERS: typing.Dict[type, typing.Callable[[typing.Any], typing.Any]] = {
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    decimal.Decimal: str,
+    uuid.UUID: str,
+    set: list,
+    frozenset: list,
+}
+
+
+def _default(obj: typing.Any) -> typing.Any:
+    encoder = _ENCODERS.get(type(obj))
+    if encoder is not None:
+        return encoder(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return _dataclass_fields(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    for base, encoder in _ENCODERS.items():
+        if isinstance(obj, base):
+            return encoder(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JsonCodec(ABC):
+    """
+    JSON backend, decodes from bytes and encodes to UTF-8 bytes
+
+    Dataclasses, datetimes, UUIDs, enums and Decimals (as strings) are
+    encoded by every codec.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview]) -> typing.Any:
+        ...
+
+    @abstractmethod
+    def dumps(self, obj: typing.Any) -> bytes:
+        ...
+
+
+class StdlibJsonCodec(JsonCodec):
+    name = "json"
+
+    def __init__(self) -> None:
+        import json
+
+        self._loads = json.loads
+        self._encoder = json.JSONEncoder(
+            ensure_ascii=False, separators=(",", ":"), default=_default
+        )
+
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview]) -> typing.Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return self._loads(data)
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        return self._encoder.encode(obj).encode("utf-8")
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._loads = orjson.loads
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview]) -> typing.Any:
+        return self._loads(data)
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        # orjson handles dataclasses, datetimes, UUIDs and enums natively
+        return self._dumps(obj, default=_default, option=self._option)
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder(enc_hook=_default)
+        self._decode_error = msgspec.DecodeError
+
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview]) -> typing.Any:
+        try:
+            return self._decoder.decode(data)
+        except self._decode_error as exc:
+            # Same contract as json and orjson, invalid documents raise ValueError
+            raise ValueError(str(exc)) from exc
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        return self._encoder.encode(obj)
+
+
+_CODECS: typing.Dict[str, typing.Callable[[], JsonCodec]] = {
+    "json": StdlibJsonCodec,
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+# Order tried when JSON_CODEC is "auto"
+_AUTO_ORDER = ("orjson", "msgspec", "json")
+
+# Created by `configure` on startup, or on first use with the stdlib codec
+_codec: typing.Optional[JsonCodec] = None
+
+
+def register_codec(name: str, factory: typing.Callable[[], JsonCodec]) -> None:
+    """
+    Register a JSON backend selectable with `JSON_CODEC` setting
+
+    Args:
+        name (str): Codec name used in settings
+        factory (Callable[[], JsonCodec]): Builds the codec, may raise ImportError
+    """
+    _CODECS[name] = factory
+
+
+def configure(name: typing.Optional[str] = None) -> JsonCodec:
+    """
+    Select the codec used by `loads`/`dumps`, called once on application startup
+
+    Args:
+        name (str, optional): Registered codec name, or "auto" for the fastest
+            installed one. Defaults to "auto".
+
+    Raises:
+        LookupError: Codec is not registered
+        ImportError: Codec library is not installed
+
+    Returns:
+        JsonCodec: Selected codec
+    """
+    global _codec
+    name = name or "auto"
+    if name == "auto":
+        for candidate in _AUTO_ORDER:
+            try:
+                _codec = _CODECS[candidate]()
+                break
+            except ImportError:
+                continue
+        return _codec
+
+    factory = _CODECS.get(name)
+    if factory is None:
+        raise LookupError(f"Unknown JSON codec {name!r}, registered: {', '.join(_CODECS)}")
+    _codec = factory()
+    return _codec
+
+
+def get_codec() -> JsonCodec:
+    return _codec or configure("json")
+
+
+def loads(data: typing.Union[bytes, bytearray, memoryview]) -> typing.Any:
+    return (_codec or configure("json")).loads(data)
+
+
+def dumps(obj: typing.Any) -> bytes:
+    return (_codec or configure("json")).dumps(obj)
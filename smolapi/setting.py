@@ -1,74 +1,132 @@
-from collections.abc import MutableMapping, Mapping
+import importlib.util
+import os
+import re
 import typing
-import importlib
-import inspect
-from smolapi.utils import get_dict_item
-from smolapi.core_object import SingletonInstance
 
 
-__all__ = ["LazySetting"]
+__all__ = ["LazySetting", "Settings", "settings"]
 
-_SETTING_KEY = "app_setting"
+_SETTING_NAME = re.compile(r"^[A-Z][A-Z0-9]*(?:_[A-Z0-9]+)*$")
+_ENV_PREFIX = "SMOLAPI_"
 
 
-#TODO: Improve to avoid using globals object, since globals is shit, mostly...
-class GlobalSetting(object):
-    """
-    Global setting mapping using globals instance
-    All the settings will be map with global object, with specific key mentioned
-    
-    Args:
-        object (_type_): _description_
-
-    Returns:
-        _type_: _description_
+class Settings(object):
     """
+    Read only snapshot of the project settings
 
-    __metaclass__ = SingletonInstance
+    Values live as class attributes of a subclass built by `LazySetting`, so
+    `settings.X` is a plain attribute load. Loading or reloading swaps the
+    class of the shared `settings` instance in one assignment, readers see
+    either the old or the new snapshot, never a mix of both.
+    Missing settings read as None.
+    """
 
-    def __init__(self) -> None:
-        
-        if not globals().get(_SETTING_KEY):
-            globals()[_SETTING_KEY] = {}
+    __slots__ = ()
 
-    def __getattribute__(self, __key: str) -> typing.Any:
-        return get_dict_item(globals(), f"{_SETTING_KEY}.{__key}", deep=True)
+    def __getattr__(self, __key: str) -> typing.Any:
+        # Only reached when the setting is not defined
+        if __key.startswith("__"):
+            raise AttributeError(__key)
+        return None
 
     def __setattr__(self, __name: str, __value: typing.Any) -> None:
-        globals()[_SETTING_KEY][__name] = __value
+        raise AttributeError("Settings are read only, use LazySetting.reload to change them")
+
+    def __delattr__(self, __name: str) -> None:
+        raise AttributeError("Settings are read only, use LazySetting.reload to change them")
+
+    def __dict__(self) -> dict:
+        return {
+            key: value
+            for key, value in vars(type(self)).items()
+            if _SETTING_NAME.match(key)
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.__dict__()!r})"
 
-    def __dict__() -> dict:
-        return globals()[_SETTING_KEY]
+
+def _parse_env(value: str, current: typing.Any) -> typing.Any:
+    if isinstance(current, str):
+        return value
+    if isinstance(current, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(current, (int, float)):
+        return type(current)(value)
+    import json
+
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
 
 
 class LazySetting(object):
-    """Somewhat idiotic way of config global setting
-    
+    """Loads settings.py of the project into the shared `settings` snapshot
+
     Raises:
         LookupError: Failed to find settings.py module in project
     """
 
-    __root = globals().get("app_root")
+    __root: typing.Optional[str] = None
 
     def __init__(self) -> None:
         super().__init__()
 
     @classmethod
-    def load_setting(cls):
-        # print(cls.__root)
-        setting_module = inspect.getmodulename(f"{cls.__root}/settings.py")
-        if not setting_module:
+    def load_setting(cls, root: typing.Optional[str] = None) -> Settings:
+        """
+        Read UPPER_CASE names of `<root>/settings.py`, apply `SMOLAPI_<NAME>`
+        environment overrides and publish the result as the new snapshot
+
+        Args:
+            root (str, optional): Project root directory. Defaults to the last loaded root.
+
+        Raises:
+            LookupError: settings.py is missing
+
+        Returns:
+            Settings: The shared settings instance
+        """
+        if root is not None:
+            cls.__root = root
+        values = cls._read_module(cls.__root)
+
+        for key, value in os.environ.items():
+            if not key.startswith(_ENV_PREFIX):
+                continue
+            name = key[len(_ENV_PREFIX):]
+            if _SETTING_NAME.match(name):
+                values[name] = _parse_env(value, values.get(name))
+
+        # Values are class attributes, functions and other descriptors must not bind to the instance
+        attributes = {
+            name: staticmethod(value) if hasattr(type(value), "__get__") else value for name, value in values.items()
+        }
+        snapshot = type("Settings", (Settings,), {"__slots__": (), **attributes})
+        # Atomic swap, the instance imported everywhere now reads the new values
+        object.__setattr__(settings, "__class__", snapshot)
+        return settings
+
+    @classmethod
+    def reload(cls) -> Settings:
+        return cls.load_setting()
+
+    @staticmethod
+    def _read_module(root: typing.Optional[str]) -> typing.Dict[str, typing.Any]:
+        path = os.path.join(root or os.getcwd(), "settings.py")
+        if not os.path.isfile(path):
             raise LookupError(
                 f"Can't find settings file, make sure to include settings.py in your project"
             )
-        
-        module = importlib.import_module(setting_module)
-        g = GlobalSetting()
-        
-        import re
-        for k, v in module.__dict__.items():
-            if re.match(r"^[A-Z]+(?:_[A-Z]+)*$", k):
-                setattr(g, k, v)
+        spec = importlib.util.spec_from_file_location("settings", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return {
+            key: value
+            for key, value in vars(module).items()
+            if _SETTING_NAME.match(key)
+        }
 
 
-settings = GlobalSetting()
+settings = Settings()
@@ -0,0 +1,173 @@
+import contextlib
+import sys
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from importlib.machinery import ModuleSpec
+
+
+__all__ = ["StartupReport", "record_startup"]
+
+
+class StartupReport:
+    """
+    Time spent importing modules and running each startup step
+
+    Imports are recorded like `python -X importtime`: cumulative time
+    includes nested imports, self time doesn't. Providers start concurrently
+    inside the "providers" step, their own times are listed apart.
+    """
+
+    def __init__(self) -> None:
+        # (module, self seconds, cumulative seconds), in import order
+        self.imports: typing.List[typing.Tuple[str, float, float]] = []
+        # (step name, seconds), in run order
+        self.steps: typing.List[typing.Tuple[str, float]] = []
+        # (provider name, seconds), in completion order
+        self.providers: typing.List[typing.Tuple[str, float]] = []
+        # Self time of imports made outside any step, the ones inside are part of the step time
+        self.outside_import_time = 0.0
+        self._open_steps = 0
+
+    @property
+    def import_time(self) -> float:
+        return sum(self_time for _, self_time, _ in self.imports)
+
+    @property
+    def step_time(self) -> float:
+        return sum(seconds for _, seconds in self.steps)
+
+    @property
+    def total(self) -> float:
+        """Imports outside steps plus steps, each import counted once"""
+        return self.outside_import_time + self.step_time
+
+    @contextlib.contextmanager
+    def step(self, name: str) -> typing.Iterator[None]:
+        started = time.perf_counter()
+        self._open_steps += 1
+        try:
+            yield
+        finally:
+            self._open_steps -= 1
+            self.steps.append((name, time.perf_counter() - started))
+
+    def merge(self, other: "StartupReport") -> "StartupReport":
+        self.imports += other.imports
+        self.steps += other.steps
+        self.providers += other.providers
+        self.outside_import_time += other.outside_import_time
+        return self
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "total_ms": self.total * 1000,
+            "import_ms": self.import_time * 1000,
+            "outside_import_ms": self.outside_import_time * 1000,
+            "steps_ms": self.step_time * 1000,
+            "imports": [
+                {"module": module, "self_ms": self_time * 1000, "cumulative_ms": cumulative * 1000}
+                for module, self_time, cumulative in self.imports
+            ],
+            "steps": [{"name": name, "ms": seconds * 1000} for name, seconds in self.steps],
+            "providers": [{"name": name, "ms": seconds * 1000} for name, seconds in self.providers],
+        }
+
+    def format(self, top: int = 20) -> str:
+        lines = [
+            f"startup total {self.total * 1000:9.2f} ms "
+            f"(imports outside steps {self.outside_import_time * 1000:.2f} ms, "
+            f"steps {self.step_time * 1000:.2f} ms, all imports {self.import_time * 1000:.2f} ms)",
+            "",
+            "steps:",
+        ]
+        for name, seconds in self.steps:
+            lines.append(f"  {seconds * 1000:9.2f} ms  {name}")
+        if self.providers:
+            lines += ["", "providers:"]
+            for name, seconds in self.providers:
+                lines.append(f"  {seconds * 1000:9.2f} ms  {name}")
+        lines += ["", f"slowest imports (self time, top {top}):"]
+        for module, self_time, cumulative in sorted(self.imports, key=lambda item: -item[1])[:top]:
+            lines.append(f"  {self_time * 1000:9.2f} ms  {cumulative * 1000:9.2f} ms cumulative  {module}")
+        return "\n".join(lines)
+
+
+class _TimedLoader:
+    def __init__(self, loader: typing.Any, finder: "_ImportTimer") -> None:
+        self._loader = loader
+        self._finder = finder
+
+    def __getattr__(self, name: str) -> typing.Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: "ModuleSpec") -> typing.Any:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: typing.Any) -> None:
+        self._finder.enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._finder.leave(module.__name__)
+
+
+class _ImportTimer:
+    """
+    Meta path finder wrapping the loader of every module imported while installed
+
+    Only `find_spec` is needed on sys.meta_path, the importlib.abc base
+    would import importlib.resources and tempfile just to be subclassed.
+    """
+
+    def __init__(self, report: StartupReport) -> None:
+        self._report = report
+        # Start time and time spent in nested imports, per module being executed
+        self._stack: typing.List[typing.List[float]] = []
+
+    def find_spec(
+        self, fullname: str, path: typing.Any = None, target: typing.Any = None
+    ) -> typing.Optional["ModuleSpec"]:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def enter(self) -> None:
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def leave(self, name: str) -> None:
+        started, nested = self._stack.pop()
+        cumulative = time.perf_counter() - started
+        if self._stack:
+            self._stack[-1][1] += cumulative
+        report = self._report
+        report.imports.append((name, cumulative - nested, cumulative))
+        if not report._open_steps:
+            report.outside_import_time += cumulative - nested
+
+
+@contextlib.contextmanager
+def record_startup(report: typing.Optional[StartupReport] = None) -> typing.Iterator[StartupReport]:
+    """
+    Record every module imported inside the block
+
+    Args:
+        report (StartupReport, optional): Report to add to. Defaults to a new one.
+
+    Yields:
+        StartupReport: Report being filled
+    """
+    report = report if report is not None else StartupReport()
+    timer = _ImportTimer(report)
+    sys.meta_path.insert(0, timer)
+    try:
+        yield report
+    finally:
+        sys.meta_path.remove(timer)
@@ -29,3 +29,53 @@ def get_dict_item(
             __key.split("."),
             __d,
         )
+
+
+def parse_header_options(value: str) -> typing.Tuple[str, typing.Dict[str, str]]:
+    """
+    Split a header such as content-type or content-disposition into its
+    main value and `key=value` parameters
+
+    Args:
+        value (str): Header value, e.g. `form-data; name="file"; filename="a;b.txt"`
+
+    Returns:
+        Tuple[str, Dict[str, str]]: Main value and parameters with lowercase keys, quotes removed
+    """
+    main, separator, rest = value.partition(";")
+    params: typing.Dict[str, str] = {}
+    if not separator:
+        return main.strip(), params
+
+    length = len(rest)
+    index = 0
+    while index < length:
+        end = rest.find("=", index)
+        if end < 0:
+            break
+        key = rest[index:end].strip().lower()
+        index = end + 1
+        while index < length and rest[index] == " ":
+            index += 1
+        if index < length and rest[index] == '"':
+            # Quoted string, ";" inside it does not end the parameter
+            chars = []
+            index += 1
+            while index < length and rest[index] != '"':
+                if rest[index] == "\\" and index + 1 < length:
+                    index += 1
+                chars.append(rest[index])
+                index += 1
+            item = "".join(chars)
+            end = rest.find(";", index)
+        else:
+            end = rest.find(";", index)
+            item = rest[index:] if end < 0 else rest[index:end]
+            item = item.strip()
+        if key:
+            params[key] = item
+        if end < 0:
+            break
+        index = end + 1
+
+    return main.strip(), params
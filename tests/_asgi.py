@@ -0,0 +1,71 @@
+"""Drive an ASGI application in tests, no server or socket"""
+import asyncio
+import typing
+
+from smolapi.types import Message
+
+
+class Result:
+    """Messages sent for one request, with the status, headers and body joined"""
+
+    def __init__(self, messages: typing.List[Message]) -> None:
+        self.messages = messages
+        start = messages[0]
+        self.status: int = start["status"]
+        self.raw_headers: typing.List[typing.Tuple[bytes, bytes]] = list(start.get("headers", []))
+        self.body = b"".join(message.get("body", b"") for message in messages[1:])
+
+    def header(self, name: str) -> typing.Optional[str]:
+        values = self.headers(name)
+        return values[0] if values else None
+
+    def headers(self, name: str) -> typing.List[str]:
+        key = name.lower().encode("latin-1")
+        return [value.decode("latin-1") for header, value in self.raw_headers if header == key]
+
+
+async def call(
+    app: typing.Callable,
+    method: str = "GET",
+    path: str = "/",
+    headers: typing.Optional[typing.Dict[str, str]] = None,
+    body: bytes = b"",
+    query_string: bytes = b"",
+    client: typing.Tuple[str, int] = ("127.0.0.1", 50000),
+    extensions: typing.Optional[typing.Dict[str, typing.Any]] = None,
+) -> Result:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("latin-1"),
+        "query_string": query_string,
+        "root_path": "",
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in (headers or {}).items()],
+        "client": client,
+        "server": ("127.0.0.1", 8000),
+        "extensions": extensions or {},
+    }
+    sent = False
+
+    async def receive() -> Message:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    messages: typing.List[Message] = []
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return Result(messages)
+
+
+def request(app: typing.Callable, *args: typing.Any, **kwargs: typing.Any) -> Result:
+    return asyncio.run(call(app, *args, **kwargs))
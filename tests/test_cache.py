@@ -0,0 +1,104 @@
+import asyncio
+
+from smolapi.application import Application
+from smolapi.cache import Cache, MemoryCache
+from smolapi.middleware import BaseMiddleware
+from smolapi.request import Request
+from smolapi.response import PlainTextResponse
+from smolapi.routing import Route
+
+from ._asgi import call, request
+
+
+def _counting_app(cache: Cache, middlewares=None, delay: float = 0):
+    calls = []
+
+    async def items(request):
+        calls.append(request.query.get("page"))
+        if delay:
+            await asyncio.sleep(delay)
+        return PlainTextResponse(f"page {request.query.get('page')}")
+
+    app = Application(".", routes=[Route.get("/items", items, cache=cache, middlewares=middlewares)])
+    return app, calls
+
+
+def test_hit_serves_stored_response():
+    app, calls = _counting_app(Cache(ttl=60, backend=MemoryCache()))
+
+    first = request(app, "GET", "/items", query_string=b"page=1")
+    second = request(app, "GET", "/items", query_string=b"page=1")
+    other = request(app, "GET", "/items", query_string=b"page=2")
+
+    assert first.body == second.body == b"page 1"
+    assert other.body == b"page 2"
+    assert calls == ["1", "2"]
+    assert second.header("etag") == first.header("etag")
+
+
+def test_if_none_match_gets_304():
+    app, _ = _counting_app(Cache(ttl=60, backend=MemoryCache()))
+    etag = request(app, "GET", "/items").header("etag")
+
+    result = request(app, "GET", "/items", headers={"if-none-match": f"W/{etag}"})
+
+    assert result.status == 304
+    assert result.body == b""
+    assert result.header("content-length") is None
+
+
+def test_concurrent_misses_run_handler_once():
+    app, calls = _counting_app(Cache(ttl=60, backend=MemoryCache()), delay=0.05)
+
+    async def main():
+        return await asyncio.gather(*(call(app, "GET", "/items") for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert calls == [None]
+    assert {result.body for result in results} == {b"page None"}
+
+
+def test_middleware_mutating_cached_response_does_not_leak():
+    class Session(BaseMiddleware):
+        async def dispatch(self, request, call_next):
+            response = await call_next(request)
+            response.set_cookie("sid", request.headers.get("x-user"))
+            return response
+
+    app, _ = _counting_app(Cache(ttl=60, backend=MemoryCache()), middlewares=[Session()])
+
+    cookies = [
+        request(app, "GET", "/items", headers={"x-user": user}).headers("set-cookie")
+        for user in ("alice", "bob", "carol")
+    ]
+
+    assert [[cookie.split(";")[0] for cookie in values] for values in cookies] == [
+        ["sid=alice"],
+        ["sid=bob"],
+        ["sid=carol"],
+    ]
+
+
+def test_escaped_separators_do_not_share_a_key():
+    async def echo(request):
+        return PlainTextResponse(repr(sorted((name, request.query.getlist(name)) for name in request.query)))
+
+    app = Application(".", routes=[Route.get("/echo", echo, cache=Cache(ttl=60, backend=MemoryCache()))])
+
+    first = request(app, "GET", "/echo", query_string=b"a%3Db=c")
+    second = request(app, "GET", "/echo", query_string=b"a=b%3Dc")
+
+    assert first.body == b"[('a=b', ['c'])]"
+    assert second.body == b"[('a', ['b=c'])]"
+
+
+def test_vary_header_values_are_kept_apart():
+    cache = Cache(ttl=60, vary=["x-a", "x-b"], backend=MemoryCache())
+
+    def key(headers):
+        scope = {"type": "http", "query_string": b"", "headers": headers}
+        return cache.key("route", Request(scope, None, None))
+
+    assert key([(b"x-a", b"1,2")]) != key([(b"x-a", b"1"), (b"x-a", b"2")])
+    assert key([(b"x-a", b"1")]) != key([(b"x-b", b"1")])
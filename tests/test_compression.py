@@ -0,0 +1,107 @@
+import gzip
+import zlib
+
+from smolapi.application import Application
+from smolapi.compression import Compression, _negotiate
+from smolapi.response import FileResponse, PlainTextResponse, Response, StreamingResponse
+from smolapi.routing import Route
+
+from ._asgi import request
+
+TEXT = b"hello compression " * 100
+
+
+def _app(function):
+    return Application(".", routes=[Route.get("/", function, middlewares=[Compression(encodings=["gzip", "deflate"])])])
+
+
+def test_negotiate_prefers_quality_then_server_order():
+    assert _negotiate(b"gzip, deflate", ("gzip", "deflate")) == "gzip"
+    assert _negotiate(b"gzip;q=0.5, deflate", ("gzip", "deflate")) == "deflate"
+    assert _negotiate(b"*;q=0.2, gzip;q=0", ("gzip", "deflate")) == "deflate"
+    assert _negotiate(b"identity", ("gzip", "deflate")) is None
+
+
+def test_compresses_text_and_sets_headers():
+    async def text(request):
+        return PlainTextResponse(TEXT.decode(), headers={"etag": '"abc"'})
+
+    result = request(_app(text), headers={"accept-encoding": "gzip"})
+
+    assert result.header("content-encoding") == "gzip"
+    assert result.header("content-length") is None
+    assert result.header("vary") == "accept-encoding"
+    assert result.header("etag") == 'W/"abc"'
+    assert gzip.decompress(result.body) == TEXT
+
+
+def test_skips_small_bodies_images_and_clients_without_encoding():
+    async def small(request):
+        return PlainTextResponse("tiny")
+
+    async def image(request):
+        return Response(TEXT, media_type="image/png")
+
+    async def text(request):
+        return PlainTextResponse(TEXT.decode())
+
+    assert request(_app(small), headers={"accept-encoding": "gzip"}).header("content-encoding") is None
+    assert request(_app(image), headers={"accept-encoding": "gzip"}).header("content-encoding") is None
+    assert request(_app(text)).body == TEXT
+
+
+def test_streaming_chunks_are_flushed_one_by_one():
+    async def stream(request):
+        async def chunks():
+            for index in range(4):
+                yield b"chunk %d " % index * 50
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    result = request(_app(stream), headers={"accept-encoding": "deflate"})
+
+    decompressor = zlib.decompressobj()
+    parts = [decompressor.decompress(message["body"]) for message in result.messages[1:]]
+    assert parts[:4] == [b"chunk %d " % index * 50 for index in range(4)]
+    assert zlib.decompress(result.body) == b"".join(parts)
+
+
+def test_file_response_is_compressed_instead_of_pathsend(tmp_path):
+    path = tmp_path / "page.txt"
+    path.write_bytes(TEXT)
+
+    async def page(request):
+        return FileResponse(str(path))
+
+    result = request(
+        _app(page), headers={"accept-encoding": "gzip"}, extensions={"http.response.pathsend": {}}
+    )
+
+    assert [message["type"] for message in result.messages][0] == "http.response.start"
+    assert result.header("content-encoding") == "gzip"
+    assert gzip.decompress(result.body) == TEXT
+
+
+def test_held_start_is_sent_before_other_messages():
+    async def raw(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.pathsend", "path": "/dev/null"})
+
+    async def handler(request):
+        return raw
+
+    result = request(_app(handler), headers={"accept-encoding": "gzip"})
+
+    assert [message["type"] for message in result.messages] == ["http.response.start", "http.response.pathsend"]
+    assert result.header("content-encoding") is None
+
+
+def test_malformed_content_length_is_passed_through():
+    async def malformed(request):
+        return PlainTextResponse(TEXT.decode(), headers={"content-length": "many"})
+
+    result = request(_app(malformed), headers={"accept-encoding": "gzip"})
+
+    assert result.status == 200
+    assert result.header("content-encoding") is None
+    assert result.body == TEXT
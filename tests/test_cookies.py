@@ -0,0 +1,73 @@
+import datetime
+
+import pytest
+
+from smolapi.request import Cookie
+from smolapi.response import PlainTextResponse, _cookie_attributes
+
+
+def _cookies(response) -> list:
+    return [value.decode("latin-1") for name, value in response.raw_headers if name == b"set-cookie"]
+
+
+def test_parse_cookie_header():
+    cookie = Cookie(raw=[(b"cookie", b'session=abc123; theme=dark; quoted="a\\073b"; empty=')])
+
+    assert cookie["session"] == "abc123"
+    assert cookie.get("theme") == "dark"
+    assert cookie["quoted"] == "a;b"
+    assert cookie["empty"] == ""
+    assert "missing" not in cookie
+    with pytest.raises(KeyError):
+        cookie["missing"]
+
+
+def test_set_cookie_attributes():
+    response = PlainTextResponse("ok")
+    response.set_cookie("sid", "abc", max_age=60, domain="example.com", secure=True, httponly=True, samesite="strict")
+
+    assert _cookies(response) == [
+        "sid=abc; Max-Age=60; Domain=example.com; Path=/; Secure; HttpOnly; SameSite=Strict"
+    ]
+
+
+def test_set_cookie_quotes_values_and_round_trips():
+    response = PlainTextResponse("ok")
+    response.set_cookie("data", 'a;b "c"')
+
+    header = _cookies(response)[0].split("; ")[0]
+
+    assert Cookie(raw=[(b"cookie", header.encode("latin-1"))])["data"] == 'a;b "c"'
+
+
+def test_expires_date_and_relative_seconds():
+    response = PlainTextResponse("ok")
+    response.set_cookie("a", "1", expires=datetime.datetime(2030, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc))
+    response.set_cookie("b", "1", expires=3600)
+
+    first, second = _cookies(response)
+
+    assert "Expires=Wed, 02 Jan 2030 03:04:05 GMT" in first
+    assert "Expires=" in second
+
+
+def test_relative_expires_does_not_miss_attribute_cache():
+    response = PlainTextResponse("ok")
+    response.set_cookie("warm", "1", expires=10)
+    misses = _cookie_attributes.cache_info().misses
+
+    for seconds in range(50):
+        response.set_cookie("sid", "1", expires=seconds + 0.5)
+
+    assert _cookie_attributes.cache_info().misses == misses
+
+
+def test_delete_cookie_and_invalid_values():
+    response = PlainTextResponse("ok")
+    response.delete_cookie("sid")
+
+    assert _cookies(response) == ["sid=; Expires=Thu, 01 Jan 1970 00:00:00 GMT; Max-Age=0; Path=/; SameSite=Lax"]
+    with pytest.raises(ValueError):
+        response.set_cookie("bad name", "x")
+    with pytest.raises(ValueError):
+        response.set_cookie("sid", "x", samesite="sometimes")
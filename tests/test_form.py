@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import pytest
+
+from smolapi.exceptions import HttpException
+from smolapi.form import UploadFile, parse_multipart, parse_urlencoded
+
+from .test_request import _request
+
+
+def _multipart(*parts: bytes) -> bytes:
+    return b"".join(b"--b\r\n" + part + b"\r\n" for part in parts) + b"--b--\r\n"
+
+
+async def _chunks(body: bytes, size: int = 7):
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+def test_fields_and_files():
+    body = _multipart(
+        b'Content-Disposition: form-data; name="title"\r\n\r\nhello',
+        b'Content-Disposition: form-data; name="doc"; filename="a.txt"\r\nContent-Type: text/plain\r\n\r\nfile body',
+    )
+
+    async def main():
+        form = await parse_multipart(_chunks(body), "b")
+        try:
+            return form["title"], await form["doc"].read()
+        finally:
+            await form.close()
+
+    assert asyncio.run(main()) == ("hello", b"file body")
+
+
+def test_field_over_limit_is_a_413():
+    body = _multipart(b'Content-Disposition: form-data; name="big"\r\n\r\n' + b"x" * 100)
+
+    with pytest.raises(HttpException) as info:
+        asyncio.run(parse_multipart(_chunks(body), "b", max_field_size=50))
+    assert info.value.status_code == 413
+
+
+def test_files_are_not_bound_by_field_limit():
+    body = _multipart(b'Content-Disposition: form-data; name="f"; filename="f.bin"\r\n\r\n' + b"x" * 100)
+
+    async def main():
+        form = await parse_multipart(_chunks(body), "b", max_field_size=50)
+        size = form["f"].size
+        await form.close()
+        return size
+
+    assert asyncio.run(main()) == 100
+
+
+@pytest.mark.parametrize("content_type", [
+    "text/plain; charset=no-such-charset",
+    "multipart/form-data; boundary=b; charset=no-such-charset",
+])
+def test_unknown_charset_is_a_415(content_type):
+    request = _request(_multipart(b'Content-Disposition: form-data; name="a"\r\n\r\nb'), {"content-type": content_type})
+
+    with pytest.raises(HttpException) as info:
+        asyncio.run(request.body())
+    assert info.value.status_code == 415
+
+
+def test_write_crossing_spool_size_runs_in_executor():
+    upload = UploadFile("a.bin", spool_size=10)
+    threads = []
+    write = upload.file.write
+
+    def recording(data):
+        threads.append(threading.current_thread() is threading.main_thread())
+        return write(data)
+
+    upload.file.write = recording
+
+    async def main():
+        await upload.write(b"x" * 6)
+        await upload.write(b"x" * 6)
+        await upload.write(b"x" * 6)
+        await upload.seek(0)
+        data = await upload.read()
+        await upload.close()
+        return data
+
+    assert asyncio.run(main()) == b"x" * 18
+    assert threads == [True, False, False]
+
+
+def test_urlencoded_pairs_split_across_chunks():
+    async def main():
+        form = await parse_urlencoded(_chunks(b"a=1&b=hello+world&c=%26&a=2", size=3))
+        return form.getlist("a"), form["b"], form["c"]
+
+    assert asyncio.run(main()) == (["1", "2"], "hello world", "&")
+
+
+def test_urlencoded_field_over_limit_is_a_413():
+    with pytest.raises(HttpException) as info:
+        asyncio.run(parse_urlencoded(_chunks(b"a=1&big=" + b"x" * 100), max_field_size=50))
+    assert info.value.status_code == 413
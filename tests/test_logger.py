@@ -0,0 +1,83 @@
+import io
+import json
+
+from smolapi.application import Application
+from smolapi.logger import AccessLog, Logger, LogWriter
+from smolapi.response import PlainTextResponse
+from smolapi.routing import Route
+
+from ._asgi import request
+
+
+class BrokenStream(io.StringIO):
+    def write(self, data):
+        raise OSError("disk full")
+
+
+def _lines(stream: io.StringIO):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_full_queue_drops_new_records():
+    stream = io.StringIO()
+    writer = LogWriter(stream, max_queue=3, batch_size=100, flush_interval=60)
+    logger = Logger("test", writer=writer)
+
+    for index in range(5):
+        logger.info("event", index=index)
+    writer.close()
+
+    assert writer.dropped == 2
+    assert writer.written == 3
+    assert [line["index"] for line in _lines(stream)] == [0, 1, 2]
+
+
+def test_closed_writer_drops_records():
+    writer = LogWriter(io.StringIO(), flush_interval=60)
+    writer.close()
+
+    assert writer.submit((0, 0.0, "INFO", "test", "late", {})) is False
+    assert writer.dropped == 1
+
+
+def test_failed_write_counts_the_batch_as_dropped():
+    writer = LogWriter(BrokenStream(), batch_size=10, flush_interval=60)
+    logger = Logger("test", writer=writer)
+
+    logger.info("a")
+    logger.info("b")
+    writer.close()
+
+    assert writer.dropped == 2
+    assert writer.written == 0
+
+
+def test_records_below_level_are_skipped():
+    stream = io.StringIO()
+    writer = LogWriter(stream, flush_interval=60)
+    logger = Logger("test", level="WARNING", writer=writer)
+
+    logger.info("skipped")
+    logger.error("kept", code=7)
+    writer.close()
+
+    assert [(line["level"], line["msg"], line["code"]) for line in _lines(stream)] == [("ERROR", "kept", 7)]
+
+
+def test_access_log_keeps_server_errors_when_sampled_out():
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    async def broken(request):
+        return PlainTextResponse("no", status_code=503)
+
+    stream = io.StringIO()
+    writer = LogWriter(stream, flush_interval=60)
+    access_log = AccessLog(sample_rate=0, writer=writer)
+    app = Application(".", routes=[Route.get("/ok", ok), Route.get("/broken", broken)], access_log=access_log)
+
+    request(app, "GET", "/ok")
+    request(app, "GET", "/broken")
+    writer.close()
+
+    assert [(line["type"], line["path"], line["status"]) for line in _lines(stream)] == [("access", "/broken", 503)]
@@ -0,0 +1,77 @@
+import pytest
+
+from smolapi.application import Application
+from smolapi.exceptions import HttpException
+from smolapi.metrics import Metrics, RouteMetrics, _BUCKET_BOUNDS, _bucket
+from smolapi.response import PlainTextResponse
+from smolapi.routing import Route
+
+from ._asgi import request
+
+
+@pytest.mark.parametrize("seconds", [0, 0.5e-6, 1e-6, 3e-6, 1e-3, 0.25, 30.0])
+def test_bucket_upper_bound_is_above_the_duration(seconds):
+    index = _bucket(seconds)
+
+    assert seconds < _BUCKET_BOUNDS[index]
+    assert index == 0 or seconds >= _BUCKET_BOUNDS[index - 1]
+
+
+def test_slowest_durations_go_to_the_last_bucket():
+    assert _bucket(1e6) == len(_BUCKET_BOUNDS)
+
+
+def test_quantile_is_upper_bound_of_its_bucket():
+    metrics = RouteMetrics("items")
+    for _ in range(99):
+        metrics.observe(2, 3e-6)
+    metrics.observe(2, 1e-3)
+
+    assert metrics.count("handler") == 100
+    assert metrics.quantile("handler", 0.5) == 4e-6
+    assert metrics.quantile("handler", 1.0) == _BUCKET_BOUNDS[_bucket(1e-3)]
+    assert metrics.quantile("body", 0.5) == 0.0
+
+
+def test_prometheus_text_format():
+    metrics = Metrics()
+    route = metrics.route('say "hi"')
+    route.statuses[1] = 2
+    route.observe(0, 0.5e-6)
+    route.observe(0, 3e-6)
+    metrics.unmatched = 1
+
+    lines = metrics.prometheus().splitlines()
+
+    assert 'smolapi_requests_total{route="say \\"hi\\"",status="2xx"} 2' in lines
+    assert "smolapi_unmatched_requests_total 1" in lines
+    labels = 'route="say \\"hi\\"",phase="routing"'
+    assert f'smolapi_request_phase_seconds_bucket{{{labels},le="1e-06"}} 1' in lines
+    assert f'smolapi_request_phase_seconds_bucket{{{labels},le="2e-06"}} 1' in lines
+    assert f'smolapi_request_phase_seconds_bucket{{{labels},le="4e-06"}} 2' in lines
+    assert f'smolapi_request_phase_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"smolapi_request_phase_seconds_count{{{labels}}} 2" in lines
+    assert "# TYPE smolapi_request_phase_seconds histogram" in lines
+
+
+def test_instrumented_routes_count_requests_by_status_class():
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    async def missing(request):
+        raise HttpException(404)
+
+    metrics = Metrics()
+    app = Application(".", routes=[Route.get("/ok", ok), Route.get("/missing", missing)], metrics=metrics)
+
+    request(app, "GET", "/ok")
+    request(app, "GET", "/ok")
+    request(app, "GET", "/missing")
+    request(app, "GET", "/nowhere")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["unmatched"] == 1
+    assert snapshot["routes"]["get.head.ok"]["statuses"]["2xx"] == 2
+    assert snapshot["routes"]["get.head.missing"]["statuses"]["4xx"] == 1
+    assert snapshot["routes"]["get.head.ok"]["phases"]["handler"]["count"] == 2
+    assert len(metrics.slowest_requests()) == 3
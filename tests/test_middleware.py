@@ -0,0 +1,96 @@
+from smolapi.application import Application
+from smolapi.exceptions import HttpException
+from smolapi.middleware import BaseMiddleware
+from smolapi.response import PlainTextResponse, StreamingResponse
+from smolapi.routing import Route, Router
+
+from ._asgi import request
+
+
+class Recording(BaseMiddleware):
+    def __init__(self, name, calls, required_header=None):
+        self.name = name
+        self.calls = calls
+        self.required_header = required_header
+
+    async def dispatch(self, request, call_next):
+        self.calls.append(self.name)
+        if self.required_header and request.headers.get(self.required_header) is None:
+            raise HttpException(401)
+        response = await call_next(request)
+        response.raw_headers.append((b"x-seen-by", self.name.encode()))
+        return response
+
+
+def _asgi_recording(name, calls):
+    def middleware(app):
+        async def recorded(scope, receive, send):
+            calls.append(name)
+            await app(scope, receive, send)
+
+        return recorded
+
+    return middleware
+
+
+async def _echo(request):
+    return PlainTextResponse(bytes(await request.body_bytes()))
+
+
+def test_middlewares_run_in_declared_order_whatever_their_kind():
+    calls = []
+    router = Router(
+        Route.post("/items", _echo, middlewares=[_asgi_recording("route-asgi", calls), Recording("route", calls)]),
+        middlewares=[_asgi_recording("router-asgi", calls), Recording("router-auth", calls)],
+    )
+    app = Application(".", routes=[router])
+
+    result = request(app, "POST", "/items", body=b"payload")
+
+    assert calls == ["router-asgi", "router-auth", "route-asgi", "route"]
+    assert result.body == b"payload"
+    assert result.headers("x-seen-by") == ["route", "router-auth"]
+
+
+def test_outer_request_middleware_stops_inner_asgi_middleware():
+    calls = []
+    router = Router(
+        Route.get("/items", _echo, middlewares=[_asgi_recording("route-asgi", calls)]),
+        middlewares=[Recording("router-auth", calls, required_header="authorization")],
+    )
+    app = Application(".", routes=[router])
+
+    refused = request(app, "GET", "/items")
+    allowed = request(app, "GET", "/items", headers={"authorization": "yes"})
+
+    assert refused.status == 401
+    assert allowed.status == 200
+    assert calls == ["router-auth", "router-auth", "route-asgi"]
+
+
+def test_body_read_outside_reaches_inner_asgi_app():
+    class Peek(BaseMiddleware):
+        async def dispatch(self, request, call_next):
+            assert await request.body_bytes() == b"data"
+            return await call_next(request)
+
+    app = Application(".", routes=[Route.post("/", _echo, middlewares=[Peek(), _asgi_recording("asgi", [])])])
+
+    assert request(app, "POST", "/", body=b"data").body == b"data"
+
+
+def test_streamed_response_passes_through_adapter():
+    async def stream(request):
+        async def chunks():
+            yield b"a"
+            yield b"b"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    middlewares = [Recording("outer", []), _asgi_recording("asgi", [])]
+    app = Application(".", routes=[Route.get("/", stream, middlewares=middlewares)])
+
+    result = request(app, "GET", "/")
+
+    assert result.body == b"ab"
+    assert result.header("x-seen-by") == "outer"
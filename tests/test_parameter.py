@@ -0,0 +1,44 @@
+import dataclasses
+import typing
+
+import pytest
+
+from smolapi.application import Application
+from smolapi.parameter import ValidationError, compile_validator
+from smolapi.response import PlainTextResponse
+from smolapi.routing import Route
+
+from ._asgi import request
+
+
+@dataclasses.dataclass
+class Order:
+    side: typing.Literal["buy", "sell"]
+
+
+def test_literal_accepts_only_its_values():
+    validate = compile_validator(typing.Literal["a", 1])
+
+    assert validate("a") == "a"
+    assert validate(1) == 1
+    with pytest.raises(ValidationError):
+        validate(True)
+    with pytest.raises(ValidationError):
+        validate("b")
+
+
+@pytest.mark.parametrize("value", [["buy"], {"side": "buy"}])
+def test_literal_rejects_unhashable_values(value):
+    with pytest.raises(ValidationError):
+        compile_validator(typing.Literal["buy", "sell"])(value)
+
+
+def test_unhashable_literal_in_body_is_a_422():
+    async def create(order: Order):
+        return PlainTextResponse(order.side)
+
+    app = Application(".", routes=[Route.post("/orders", create)])
+    headers = {"content-type": "application/json"}
+
+    assert request(app, "POST", "/orders", headers=headers, body=b'{"side": "sell"}').body == b"sell"
+    assert request(app, "POST", "/orders", headers=headers, body=b'{"side": ["buy"]}').status == 422
@@ -0,0 +1,139 @@
+import asyncio
+import itertools
+
+import pytest
+
+from smolapi.application import Application
+from smolapi.parameter import Resource
+from smolapi.pool import Pool, PoolTimeout
+from smolapi.response import PlainTextResponse
+from smolapi.routing import Route
+
+from ._asgi import call
+
+
+class FakeConnection:
+    def __init__(self, number: int) -> None:
+        self.number = number
+        self.healthy = True
+        self.closed = False
+
+
+class FakePool(Pool[FakeConnection]):
+    def __init__(self, **options) -> None:
+        super().__init__(**options)
+        self._numbers = itertools.count(1)
+
+    async def create_resource(self) -> FakeConnection:
+        return FakeConnection(next(self._numbers))
+
+    async def close_resource(self, resource: FakeConnection) -> None:
+        resource.closed = True
+
+    async def check_resource(self, resource: FakeConnection) -> bool:
+        return resource.healthy
+
+
+def test_acquire_times_out_when_exhausted():
+    async def main():
+        pool = FakePool(min_size=0, max_size=1, acquire_timeout=0.01)
+        await pool.startup()
+        held = await pool.acquire()
+        with pytest.raises(PoolTimeout):
+            await pool.acquire()
+        assert pool.waiting == 0
+        await pool.release(held)
+        assert await pool.acquire() is held
+        await pool.shutdown()
+        return pool
+
+    pool = asyncio.run(main())
+
+    assert pool.metrics.timeouts == 1
+
+
+def test_release_hands_resource_to_waiter():
+    async def main():
+        pool = FakePool(min_size=0, max_size=1)
+        await pool.startup()
+        held = await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        await pool.release(held)
+        resource = await waiter
+        await pool.shutdown()
+        return held, resource
+
+    held, resource = asyncio.run(main())
+
+    assert resource is held
+
+
+def test_evict_closes_idle_resources_down_to_min_size():
+    async def main():
+        pool = FakePool(min_size=1, max_size=3, idle_timeout=0, check_interval=60)
+        await pool.startup()
+        resources = [await pool.acquire() for _ in range(3)]
+        for resource in resources:
+            await pool.release(resource)
+        await pool.evict()
+        closed = [resource.closed for resource in resources]
+        size = pool.size
+        await pool.shutdown()
+        return pool, closed, size
+
+    pool, closed, size = asyncio.run(main())
+
+    assert pool.metrics.evicted == 2
+    # Oldest released first, the most recently released one is kept
+    assert closed == [True, True, False]
+    assert size == 1
+
+
+def test_failed_health_check_replaces_resource():
+    async def main():
+        pool = FakePool(min_size=1, max_size=2, check_interval=0)
+        await pool.startup()
+        broken = await pool.acquire()
+        broken.healthy = False
+        await pool.release(broken)
+        fresh = await pool.acquire()
+        await pool.shutdown()
+        return pool, broken, fresh
+
+    pool, broken, fresh = asyncio.run(main())
+
+    assert fresh is not broken
+    assert broken.closed
+    assert pool.metrics.failed_checks == 1
+
+
+def test_resource_released_after_response_is_sent():
+    pool = FakePool(min_size=0, max_size=1)
+    in_use_while_sending = []
+
+    async def handler(conn=Resource(pool)):
+        return PlainTextResponse(str(conn.number))
+
+    app = Application(".", routes=[Route.get("/", handler)])
+
+    async def main():
+        await pool.startup()
+
+        async def recording(scope, receive, send):
+            async def watch(message):
+                in_use_while_sending.append(pool.in_use)
+                await send(message)
+
+            await app(scope, receive, watch)
+
+        result = await call(recording, "GET", "/")
+        state = (pool.in_use, pool.idle)
+        await pool.shutdown()
+        return result, state
+
+    result, (in_use, idle) = asyncio.run(main())
+
+    assert result.body == b"1"
+    assert in_use_while_sending == [1, 1]
+    assert (in_use, idle) == (0, 1)
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from smolapi.provider import Provider, ProviderGroup
+
+
+class Recorded(Provider):
+    def __init__(self, name, events, depends_on=(), delay=0.0, startup_timeout=None, fail_shutdown=False):
+        self.name = name
+        self.events = events
+        self.depends_on = depends_on
+        self.delay = delay
+        self.startup_timeout = startup_timeout
+        self.fail_shutdown = fail_shutdown
+
+    async def startup(self):
+        await asyncio.sleep(self.delay)
+        self.events.append(f"start {self.name}")
+
+    async def shutdown(self):
+        self.events.append(f"stop {self.name}")
+        if self.fail_shutdown:
+            raise ConnectionError("gone")
+
+
+def test_dependencies_start_first_and_stop_last():
+    events = []
+    # The dependency is slower, "api" must still wait for it
+    group = ProviderGroup([
+        Recorded("api", events, depends_on=["db"]),
+        Recorded("db", events, delay=0.02),
+        Recorded("cache", events),
+    ])
+
+    async def main():
+        await group.startup()
+        started = list(events)
+        events.clear()
+        await group.shutdown()
+        return started
+
+    started = asyncio.run(main())
+
+    assert started.index("start db") < started.index("start api")
+    assert events.index("stop api") < events.index("stop db")
+    assert sorted(events) == ["stop api", "stop cache", "stop db"]
+
+
+def test_startup_timeout_shuts_down_started_providers():
+    events = []
+    group = ProviderGroup([
+        Recorded("db", events),
+        Recorded("slow", events, depends_on=["db"], delay=1, startup_timeout=0.01),
+    ])
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(group.startup())
+
+    assert events == ["start db", "stop db"]
+
+
+def test_shutdown_failures_are_collected():
+    events = []
+    group = ProviderGroup([
+        Recorded("db", events, fail_shutdown=True),
+        Recorded("api", events, depends_on=["db"], fail_shutdown=True),
+    ])
+
+    async def main():
+        await group.startup()
+        events.clear()
+        await group.shutdown()
+
+    with pytest.raises(RuntimeError, match="api: .*db: "):
+        asyncio.run(main())
+
+    assert events == ["stop api", "stop db"]
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        ProviderGroup([Recorded("a", [], depends_on=["b"]), Recorded("b", [], depends_on=["a"])]).resolve()
+    with pytest.raises(ValueError, match="Unknown"):
+        ProviderGroup([Recorded("a", [], depends_on=["missing"])]).resolve()
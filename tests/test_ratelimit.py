@@ -0,0 +1,97 @@
+import pytest
+
+from smolapi import ratelimit
+from smolapi.application import Application
+from smolapi.ratelimit import MemoryRateLimitBackend, RateLimit
+from smolapi.response import PlainTextResponse
+from smolapi.routing import Route
+
+from ._asgi import request
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_refills_lazily(clock):
+    backend = MemoryRateLimitBackend()
+
+    assert [backend.take("a", 2.0, 2.0) for _ in range(3)] == [0.0, 0.0, 0.5]
+    clock.now += 0.5
+    assert backend.take("a", 2.0, 2.0) == 0.0
+    assert backend.take("a", 2.0, 2.0) == 0.5
+    clock.now += 10
+    # Refill is capped at capacity
+    assert [backend.take("a", 2.0, 2.0) for _ in range(3)] == [0.0, 0.0, 0.5]
+
+
+def test_sweep_drops_full_buckets(clock):
+    backend = MemoryRateLimitBackend(sweep_interval=5)
+    backend.take("idle", 0.25, 2.0)
+    clock.now += 4
+    backend.take("busy", 0.25, 2.0)
+    clock.now += 1.5
+
+    backend.take("new", 0.25, 2.0)
+
+    assert sorted(backend._buckets) == ["busy", "new"]
+    assert backend.take("busy", 0.25, 2.0) == 0.0
+    assert backend.take("busy", 0.25, 2.0) > 0
+
+
+def test_sweep_is_spread_over_requests(clock):
+    backend = MemoryRateLimitBackend(sweep_interval=5)
+    for index in range(10):
+        backend.take(f"idle{index}", 1.0, 2.0)
+    clock.now += 5
+
+    backend.take("busy", 1.0, 2.0)
+    assert len(backend) == 10 - ratelimit._SWEEP_BATCH + 1
+    backend.take("busy", 1.0, 2.0)
+    backend.take("new", 1.0, 2.0)
+
+    # The sweep stops at the first bucket not full again
+    assert list(backend._buckets) == ["busy", "new"]
+    assert backend._next_sweep == clock.now + 5
+
+
+async def _ok(request):
+    return PlainTextResponse("ok")
+
+
+def test_429_with_retry_after(clock):
+    app = Application(".", routes=[Route.get("/", _ok, middlewares=[RateLimit(2, period=10)])])
+
+    statuses = [request(app).status for _ in range(3)]
+    other_client = request(app, client=("10.0.0.2", 1))
+    refused = request(app)
+
+    assert statuses == [200, 200, 429]
+    assert other_client.status == 200
+    assert refused.header("retry-after") == "5"
+
+
+def test_missing_header_falls_back_to_client_address(clock):
+    app = Application(".", routes=[Route.get("/", _ok, middlewares=[RateLimit(1, 60, key="header:x-api-key")])])
+
+    assert request(app, headers={"x-api-key": "a"}).status == 200
+    assert request(app, headers={"x-api-key": "a"}).status == 429
+    assert request(app).status == 200
+    assert request(app).status == 429
+
+
+def test_requests_without_any_key_share_a_bucket(clock):
+    app = Application(".", routes=[Route.get("/", _ok, middlewares=[RateLimit(1, 60, key=lambda request: None)])])
+
+    assert [request(app).status for _ in range(2)] == [200, 429]
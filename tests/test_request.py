@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from smolapi.exceptions import HttpException
+from smolapi.request import Request
+
+
+def _request(body: bytes, headers=None, method: str = "POST") -> Request:
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "query_string": b"",
+        "headers": [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    return Request(scope, receive, None)
+
+
+def test_json_decodes_whatever_the_content_type():
+    request = _request(b'{"a": [1, 2]}', {"content-type": "text/plain"})
+
+    async def main():
+        first = await request.json()
+        return first, await request.json()
+
+    first, second = asyncio.run(main())
+
+    assert first == {"a": [1, 2]}
+    assert second is first
+
+
+def test_json_of_empty_body_is_none():
+    assert asyncio.run(_request(b"").json()) is None
+
+
+def test_invalid_json_is_a_400():
+    with pytest.raises(HttpException) as info:
+        asyncio.run(_request(b"{nope").json())
+    assert info.value.status_code == 400
+
+
+def test_declared_length_over_limit_is_a_413_before_reading():
+    request = _request(b"", {"content-length": "2000000000"})
+
+    with pytest.raises(HttpException) as info:
+        asyncio.run(request.body_bytes(max_body_size=1024))
+
+    assert info.value.status_code == 413
+
+
+def test_default_limit_is_finite():
+    request = _request(b"", {"content-length": str(1 << 40)})
+
+    with pytest.raises(HttpException) as info:
+        asyncio.run(request.body_bytes())
+
+    assert info.value.status_code == 413
+
+
+def test_large_declared_length_is_read_without_preallocation():
+    body = b"x" * (2 * 1024 * 1024)
+    request = _request(body, {"content-length": str(len(body) + 10)})
+
+    assert asyncio.run(request.body_bytes()) == body
+
+
+def test_body_longer_than_content_length_is_a_400():
+    request = _request(b"abcdef", {"content-length": "3"})
+
+    with pytest.raises(HttpException) as info:
+        asyncio.run(request.body_bytes())
+
+    assert info.value.status_code == 400
@@ -0,0 +1,109 @@
+import uuid
+
+import pytest
+
+from smolapi.application import Application
+from smolapi.exceptions import MethodNotAllowed, NotFound
+from smolapi.response import PlainTextResponse
+from smolapi.routing import Route, RouteTree, Router
+
+from ._asgi import request
+
+
+async def _handler(request):
+    return PlainTextResponse("ok")
+
+
+def _tree(*routes: Route) -> RouteTree:
+    return RouteTree(Router(*routes).unpack_route())
+
+
+def test_converters_convert_and_fall_through():
+    tree = _tree(
+        Route.get("/items/{id:int}", _handler, name="by_id"),
+        Route.get("/items/{slug}", _handler, name="by_slug"),
+        Route.get("/files/{rest:path}", _handler, name="file"),
+        Route.get("/objects/{key:uuid}", _handler, name="object"),
+        Route.get("/prices/{value:float}", _handler, name="price"),
+    )
+    key = uuid.uuid4()
+
+    assert tree.match("GET", "/items/42")[1] == {"id": 42}
+    # Non-ASCII digits aren't integers, they fall through to the string route
+    assert tree.match("GET", "/items/\u0661\u0662")[1] == {"slug": "\u0661\u0662"}
+    route, params = tree.match("GET", "/items/latest")
+    assert (route.name, params) == ("by_slug", {"slug": "latest"})
+    assert tree.match("GET", "/files/a/b/c.txt")[1] == {"rest": "a/b/c.txt"}
+    assert tree.match("GET", f"/objects/{key}")[1] == {"key": key}
+    assert tree.match("GET", "/prices/1.5")[1] == {"value": 1.5}
+    with pytest.raises(NotFound):
+        tree.match("GET", "/objects/not-a-uuid")
+    with pytest.raises(NotFound):
+        tree.match("GET", "/prices/\u0661.5")
+
+
+def test_static_segment_wins_over_parameter():
+    tree = _tree(
+        Route.get("/users/{name}", _handler, name="user"),
+        Route.get("/users/me", _handler, name="me"),
+    )
+
+    assert tree.match("GET", "/users/me")[0].name == "me"
+    assert tree.match("GET", "/users/bob")[0].name == "user"
+
+
+def test_wrong_method_lists_allowed_methods():
+    tree = _tree(
+        Route.get("/items", _handler),
+        Route.post("/items", _handler),
+    )
+
+    with pytest.raises(MethodNotAllowed) as info:
+        tree.match("DELETE", "/items")
+
+    assert info.value.allowed == {"GET", "HEAD", "POST"}
+
+
+def test_application_responds_404_and_405_with_allow():
+    app = Application(".", routes=[Route.get("/items", _handler)])
+
+    missing = request(app, "GET", "/nothing")
+    not_allowed = request(app, "POST", "/items")
+
+    assert missing.status == 404
+    assert not_allowed.status == 405
+    assert not_allowed.header("allow") == "GET, HEAD"
+
+
+def test_url_path_for_builds_and_quotes_paths():
+    tree = _tree(
+        Route.get("/items/{id:int}", _handler, name="item"),
+        Route.get("/files/{rest:path}", _handler, name="file"),
+        Route.get("/tags/{tag}", _handler, name="tag"),
+    )
+
+    assert tree.url_path_for("item", id=7) == "/items/7"
+    assert tree.url_path_for("file", rest="a b/c.txt") == "/files/a%20b/c.txt"
+    assert tree.url_path_for("tag", tag="a/b") == "/tags/a%2Fb"
+
+
+def test_url_path_for_rejects_bad_names_and_parameters():
+    tree = _tree(Route.get("/items/{id:int}", _handler, name="item"))
+
+    with pytest.raises(LookupError):
+        tree.url_path_for("missing")
+    with pytest.raises(LookupError):
+        tree.url_path_for("item")
+    with pytest.raises(LookupError):
+        tree.url_path_for("item", id=1, extra=2)
+    with pytest.raises(ValueError):
+        tree.url_path_for("item", id=-1)
+
+
+def test_duplicated_routes_and_bad_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        _tree(Route.get("/items", _handler, name="a"), Route.get("/items", _handler, name="b"))
+    with pytest.raises(ValueError):
+        _tree(Route.get("/items/{id:unknown}", _handler))
+    with pytest.raises(ValueError):
+        _tree(Route.get("/files/{rest:path}/edit", _handler))
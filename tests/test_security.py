@@ -0,0 +1,148 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+
+from smolapi.application import Application
+from smolapi.exceptions import HttpException
+from smolapi.response import PlainTextResponse
+from smolapi.routing import Route
+from smolapi.security import APIKey, AuthCache, HMACToken, Identity, JWTBearer
+
+from ._asgi import request
+
+
+def _b64(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+
+def _hmac_token(key: bytes, claims: dict) -> str:
+    """Token signed outside of `HMACToken.sign`, claims are kept as given"""
+    payload = _b64(claims)
+    signature = hmac.new(key, payload.encode(), hashlib.sha256).digest()
+    return f"{payload}.{base64.urlsafe_b64encode(signature).rstrip(b'=').decode()}"
+
+
+def _identify(authenticator, credential: str) -> Identity:
+    return asyncio.run(authenticator.identify(credential))
+
+
+def _status(authenticator, credential: str) -> int:
+    with pytest.raises(HttpException) as info:
+        _identify(authenticator, credential)
+    return info.value.status_code
+
+
+def test_jwt_round_trip_and_claims():
+    jwt = JWTBearer("secret", audience="api", issuer="auth")
+
+    identity = _identify(jwt, jwt.encode("alice", scopes=["read", "write"], roles=["admin"], expires_in=60))
+
+    assert identity.subject == "alice"
+    assert identity.scopes == {"read", "write"}
+    assert identity.roles == {"admin"}
+    assert identity.claims["aud"] == "api"
+
+
+def test_jwt_rejects_bad_tokens():
+    jwt = JWTBearer("secret", audience="api")
+    token = jwt.encode("alice")
+    header, payload, _ = token.split(".")
+
+    assert _status(jwt, token[:-2] + "AA") == 401
+    assert _status(JWTBearer("other", audience="api"), token) == 401
+    assert _status(jwt, JWTBearer("secret", audience="other").encode("alice")) == 401
+    assert _status(jwt, jwt.encode("alice", expires_in=-10)) == 401
+    assert _status(jwt, f"{_b64({'alg': 'none'})}.{payload}.") == 401
+    assert _status(jwt, "not a token") == 401
+
+
+def test_jwt_leeway_accepts_small_skew():
+    token = JWTBearer("secret").encode("alice", exp=int(time.time()) - 2)
+
+    assert _identify(JWTBearer("secret", leeway=30), token).subject == "alice"
+
+
+def test_roles_claim_as_string_is_split():
+    jwt = JWTBearer("secret")
+
+    identity = _identify(jwt, jwt.encode("alice", roles="admin ops"))
+
+    assert identity.roles == {"admin", "ops"}
+
+
+def test_roles_claim_as_string_in_foreign_token():
+    tokens = HMACToken(b"key")
+
+    assert _identify(tokens, _hmac_token(b"key", {"sub": "alice", "roles": "admin"})).roles == {"admin"}
+
+
+@pytest.mark.parametrize("roles", [5, {"admin": True}, ["admin", 1]])
+def test_invalid_roles_claim_is_rejected(roles):
+    tokens = HMACToken(b"key")
+
+    assert _status(tokens, _hmac_token(b"key", {"sub": "alice", "roles": roles})) == 401
+
+
+def test_hmac_token_signature():
+    tokens = HMACToken(b"key")
+    token = tokens.sign("svc", scopes=["read"])
+
+    assert _identify(tokens, token).scopes == {"read"}
+    payload, signature = token.split(".")
+    forged = _b64({"sub": "svc", "scope": "read admin"})
+    assert _status(tokens, f"{forged}.{signature}") == 401
+    assert _status(HMACToken(b"other"), token) == 401
+
+
+def test_verified_credentials_are_cached():
+    calls = []
+
+    def lookup(key):
+        calls.append(key)
+        return Identity("db") if key == "good" else None
+
+    keys = APIKey(lookup)
+
+    assert _identify(keys, "good").subject == "db"
+    assert _identify(keys, "good").subject == "db"
+    assert _status(keys, "bad") == 401
+    assert calls == ["good", "bad"]
+
+
+def test_auth_cache_is_bounded_and_expires():
+    cache = AuthCache(max_size=2, ttl=60)
+    for key in (b"a", b"b", b"c"):
+        cache.set(key, Identity(key.decode()))
+    cache.set(b"old", Identity("old", expires_at=time.time() - 1))
+
+    assert cache.get(b"a") is None
+    assert cache.get(b"old") is None
+    assert cache.get(b"c").subject == "c"
+
+
+def test_routes_check_scopes_and_roles():
+    jwt = JWTBearer("secret")
+
+    async def me(request):
+        return PlainTextResponse(request.identity.subject)
+
+    app = Application(".", routes=[
+        Route.get("/read", me, middlewares=[jwt.require("read")]),
+        Route.get("/admin", me, middlewares=[jwt.require(roles=["admin", "ops"])]),
+    ])
+
+    def bearer(**claims):
+        return {"authorization": "Bearer " + jwt.encode("alice", **claims)}
+
+    assert request(app, "GET", "/read", headers=bearer(scopes=["read"])).body == b"alice"
+    forbidden = request(app, "GET", "/read", headers=bearer(scopes=["write"]))
+    assert forbidden.status == 403
+    assert "insufficient_scope" in forbidden.header("www-authenticate")
+    assert request(app, "GET", "/read").status == 401
+    assert request(app, "GET", "/admin", headers=bearer(roles="ops")).status == 200
+    assert request(app, "GET", "/admin", headers=bearer(roles=["user"])).status == 403
@@ -0,0 +1,17 @@
+from smolapi.setting import LazySetting, settings
+
+
+def test_callable_settings_are_not_bound(tmp_path, monkeypatch):
+    (tmp_path / "settings.py").write_text(
+        "def ON_ERROR(exc):\n    return f'handled {exc}'\n"
+        "KEY_FUNCTION = len\n"
+        "MAX_ITEMS = 10\n"
+    )
+    monkeypatch.setenv("SMOLAPI_MAX_ITEMS", "20")
+
+    LazySetting.load_setting(str(tmp_path))
+
+    assert settings.ON_ERROR("boom") == "handled boom"
+    assert settings.KEY_FUNCTION("abc") == 3
+    assert settings.MAX_ITEMS == 20
+    assert settings.NOT_DEFINED is None
@@ -0,0 +1,47 @@
+import sys
+import time
+
+from smolapi.startup import StartupReport, record_startup
+
+
+def test_imports_inside_a_step_are_counted_once(tmp_path, monkeypatch):
+    (tmp_path / "smolapi_slow_import.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "smolapi_slow_import", raising=False)
+
+    started = time.perf_counter()
+    with record_startup() as report:
+        with report.step("load"):
+            import smolapi_slow_import  # noqa: F401
+    wall = time.perf_counter() - started
+
+    assert [name for name, *_ in report.imports] == ["smolapi_slow_import"]
+    assert report.import_time >= 0.05
+    assert report.outside_import_time == 0
+    assert 0.05 <= report.total <= wall
+
+
+def test_imports_outside_steps_and_merge(tmp_path, monkeypatch):
+    (tmp_path / "smolapi_outside_import.py").write_text("import time\ntime.sleep(0.02)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "smolapi_outside_import", raising=False)
+
+    with record_startup() as report:
+        import smolapi_outside_import  # noqa: F401
+    other = StartupReport()
+    with other.step("routes"):
+        time.sleep(0.01)
+    report.merge(other)
+
+    assert report.outside_import_time >= 0.02
+    assert report.total == report.outside_import_time + report.step_time
+    assert [name for name, _ in report.steps] == ["routes"]
+
+
+def test_importing_startup_does_not_load_importlib_abc():
+    import subprocess
+
+    code = "import sys, smolapi.startup; print('importlib.abc' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"